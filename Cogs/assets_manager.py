@@ -1,12 +1,17 @@
 from nextcord.ext import commands
+import numpy as np
 
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import List, Dict, Tuple
+from typing import Any, Callable, Iterator, List, Dict, Set, Tuple
 from datetime import datetime
-import json
 
 from .utilities import access_file
+from .utilities.actor import Actor
+from .utilities.fixed_point import lot_value, to_ticks
+from .utilities.stock_lots import StockLots
 from .utilities.datatypes import (
+    AssetDict,
     AssetsData,
     ChangeMode,
     Config,
@@ -18,7 +23,7 @@ from .utilities.datatypes import (
 )
 
 
-def log(
+def log_record(
     *,
     log_type: LogType,
     user: str,
@@ -28,75 +33,51 @@ def log(
     trade_type: TradeType | None = None,
     stock: str | None = None,
     quantity: int | None = None
-):
-    """收支紀錄(各小隊)。
-    """
+) -> LogData:
+    """建立收支紀錄(各小隊)。
 
-    with open(
-        ".\\Data\\alteration_log.json",
-        mode="r",
-        encoding="utf-8"
-    ) as json_file:
-        dict_: Dict[str, int | List[LogData]] = json.load(json_file)
+    serial於附加至收支紀錄日誌時由 :class:`GameStore` 給予。
+    """
 
     time = datetime.now().strftime("%m/%d %I:%M%p")
-    
-    if(log_type == "Transfer"):
-        transfer_team = team[0]
-        if(dict_.get(transfer_team, None) is None):
-            dict_[transfer_team] = []
-        dict_[transfer_team].append(
-            {
-                "log_type": log_type,
-                "time": time,
-                "user": user,
-                "serial": dict_["serial"],
-                "team": team,
-                "original_deposit": original_deposit,
-                "changed_deposit": changed_deposit
-            }
-        )
-    elif(dict_.get(team, None) is None):
-        dict_[team] = []
 
-    if(log_type == "DepositChange"):
-        dict_[team].append(
-            {
-                "log_type": log_type,
-                "time": time,
-                "user": user,
-                "serial": dict_["serial"],
-                "team": team,
-                "original_deposit": original_deposit,
-                "changed_deposit": changed_deposit 
-            }
-        )
+    if(log_type in ("Transfer", "DepositChange")):
+        record: LogData = {
+            "log_type": log_type,
+            "time": time,
+            "user": user,
+            "serial": None,
+            "team": team,
+            "original_deposit": original_deposit,
+            "changed_deposit": changed_deposit
+        }
     elif(log_type == "StockChange"):
-        dict_[team].append(
-            {
-                "log_type": log_type,
-                "time": time,
-                "user": user,
-                "serial": dict_["serial"],
-                "team": team,
-                "trade_type": trade_type,
-                "stock": stock,
-                "quantity": quantity
-            }
-        )
+        record: LogData = {
+            "log_type": log_type,
+            "time": time,
+            "user": user,
+            "serial": None,
+            "team": team,
+            "trade_type": trade_type,
+            "stock": stock,
+            "quantity": quantity
+        }
+    return record
 
-    dict_["serial"] += 1
-
-    with open(
-        ".\\Data\\alteration_log.json",
-        mode="w",
-        encoding="utf-8"
-    ) as json_file:
-        json.dump(
-            dict_, json_file,
-            ensure_ascii=False,
-            indent=4
-        )
+
+class AssetError(Exception):
+    """資產操作無法執行(餘額不足、持有張數不足等)，訊息可直接顯示給使用者。
+    """
+
+
+@dataclass(slots=True)
+class UnitOfWork:
+    """一次交易(:meth:`AssetsManager.transaction`)中暫存的變動。
+    """
+
+    lot_values: np.ndarray    # 交易前各股1張的價值
+    snapshots: Dict[int, AssetDict] = field(default_factory=dict)    # 小隊: 交易前的資產
+    logs: List[LogData] = field(default_factory=list)  # 待附加的收支紀錄
 
 
 @dataclass(kw_only=True, slots=True)
@@ -107,24 +88,74 @@ class TeamAssets:
 
     team_number: str
     deposit: int
-    stock_inv: Dict[str, List[int]] = field(default_factory=dict)
+    stock_inv: Dict[str, StockLots] = field(default_factory=dict)
     revenue: int = 0
 
+    def to_dict(self) -> AssetDict:
+        """轉為`team_assets`的資料格式。
+        """
+
+        return {
+            "deposit": self.deposit,
+            "stock_inv": {
+                index_: lots.to_json() for index_, lots in self.stock_inv.items()
+            },
+            "revenue": self.revenue
+        }
+
     
 class AssetsManager(commands.Cog):
     """資產控制。
+
+    UI的資產變更(`change_deposit()`、`transfer()`、`stock_trade()`)以`submit()`
+    交由單一寫入者(:class:`Actor`)依序執行，檢查與變更在同一個命令內完成；
+    檢查不通過時 raise :class:`AssetError`。同一批命令的存檔合併為每個小隊一次。
+
+    每個資產變更皆為一次交易(`transaction()`)，存款、收益、庫存及收支紀錄的變動
+    於交易結束時一起儲存，發生例外時全部還原。
     """
     
     __slots__ = (
         "bot",
         "CONFIG",
-        "team_assets"
+        "actor",
+        "deferred_saves",
+        "deferred_logs",
+        "unit_of_work",
+        "team_assets",
+        "holdings",
+        "cost_basis",
+        "average_cents",
+        "lot_values",
+        "market_value",
+        "unrealized",
+        "stock_value",
+        "unrealized_total"
     )
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.CONFIG: Config = access_file.read_file("game_config")
+        self.CONFIG: Config = access_file.read_file("game_config", deep_copy=True)
         self.team_assets: List[TeamAssets] = []    # 儲存各小隊資產
+        # 資產變更的單一寫入者
+        self.actor = Actor(
+            begin_batch=self.defer_saves,
+            end_batch=self.save_deferred
+        )
+        self.deferred_saves: Set[str] | None = None  # 批次中待儲存的小隊
+        self.deferred_logs: List[LogData] = []  # 批次中待附加的收支紀錄
+        self.unit_of_work: UnitOfWork | None = None  # 進行中的交易
+
+        # 持股矩陣(小隊 x 股票)，隨交易更新
+        self.holdings: np.ndarray = np.zeros((0, 0), dtype=np.int64)      # 持有張數
+        self.cost_basis: np.ndarray = np.zeros((0, 0), dtype=np.int64)    # 投資總成本
+        self.average_cents: np.ndarray = np.zeros((0, 0), dtype=np.int64) # 成交均價(分)
+        # 估值，隨股價(`revaluate()`)及交易更新
+        self.lot_values: np.ndarray = np.zeros(0, dtype=np.int64)         # 各股1張的價值
+        self.market_value: np.ndarray = np.zeros((0, 0), dtype=np.int64)  # 持股市值
+        self.unrealized: np.ndarray = np.zeros((0, 0), dtype=np.int64)    # 未實現損益
+        self.stock_value: np.ndarray = np.zeros(0, dtype=np.int64)        # 各小隊持股總市值
+        self.unrealized_total: np.ndarray = np.zeros(0, dtype=np.int64)   # 各小隊未實現總損益
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -140,8 +171,121 @@ class AssetsManager(commands.Cog):
             self.reset_asset_data()
         elif(not self.team_assets): # 資料不對等
             self.fetch_assets()
+        self.actor.start()
         
         print("Loaded asset_manager")
+
+    def cog_unload(self):
+        self.actor.stop()
+
+    async def submit(self, command: Callable[..., Any], /, **kwargs: Any) -> Any:
+        """|coro|
+
+        將資產變更交由單一寫入者依序執行並回傳結果，如:
+
+        `await assets_manager.submit(assets_manager.transfer, transfer_deposit_teams=..., ...)`
+
+        檢查不通過時 raise `AssetError`。
+        """
+
+        return await self.actor.submit(command, **kwargs)
+
+    def defer_saves(self):
+        """批次開始，暫緩存檔。
+        """
+
+        self.deferred_saves = set()
+
+    def save_deferred(self):
+        """批次結束，以一次寫入儲存批次中變更的小隊及收支紀錄。
+        """
+
+        teams, self.deferred_saves = self.deferred_saves, None
+        logs, self.deferred_logs = self.deferred_logs, []
+        if(teams or logs):
+            access_file.commit_assets(
+                {
+                    team: self.team_assets[int(team)-1].to_dict()
+                    for team in sorted(teams or (), key=int)
+                },
+                logs
+            )
+
+    @contextmanager
+    def transaction(self) -> Iterator[UnitOfWork]:
+        """交易單元。
+
+        區塊內的變動先只改記憶體，變更小隊資產前須呼叫`touch()`保存交易前的資產，
+        收支紀錄以`stage_log()`暫存；區塊結束時變動的小隊及收支紀錄以一次後端寫入儲存
+        (見`commit()`)。區塊內 raise 例外時還原所有變動(含各股估值)，不儲存也不記錄。
+
+        巢狀呼叫併入最外層的交易。
+        """
+
+        if(self.unit_of_work is not None):
+            yield self.unit_of_work
+            return
+
+        unit_of_work = self.unit_of_work = UnitOfWork(lot_values=self.lot_values.copy())
+        try:
+            yield unit_of_work
+        except BaseException:
+            self.unit_of_work = None
+            self.rollback(unit_of_work)
+            raise
+        self.unit_of_work = None
+        self.commit(unit_of_work)
+
+    def touch(self, team: int):
+        """保存小隊於交易前的資產(每個交易只保存第一次)。
+        """
+
+        if(self.unit_of_work is not None and team not in self.unit_of_work.snapshots):
+            self.unit_of_work.snapshots[team] = self.team_assets[team-1].to_dict()
+
+    def stage_log(self, record: LogData):
+        """暫存收支紀錄，交易結束時附加；不在交易中則直接附加。
+        """
+
+        if(self.unit_of_work is not None):
+            self.unit_of_work.logs.append(record)
+        else:
+            access_file.append_log(record)
+
+    def commit(self, unit_of_work: UnitOfWork):
+        """儲存交易中變動的小隊及收支紀錄。
+
+        兩者以一次後端寫入(SQLite為單一交易，JSON為日誌的同一行)立即儲存；
+        批次中則併入批次結束時的寫入。
+        """
+
+        if(self.deferred_saves is not None):
+            self.deferred_saves.update(str(team) for team in unit_of_work.snapshots)
+            self.deferred_logs.extend(unit_of_work.logs)
+            return
+        access_file.commit_assets(
+            {
+                str(team): self.team_assets[team-1].to_dict()
+                for team in sorted(unit_of_work.snapshots)
+            },
+            unit_of_work.logs
+        )
+
+    def rollback(self, unit_of_work: UnitOfWork):
+        """將交易中變動的小隊還原為交易前的資產及各股估值，並重新計算其持股及估值。
+        """
+
+        self.lot_values = unit_of_work.lot_values
+        for team, snapshot in unit_of_work.snapshots.items():
+            asset = self.team_assets[team-1]
+            asset.deposit = snapshot["deposit"]
+            asset.revenue = snapshot["revenue"]
+            asset.stock_inv = {
+                index_: StockLots(lots) for index_, lots in snapshot["stock_inv"].items()
+            }
+            for stock_index in range(self.holdings.shape[1]):
+                self.sync_holding(team, stock_index)
+            self.revaluate_team(team)
         
     def reset_asset_data(self):
         """清除所有資產資料，重創銀行帳戶。
@@ -167,42 +311,122 @@ class AssetsManager(commands.Cog):
             TeamAssets(
                 team_number=str(t),
                 deposit=asset[str(t)]["deposit"],
-                stock_inv=asset[str(t)]["stock_inv"],
+                stock_inv={ # 舊格式(每張一個成本)於此轉換
+                    index_: StockLots.from_json(lots)
+                    for index_, lots in asset[str(t)]["stock_inv"].items()
+                },
                 revenue=asset[str(t)]["revenue"]
             )
             for t in range(1, self.CONFIG["NUMBER_OF_TEAMS"]+2) # +1 (Testing team)
         ]
+        self.build_holdings()
+
+    def build_holdings(self, lot_values: np.ndarray | None = None):
+        """由各小隊庫存建立持股矩陣，並以`lot_values`(預設為目前股價)估值。
+        """
+
+        if(lot_values is None):
+            market_data: List[StockDict] = access_file.read_file("market_data")
+            lot_values = np.array(
+                [lot_value(to_ticks(stock["price"])) for stock in market_data],
+                dtype=np.int64
+            )
+        shape = (len(self.team_assets), len(lot_values))
+        self.holdings = np.zeros(shape, dtype=np.int64)
+        self.cost_basis = np.zeros(shape, dtype=np.int64)
+        self.average_cents = np.zeros(shape, dtype=np.int64)
+        for t, asset in enumerate(self.team_assets):
+            for stock_index in asset.stock_inv:
+                self.sync_holding(t+1, int(stock_index))
+
+        self.revaluate(lot_values)
+
+    def sync_holding(self, team: int, stock_index: int):
+        """以小隊庫存更新持股矩陣中的單一欄位(交易後呼叫)。
+        """
+
+        lots = self.team_assets[team-1].stock_inv.get(f"{stock_index}")
+        quantity = 0 if lots is None else lots.quantity
+        total_cost = 0 if lots is None else lots.total_cost
+        self.holdings[team-1, stock_index] = quantity
+        self.cost_basis[team-1, stock_index] = total_cost
+        self.average_cents[team-1, stock_index] = (
+            (total_cost*100 + quantity*500) // (quantity*1000) if quantity else 0
+        )
+
+    def revaluate(self, lot_values: np.ndarray):
+        """以各股1張的價值重新計算所有小隊的持股市值及未實現損益(每次股價變動後呼叫)。
+
+        各小隊持股總市值為持股矩陣與價值向量的一次矩陣向量乘積。
+        股票數量與持股矩陣不同時(如載入資產時尚未建立市場資料)重建持股矩陣。
+        """
+
+        if(self.holdings.shape[1] != len(lot_values)):
+            self.build_holdings(lot_values)
+            return
+        self.lot_values = lot_values
+        self.market_value = self.holdings * lot_values
+        self.unrealized = self.market_value - self.cost_basis
+        self.stock_value = self.holdings @ lot_values
+        self.unrealized_total = self.stock_value - self.cost_basis.sum(axis=1)
+
+    def revaluate_team(self, team: int):
+        """以最近的股價重新計算單一小隊的估值(交易後呼叫)。
+        """
+
+        t = team - 1
+        self.market_value[t] = self.holdings[t] * self.lot_values
+        self.unrealized[t] = self.market_value[t] - self.cost_basis[t]
+        self.stock_value[t] = self.market_value[t].sum()
+        self.unrealized_total[t] = self.unrealized[t].sum()
+
+    def current_lot_value(self, stock_index: int) -> int:
+        """指定股票現在1張的價值。
+
+        由 :class:`StockManager` 以開盤狀態推算現在的股價，未載入時讀取`market_data`。
+        """
+
+        stock_manager = self.bot.get_cog("StockManager")
+        if(stock_manager is not None and len(stock_manager.engine)):
+            return lot_value(int(stock_manager.price_ticks_at()[stock_index]))
+        stock_dict: StockDict = access_file.read_file("market_data")[stock_index]
+        return lot_value(to_ticks(stock_dict["price"]))
+
+    def holding_teams(self) -> List[int]:
+        """有股票庫存的小隊。
+        """
+
+        return (np.flatnonzero(self.holdings.any(axis=1)) + 1).tolist()
+
+    def net_worth(self, team: int) -> int:
+        """小隊總資產(存款 + 持股市值)。
+        """
+
+        return self.team_assets[team-1].deposit + int(self.stock_value[team-1])
         
     def save_assets(self, team_number: int| str | None = None):
-        """儲存所有或指定小隊資產資料至`team_assets.json`。
+        """儲存所有或指定小隊資產資料至`team_assets`。
+
+        交易中不儲存，由交易結束時一起儲存。
         """
 
+        if(self.unit_of_work is not None):
+            return
+        if(self.deferred_saves is not None):  # 批次中，批次結束時再儲存
+            self.deferred_saves.update(
+                (str(t) for t in range(1, len(self.team_assets)+1))
+                if team_number is None else (str(team_number),)
+            )
+            return
+
         if(team_number is None):    # 儲存所有小隊資料
-            dict_ = {}
-            for t, asset in enumerate(self.team_assets, start=1):
-                dict_.update(
-                    {
-                        str(t):{
-                            "deposit": asset.deposit,
-                            "stock_inv": asset.stock_inv,
-                            "revenue": asset.revenue
-                        }
-                    }
-                )
+            dict_ = {
+                str(t): asset.to_dict() for t, asset in enumerate(self.team_assets, start=1)
+            }
+            access_file.save_to("team_assets", dict_)
         else:   #　儲存指定小隊資料
-            dict_: AssetsData = access_file.read_file("team_assets")
             asset = self.team_assets[int(team_number)-1]
-            dict_.update(
-                {
-                    str(team_number):{
-                        "deposit": asset.deposit,
-                        "stock_inv": asset.stock_inv,
-                        "revenue": asset.revenue
-                    }
-                }
-            )
-
-        access_file.save_to("team_assets", dict_)
+            access_file.save_team_asset(team_number, asset.to_dict())
     
     def change_deposit(
             self,
@@ -231,34 +455,37 @@ class AssetsManager(commands.Cog):
             變更者。
         liquidation: `Optional[bool]` = False
             是否為清算所獲收入，是則不計入總收入。
+
+        減少的存款超過餘額則 raise `AssetError`。
         """
         
         original_deposit = self.team_assets[team-1].deposit # 原餘額     
-
-    
-        if(change_mode == "Deposit"):
-            self.team_assets[team-1].deposit += amount
-            if(not liquidation):
-                self.increment_revenue(team, amount)
-        elif(change_mode == "Withdraw"):
-            self.team_assets[team-1].deposit -= amount
-        elif(change_mode == "Change"):
-            self.team_assets[team-1].deposit = amount
-            if(amount > original_deposit):  # 更改存款大於原存款時，差額補上總收益
-                self.increment_revenue(team, amount-original_deposit)
-            elif(amount < original_deposit):    # 更改存款大於原存款時，總收益減掉差額
-                self.decreese_revenue(team, original_deposit-amount)
-                
-        # 儲存紀錄
-        log(
-            log_type="DepositChange",
-            user=user,
-            team=str(team),
-            original_deposit=original_deposit,
-            changed_deposit=self.team_assets[team-1].deposit
-        )
-        # 儲存資料
-        self.save_assets(team)
+        if(change_mode == "Withdraw" and original_deposit < amount):
+            raise AssetError(f"第{team}小隊帳戶餘額不足!!!")
+
+        with self.transaction():
+            self.touch(team)
+            if(change_mode == "Deposit"):
+                self.team_assets[team-1].deposit += amount
+                if(not liquidation):
+                    self.increment_revenue(team, amount)
+            elif(change_mode == "Withdraw"):
+                self.team_assets[team-1].deposit -= amount
+            elif(change_mode == "Change"):
+                self.team_assets[team-1].deposit = amount
+                if(amount > original_deposit):  # 更改存款大於原存款時，差額補上總收益
+                    self.increment_revenue(team, amount-original_deposit)
+                elif(amount < original_deposit):    # 更改存款大於原存款時，總收益減掉差額
+                    self.decreese_revenue(team, original_deposit-amount)
+                    
+            # 儲存紀錄
+            self.stage_log(log_record(
+                log_type="DepositChange",
+                user=user,
+                team=str(team),
+                original_deposit=original_deposit,
+                changed_deposit=self.team_assets[team-1].deposit
+            ))
 
     def transfer(
             self,
@@ -277,29 +504,35 @@ class AssetsManager(commands.Cog):
             轉帳額度。
         user: `str`
             操作轉帳者。
+
+        轉出及轉入為同一小隊或轉出小隊餘額不足則 raise `AssetError`。
         """
 
         transfer_team, deposit_team = (int(t) for t in transfer_deposit_teams)
+        if(transfer_team == deposit_team):
+            raise AssetError("不可轉帳給同個小隊!!!")
+        if(self.team_assets[transfer_team-1].deposit < amount):
+            raise AssetError(f"第{transfer_team}小隊帳戶餘額不足!!!")
         original_deposits = (
             self.team_assets[transfer_team-1].deposit,
             self.team_assets[deposit_team-1].deposit
         )
-        self.team_assets[transfer_team-1].deposit -= amount
-        self.team_assets[deposit_team-1].deposit += amount
-
-        log(
-            log_type="Transfer",
-            user=user,
-            team=transfer_deposit_teams,
-            original_deposit=original_deposits,
-            changed_deposit=(
-                self.team_assets[transfer_team-1].deposit,
-                self.team_assets[deposit_team-1].deposit
-            )
-        )
-
-        self.save_assets(transfer_team)
-        self.save_assets(deposit_team)
+        with self.transaction():
+            self.touch(transfer_team)
+            self.touch(deposit_team)
+            self.team_assets[transfer_team-1].deposit -= amount
+            self.team_assets[deposit_team-1].deposit += amount
+
+            self.stage_log(log_record(
+                log_type="Transfer",
+                user=user,
+                team=transfer_deposit_teams,
+                original_deposit=original_deposits,
+                changed_deposit=(
+                    self.team_assets[transfer_team-1].deposit,
+                    self.team_assets[deposit_team-1].deposit
+                )
+            ))
         
     def stock_trade(
             self,
@@ -329,63 +562,76 @@ class AssetsManager(commands.Cog):
         -------
         display_value: `int`
             買進: 購入成本；賣出: 投資損益
+
+        買進時存款不足或賣出時持有張數不足則 raise `AssetError`。
         """
 
-        # 該股市場資料
-        stock_dict: StockDict = access_file.read_file("market_data")[stock_index]
         # 該股當前價值
-        value: int = int(round(stock_dict["price"], 2) * 1000) # 該股當前成本價
+        value: int = self.current_lot_value(stock_index)   # 該股當前成本價(每張)
         # 該小隊持有股票及原始成本
         stock_inv = self.team_assets[team-1].stock_inv
-        if(trade_type == "買進"):
-            # 新增股票index為key
-            if(stock_inv.get(f"{stock_index}") is None):
-                stock_inv[f"{stock_index}"] = []
-            #將成本價新增至TeamAssets資料
-            stock_inv[f"{stock_index}"].extend([value] * quantity)
-            # 扣錢
-            self.team_assets[team-1].deposit -= value * quantity
-            # 計算金額 買進->市價*張數 
-            display_value = value * quantity
-        elif(trade_type == "賣出"):
-            # 計算金額 賣出->投資損益
-            display_value = (value * quantity) - sum(stock_inv[f"{stock_index}"][:quantity])
-            if(display_value > 0):  # 若有資本利得則算入總收益
-                self.increment_revenue(team, display_value)
-            # 以股票當前市場價歸還此小隊，從先買的股票賣。
-            self.team_assets[team-1].stock_inv[f"{stock_index}"] = stock_inv[f"{stock_index}"][quantity:]
-            self.team_assets[team-1].deposit += value * quantity
-            # 刪除空的資料
-            if(not self.team_assets[team-1].stock_inv.get(f"{stock_index}")):
-                self.team_assets[team-1].stock_inv.pop(f"{stock_index}")
-        
         initail_stock_data: InitialStockData = access_file.read_file("raw_stock_data")["initial_data"][stock_index]
         stock_name_symbol = f"{initail_stock_data["name"]} {initail_stock_data["symbol"]}"
-        log(
-            log_type="StockChange",
-            user=user,
-            team=str(team),
-            trade_type=trade_type,
-            stock=stock_name_symbol,
-            quantity=quantity
-        )
-
-        self.save_assets(team)
+        if(trade_type == "買進" and value * quantity > self.team_assets[team-1].deposit):
+            raise AssetError("存款餘額不足")
+        elif(trade_type == "賣出" and
+             quantity > len(stock_inv.get(f"{stock_index}", ()))):
+            raise AssetError(f"{stock_name_symbol} 持有張數不足")
+
+        if(stock_index >= self.holdings.shape[1]):  # 載入資產時尚未建立市場資料
+            self.build_holdings()
+        with self.transaction():
+            self.touch(team)
+            if(trade_type == "買進"):
+                # 新增股票index為key
+                if(stock_inv.get(f"{stock_index}") is None):
+                    stock_inv[f"{stock_index}"] = StockLots()
+                #將成本價新增至TeamAssets資料
+                stock_inv[f"{stock_index}"].buy(value, quantity)
+                # 扣錢
+                self.team_assets[team-1].deposit -= value * quantity
+                # 計算金額 買進->市價*張數 
+                display_value = value * quantity
+            elif(trade_type == "賣出"):
+                # 計算金額 賣出->投資損益，從先買的股票賣。
+                display_value = (value * quantity) - stock_inv[f"{stock_index}"].sell(quantity)
+                if(display_value > 0):  # 若有資本利得則算入總收益
+                    self.increment_revenue(team, display_value)
+                # 以股票當前市場價歸還此小隊
+                self.team_assets[team-1].deposit += value * quantity
+                # 刪除空的資料
+                if(not self.team_assets[team-1].stock_inv.get(f"{stock_index}")):
+                    self.team_assets[team-1].stock_inv.pop(f"{stock_index}")
+            # 更新持股矩陣及估值
+            self.lot_values[stock_index] = value
+            self.sync_holding(team, stock_index)
+            self.revaluate_team(team)
+            
+            self.stage_log(log_record(
+                log_type="StockChange",
+                user=user,
+                team=str(team),
+                trade_type=trade_type,
+                stock=stock_name_symbol,
+                quantity=quantity
+            ))
         return display_value
     
     def increment_revenue(self, team: int, amount: int):
         """增加小隊的總收入。
         """
 
-        self.team_assets[team-1].revenue += amount
-        self.save_assets(team)
+        with self.transaction():
+            self.touch(team)
+            self.team_assets[team-1].revenue += amount
 
     def decreese_revenue(self, team: int, amount: int):
         """減少小隊的總收入(通常只有在存款記錯更改後才會用到)。
         """
 
-        self.team_assets[team-1].revenue -= amount
-        self.save_assets(team)
+        with self.transaction():
+            self.touch(team)
+            self.team_assets[team-1].revenue -= amount
 
 
 def setup(bot: commands.Bot):
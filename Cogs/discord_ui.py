@@ -1,15 +1,23 @@
 from nextcord.ext import commands, application_checks
 from nextcord import ui
 import nextcord as ntd
+import numpy as np
 
-from typing import Callable, Dict, List, Literal, Tuple
+from typing import Callable, ClassVar, Dict, List, Literal, Tuple
 from datetime import datetime
+import hashlib
+import json
 import re
 
-from .assets_manager import AssetsManager
+from .assets_manager import AssetError, AssetsManager
 from .utilities import access_file
+from .utilities.fixed_point import format_cents, to_ticks
+from .utilities.fan_out import FanOut
+from .utilities.log_index import parse_log_time
+from .utilities.market_board import MarketBoard
+from .utilities.render_scheduler import RenderScheduler
+from .utilities.stock_lots import StockLots
 from .utilities.datatypes import (
-    AlterationLog,
     AssetDict,
     ChannelIDs,
     ChangeMode,
@@ -45,12 +53,14 @@ def get_stock_name_symbol(stock_index: int | str) -> str:
     return f"{name} {symbol}"
 
 
-def get_stock_inventory(team: int | str) -> Dict[str, List[int]]:
+def get_stock_inventory(team: int | str) -> Dict[str, StockLots]:
     """擷取小隊股票庫存。
     """
 
     asset: AssetDict = access_file.read_file("team_assets")[f"{team}"]
-    stock_inv: Dict[str, List[int]] = asset.get("stock_inv")
+    stock_inv: Dict[str, StockLots] = {
+        index_: StockLots.from_json(lots) for index_, lots in asset.get("stock_inv").items()
+    }
 
     return stock_inv
 
@@ -63,7 +73,7 @@ def get_deposit(team: int | str) -> int:
 
 
 def get_stock_inventory_string(
-        stock_inv: Dict[str, List[int]],
+        stock_inv: Dict[str, StockLots],
         index_: str | int | None = None
     ) -> str:
     """將股票庫存資料格式化。
@@ -110,17 +120,6 @@ def query_revenue_embed(team: int = None) -> ntd.Embed:
     return embed
 
 
-def get_stock_price(stock_index: int | str) -> float:
-    """擷取指定股票當下的價格。
-    """
-
-    stock_dict: StockDict = access_file.read_file(
-        "market_data"
-    )[int(stock_index)]
-
-    return stock_dict["price"]
-
-
 def get_time(format: str, /) -> str:
     """取得現在時間並回傳格式化的`str`。
     """
@@ -453,20 +452,21 @@ class TradeView(ui.View):
                     ephemeral=True
                 )
             return
-        
-        if(self.trade_type == "買進" and
-            (get_stock_price(self.selected_stock_index)
-            * self.quantity_field_value * 1000 > self.deposit)):    # 餘額不足
-            await interaction.response.send_message(
-                content="**存款餘額不足**",
-                delete_after=5.0,
-                ephemeral=True
+
+        # stock_trade, update_log(餘額、持有張數於執行交易時檢查)
+        assets_manager: AssetsManager = self.bot.get_cog("AssetsManager")
+        try:
+            display_value = await assets_manager.submit(
+                assets_manager.stock_trade,
+                team=self.team,
+                trade_type=self.trade_type,
+                stock_index=self.selected_stock_index,
+                quantity=self.quantity_field_value,
+                user=self.user_name
             )
-            return
-        elif(self.trade_type == "賣出" and
-             self.quantity_field_value > len(self.stock_inv[f"{self.selected_stock_index}"])):
+        except AssetError as e:
             await interaction.response.send_message(
-                content=f"**{get_stock_name_symbol(self.selected_stock_index)} 持有張數不足**",
+                content=f"**{e}**",
                 delete_after=5.0,
                 ephemeral=True
             )
@@ -481,15 +481,6 @@ class TradeView(ui.View):
             view=self
         )
         self.stop()
-        # stock_trade, update_log
-        assets_manager: AssetsManager = self.bot.get_cog("AssetsManager")
-        display_value = assets_manager.stock_trade(
-            team=self.team,
-            trade_type=self.trade_type,
-            stock_index=self.selected_stock_index,
-            quantity=self.quantity_field_value,
-            user=self.user_name
-        )
 
         discord_ui: DiscordUI = self.bot.get_cog("DiscordUI")
         await discord_ui.send_notification(
@@ -501,8 +492,7 @@ class TradeView(ui.View):
             quantity=self.quantity_field_value,
             display_value=display_value
         )
-        await discord_ui.update_alteration_log()
-        await discord_ui.update_asset_ui(self.team)
+        discord_ui.mark_dirty("log", f"asset:team_{self.team}")
 
     @ui.button(
         label="取消交易",
@@ -1100,12 +1090,19 @@ class DepositChangeView(ui.View):
                     ephemeral=True
                 )
             return
-        # 檢查小隊金額是否足夠
-        self.selected_team_deposit = get_deposit(self.selected_team)
-        if(self.selected_mode == "Withdraw" and
-            self.selected_team_deposit < self.amount):   # 此小隊金額不足扣繳
+        # 變更第n小隊存款(小隊金額是否足夠扣繳於變更時檢查)
+        assets_manager: AssetsManager = self.bot.get_cog("AssetsManager")
+        try:
+            await assets_manager.submit(
+                assets_manager.change_deposit,
+                team=self.selected_team,  
+                change_mode=self.selected_mode,
+                amount=self.amount,
+                user=self.user_name
+            )
+        except AssetError as e:
             await interaction.response.send_message(
-                content=f"**第{self.selected_team}小隊帳戶餘額不足!!!**",
+                content=f"**{e}**",
                 delete_after=5.0,
                 ephemeral=True
             )
@@ -1120,17 +1117,9 @@ class DepositChangeView(ui.View):
             delete_after=5.0,
         )
         AssetFunctionView.remove_changing_user(interaction.user.id)
-        # 變更第n小隊存款
-        assets_manager: AssetsManager = self.bot.get_cog("AssetsManager")
-        assets_manager.change_deposit(   
-            team=self.selected_team,  
-            change_mode=self.selected_mode,
-            amount=self.amount,
-            user=self.user_name
-        )
         discord_ui: DiscordUI = self.bot.get_cog("DiscordUI")
         # 更新小隊資產
-        await discord_ui.update_asset_ui(team=self.selected_team)
+        discord_ui.mark_dirty(f"asset:team_{self.selected_team}")
         # 發送即時通知
         await discord_ui.send_notification(
             log_type="DepositChange",
@@ -1140,7 +1129,7 @@ class DepositChangeView(ui.View):
             amount=self.amount
         )
         # 更新收支紀錄
-        await discord_ui.update_alteration_log()
+        discord_ui.mark_dirty("log")
         self.stop()
     
     @ui.button(
@@ -1336,19 +1325,18 @@ class DepositTransferView(ui.View):
                     ephemeral=True
                 )
             return
-        # 檢查轉出小隊金額是否足夠
-        self.t_team_deposit = get_deposit(self.transfer_team)
-        if(self.t_team_deposit < self.amount):
-            await interaction.response.send_message(
-                content=f"**第{self.transfer_team}小隊帳戶餘額不足!!!**",
-                delete_after=5.0,
-                ephemeral=True
+        # Transfer(轉出小隊金額是否足夠、是否轉給同個小隊於轉帳時檢查)
+        assets_manager: AssetsManager = self.bot.get_cog("AssetsManager")
+        try:
+            await assets_manager.submit(
+                assets_manager.transfer,
+                transfer_deposit_teams=(self.transfer_team, self.deposit_team),
+                amount=self.amount,
+                user=self.user_name
             )
-            return
-        # 不可轉帳給同個小隊
-        if(self.transfer_team == self.deposit_team):
+        except AssetError as e:
             await interaction.response.send_message(
-                content="**不可轉帳給同個小隊!!!**",
+                content=f"**{e}**",
                 delete_after=5.0,
                 ephemeral=True
             )
@@ -1363,18 +1351,13 @@ class DepositTransferView(ui.View):
             delete_after=5.0
         )
         AssetFunctionView.remove_transfering_user(interaction.user.id)
-        # Transfer
-        assets_manager: AssetsManager = self.bot.get_cog("AssetsManager")
-        assets_manager.transfer(
-            transfer_deposit_teams=(self.transfer_team, self.deposit_team),
-            amount=self.amount,
-            user=self.user_name
-        )
         
         discord_ui: DiscordUI = self.bot.get_cog("DiscordUI")
         # Update Asset UI
-        await discord_ui.update_asset_ui(team=self.transfer_team)
-        await discord_ui.update_asset_ui(team=self.deposit_team)
+        discord_ui.mark_dirty(
+            f"asset:team_{self.transfer_team}",
+            f"asset:team_{self.deposit_team}"
+        )
         # Send Notification
         await discord_ui.send_notification(
             log_type="Transfer",
@@ -1382,7 +1365,7 @@ class DepositTransferView(ui.View):
             user=self.user_name,
             amount=self.amount
         )
-        await discord_ui.update_alteration_log()
+        discord_ui.mark_dirty("log")
         self.stop()
 
     @ui.button(
@@ -1558,6 +1541,34 @@ class LiquidationView(ui.View):
                 )
             return
 
+        # 清算
+        assets_manager: AssetsManager = self.bot.get_cog("AssetsManager")
+        try:
+            if(self.liquidation_type == "股票"):
+                display_value = await assets_manager.submit(
+                    assets_manager.stock_trade,
+                    team=self.selected_team,
+                    trade_type="賣出",
+                    stock_index=self.selected_stock_index,
+                    quantity=1,
+                    user=f"{self.user_name} (清算)"
+                )
+            elif(self.liquidation_type == "房地"):
+                await assets_manager.submit(
+                    assets_manager.change_deposit,
+                    team=self.selected_team,
+                    change_mode="Deposit",
+                    amount=(self.amount//2), # 歸還房地的一半價值
+                    user=f"{self.user_name} (清算)"
+                )
+        except AssetError as e:
+            await interaction.response.send_message(
+                content=f"**{e}**",
+                delete_after=5.0,
+                ephemeral=True
+            )
+            return
+
         # 清算成功訊息
         self.clear_items()
         await interaction.response.edit_message(
@@ -1567,17 +1578,8 @@ class LiquidationView(ui.View):
             delete_after=5.0,
         )
         AssetFunctionView.remove_liquidating_user(interaction.user.id)
-        # 清算
-        assets_manager: AssetsManager = self.bot.get_cog("AssetsManager")
         discord_ui: DiscordUI = self.bot.get_cog("DiscordUI")
         if(self.liquidation_type == "股票"):
-            display_value = assets_manager.stock_trade(
-                team=self.selected_team,
-                trade_type="賣出",
-                stock_index=self.selected_stock_index,
-                quantity=1,
-                user=f"{self.user_name} (清算)"
-            )
             await discord_ui.send_notification(
                 log_type="StockChange",
                 team=self.selected_team,
@@ -1588,12 +1590,6 @@ class LiquidationView(ui.View):
                 display_value=display_value
             )
         elif(self.liquidation_type == "房地"):
-            assets_manager.change_deposit(
-                team=self.selected_team,
-                change_mode="Deposit",
-                amount=(self.amount//2), # 歸還房地的一半價值
-                user=f"{self.user_name} (清算)"
-            )
             # 發送及時通知
             await discord_ui.send_notification(
                 log_type="DepositChange",
@@ -1603,8 +1599,7 @@ class LiquidationView(ui.View):
                 amount=(self.amount//2)
             )
         # 更新小隊資產並更新收支紀錄
-        await discord_ui.update_asset_ui(team=self.selected_team)
-        await discord_ui.update_alteration_log()
+        discord_ui.mark_dirty(f"asset:team_{self.selected_team}", "log")
         self.stop()
 
     @ui.button(
@@ -1641,7 +1636,7 @@ class StockLiquidationSelect(ui.StringSelect):
     def __init__(
             self,
             original_view: LiquidationView,
-            stock_inv: Dict[str, List[int]]
+            stock_inv: Dict[str, StockLots]
     ):
         super().__init__(
             placeholder="選擇要清算的股票",
@@ -1727,6 +1722,28 @@ class AmountInput(ui.Modal):
         self.stop()
 
 
+def log_field(record: LogData) -> Tuple[str, str]:
+    """收支紀錄的Embed欄位(名稱, 內容)。
+    """
+
+    if(record["log_type"] == "DepositChange"):
+        field_name = f"#{record['serial']} {record['user']} 在 {record['time']}\n" \
+                     f"變更第{record['team']}小隊存款"
+        field_value = f"{record['original_deposit']:,} {u'\u2192'} {record['changed_deposit']:,}"
+    elif(record["log_type"] == "Transfer"):
+        field_name = f"#{record['serial']} {record['user']} 在 {record['time']}\n" \
+                    f"進行轉帳"
+        field_value = f"轉出 第{record['team'][0]}小隊存款\n" \
+                      f"{record['original_deposit'][0]} {u'\u2192'} {record['changed_deposit'][0]}\n" \
+                      f"轉入 第{record['team'][1]}小隊存款\n" \
+                      f"{record['original_deposit'][1]} {u'\u2192'} {record['changed_deposit'][1]}"
+    elif(record["log_type"] == "StockChange"):
+        field_name = f"#{record['serial']} {record['user']} 在 {record['time']}\n" \
+                     f"{record['trade_type']} 第{record['team']}小隊股票"
+        field_value = f"商品: {record['stock']} 張數: {record['quantity']}"
+    return field_name, field_value
+
+
 class LogEmbed(ntd.Embed):
     """收支紀錄 Embed Message。
     """
@@ -1738,34 +1755,9 @@ class LogEmbed(ntd.Embed):
             description="小隊存款金額的變動以及\n買賣股票最近的25筆紀錄"
         )
 
-        log: AlterationLog = access_file.read_file("alteration_log").copy()
-        serial: int = log.pop("serial")
-        # 將所有字典展開為一list並按照serial排序
-        record_list: List[LogData] = sorted(
-            [item for sublist in log.values() for item in sublist],
-            key=lambda x: x["serial"]
-        )
-        # 只列出最近的25個紀錄
-        start_index: int = 0 if serial < 25 else serial-25
-        record_list = record_list[start_index:]
-
-        for record in record_list:
-            if(record["log_type"] == "DepositChange"):
-                field_name = f"#{record['serial']} {record['user']} 在 {record['time']}\n" \
-                             f"變更第{record['team']}小隊存款"
-                field_value = f"{record['original_deposit']:,} {u'\u2192'} {record['changed_deposit']:,}"
-            elif(record["log_type"] == "Transfer"):
-                field_name = f"#{record['serial']} {record['user']} 在 {record['time']}\n" \
-                            f"進行轉帳"
-                field_value = f"轉出 第{record['team'][0]}小隊存款\n" \
-                              f"{record['original_deposit'][0]} {u'\u2192'} {record['changed_deposit'][0]}\n" \
-                              f"轉入 第{record['team'][1]}小隊存款\n" \
-                              f"{record['original_deposit'][1]} {u'\u2192'} {record['changed_deposit'][1]}"
-            elif(record["log_type"] == "StockChange"):
-                field_name = f"#{record['serial']} {record['user']} 在 {record['time']}\n" \
-                             f"{record['trade_type']} 第{record['team']}小隊股票"
-                field_value = f"商品: {record['stock']} 張數: {record['quantity']}"
-            
+        # 只列出最近的25個紀錄(由固定長度的佇列取出，不需查詢整份紀錄)
+        for record in access_file.recent_logs():
+            field_name, field_value = log_field(record)
             self.add_field(
                 name=field_name,
                 value=field_value,
@@ -1777,6 +1769,132 @@ class LogEmbed(ntd.Embed):
         )
 
 
+class LogBrowserView(ui.View):
+    """收支紀錄查詢 View。
+
+    查詢結果為符合條件的serial(由索引取得)，翻頁時只取出該頁的紀錄，由新到舊排列。
+    """
+
+    # 每頁紀錄數
+    PAGE_SIZE: ClassVar[int] = 10
+
+    def __init__(self, serials: List[int], conditions: str):
+        super().__init__(timeout=600.0)
+        self.serials = serials
+        self.conditions = conditions    # 查詢條件說明
+        self.page: int = 0              # 0為最新的一頁
+        self.update_buttons()
+
+    @property
+    def page_count(self) -> int:
+        return max(-(-len(self.serials) // LogBrowserView.PAGE_SIZE), 1)
+
+    def update_buttons(self):
+        """依目前頁數啟用或停用翻頁按鈕。
+        """
+
+        self.newest_button_callback.disabled = self.page == 0
+        self.newer_button_callback.disabled = self.page == 0
+        self.older_button_callback.disabled = self.page >= self.page_count-1
+        self.oldest_button_callback.disabled = self.page >= self.page_count-1
+
+    def embed_message(self) -> ntd.Embed:
+        """目前頁面的 Embed Message。
+        """
+
+        embed = ntd.Embed(
+            color=PURPLE,
+            title="收支紀錄查詢",
+            description=f"{self.conditions}\n共{len(self.serials)}筆紀錄"
+        )
+        end = len(self.serials) - self.page*LogBrowserView.PAGE_SIZE
+        page_serials = self.serials[max(end-LogBrowserView.PAGE_SIZE, 0):end]
+        for record in access_file.get_logs(page_serials[::-1]):
+            field_name, field_value = log_field(record)
+            embed.add_field(
+                name=field_name,
+                value=field_value,
+                inline=False
+            )
+        embed.set_footer(
+            text=f"第{self.page+1}/{self.page_count}頁 • {get_time("%m/%d %I:%M%p")}"
+        )
+        return embed
+
+    async def turn_page(self, interaction: ntd.Interaction, page: int):
+        """|coro|
+
+        翻到指定頁數。
+        """
+
+        self.page = min(max(page, 0), self.page_count-1)
+        self.update_buttons()
+        await interaction.response.edit_message(
+            embed=self.embed_message(),
+            view=self
+        )
+
+    @ui.button(
+        emoji="⏮️",
+        style=ntd.ButtonStyle.gray,
+        row=0
+    )
+    async def newest_button_callback(
+        self,
+        button: ui.Button,
+        interaction: ntd.Interaction
+    ):
+        """最新一頁 callback。
+        """
+
+        await self.turn_page(interaction, 0)
+
+    @ui.button(
+        emoji="◀️",
+        style=ntd.ButtonStyle.gray,
+        row=0
+    )
+    async def newer_button_callback(
+        self,
+        button: ui.Button,
+        interaction: ntd.Interaction
+    ):
+        """較新一頁 callback。
+        """
+
+        await self.turn_page(interaction, self.page-1)
+
+    @ui.button(
+        emoji="▶️",
+        style=ntd.ButtonStyle.gray,
+        row=0
+    )
+    async def older_button_callback(
+        self,
+        button: ui.Button,
+        interaction: ntd.Interaction
+    ):
+        """較舊一頁 callback。
+        """
+
+        await self.turn_page(interaction, self.page+1)
+
+    @ui.button(
+        emoji="⏭️",
+        style=ntd.ButtonStyle.gray,
+        row=0
+    )
+    async def oldest_button_callback(
+        self,
+        button: ui.Button,
+        interaction: ntd.Interaction
+    ):
+        """最舊一頁 callback。
+        """
+
+        await self.turn_page(interaction, self.page_count-1)
+
+
 class DepositChangeNotificationEmbed(ntd.Embed):
     """資產變更即時通知 Embed Message。
     """
@@ -1877,15 +1995,17 @@ class StockChangeNoticeEmbed(ntd.Embed):
 
 class TeamAssetEmbed(ntd.Embed):
     """小隊資產狀態 Embed Message，包含存款、總收益以及持股狀況。
+
+    數值皆由 :class:`AssetsManager` 的持股矩陣預先計算，此處只負責格式化。
     """
 
-    def __init__(self, team: int):
+    def __init__(self, team: int, assets: AssetsManager):
         super().__init__(
             color=PURPLE,
             title=f"第{team}小隊 F-Pay帳戶"
         )
-        self.deposit_embed_format(team)
-        self.stock_embed_format(team)
+        self.deposit_embed_format(team, assets)
+        self.stock_embed_format(team, assets)
 
     @staticmethod
     def get_profit_lost(value: int) -> str:
@@ -1899,47 +2019,46 @@ class TeamAssetEmbed(ntd.Embed):
         else:
             return "__損失__"
 
-    def deposit_embed_format(self, team: int):
+    def deposit_embed_format(self, team: int, assets: AssetsManager):
         """存款、總收益格式。
         """
 
-        asset_data: AssetDict = access_file.read_file("team_assets")[f"{team}"]
+        asset = assets.team_assets[team-1]
         self.add_field(
             name="",
-            value=f"**存款: {asset_data['deposit']:,}**"
+            value=f"**存款: {asset.deposit:,}**"
         )
         self.add_field(
             name="",
-            value=f"**總收益: {asset_data['revenue']:,}**"
+            value=f"**總收益: {asset.revenue:,}**"
         )
     
-    def stock_embed_format(self, team: int):
+    def stock_embed_format(self, team: int, assets: AssetsManager):
         """持股狀況格式。
         """
 
-        stock_inv = get_stock_inventory(team)
-        if(stock_inv):
-            total_unrealized_gain_loss = 0
+        t = team - 1
+        held_stocks: List[int] = np.flatnonzero(assets.holdings[t]).tolist()
+        if(held_stocks):
+            total_unrealized_gain_loss = int(assets.unrealized_total[t])    # 未實現總損益
             fields: List[str] = []
-            for stock_idx, stocks in stock_inv.items():
-                pice: int = len(stocks) # 持有張數
-                total_cost: int = sum(stocks)   # 投資總成本
-                avg_price: float = round(total_cost / (pice*1000), 2)   # 成交均價
-                unrealized_gain_loss: int = (round(get_stock_price(stock_idx), 2)
-                                             - avg_price) * pice * 1000
-                total_unrealized_gain_loss += unrealized_gain_loss  # 未實現總損益
+            for stock_idx in held_stocks:
+                pice = int(assets.holdings[t, stock_idx])   # 持有張數
+                total_cost = int(assets.cost_basis[t, stock_idx])   # 投資總成本
+                avg_cents = int(assets.average_cents[t, stock_idx]) # 成交均價(分)
+                unrealized_gain_loss = int(assets.unrealized[t, stock_idx])
                 fields.append(
                     f"**{get_stock_name_symbol(stock_idx)}**" \
                     f"持有張數: {pice}\n" \
-                    f"成交均價: {avg_price:.2f}\n" \
+                    f"成交均價: {format_cents(avg_cents)}\n" \
                     f"投資總成本: {total_cost:,}\n" \
-                    f"未實現損益: {self.get_profit_lost(unrealized_gain_loss)} {abs(unrealized_gain_loss):,.0f}\n" \
+                    f"未實現損益: {self.get_profit_lost(unrealized_gain_loss)} {abs(unrealized_gain_loss):,}\n" \
                 )
             self.add_field(
                 name="股票庫存",
                 value=f"**未實現總損益:** " \
                      f"{self.get_profit_lost(total_unrealized_gain_loss)} " \
-                     f"**{abs(total_unrealized_gain_loss):,.0f}**",
+                     f"**{abs(total_unrealized_gain_loss):,}**",
                 inline=False
             )
             for field in fields:
@@ -1982,20 +2101,51 @@ class DiscordUI(commands.Cog):
         "CONFIG",
         "CHANNEL_IDS",
         "MESSAGE_IDS",
-        "ALTERATION_LOG_MESSAGE",
-        "STOCK_MARKET_MESSAGE",
-        "NEWS_FEED_CHANNEL"
+        "messages",
+        "render_digests",
+        "sent_edits",
+        "skipped_edits",
+        "notice_channels",
+        "NEWS_FEED_CHANNEL",
+        "fan_out",
+        "render_scheduler",
+        "market_board"
     )
+    # 訊息更新的優先度(數字小者優先)
+    RENDER_PRIORITIES: ClassVar[Dict[str, int]] = {
+        "market": 0,
+        "asset": 1,
+        "log": 2
+    }
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.CONFIG: Config = access_file.read_file("game_config")
+        self.CONFIG: Config = access_file.read_file("game_config", deep_copy=True)
         self.CHANNEL_IDS: ChannelIDs = self.CONFIG["channel_ids"]
         self.MESSAGE_IDS: MessageIDs = self.CONFIG["message_ids"]
         
-        self.ALTERATION_LOG_MESSAGE: ntd.Message = None
-        self.STOCK_MARKET_MESSAGE: ntd.Message = None
+        # 由程式更新的訊息("market"、"log"、"asset:team_<n>")
+        self.messages: Dict[str, ntd.Message | ntd.PartialMessage] = {}
+        # 各訊息最後一次更新內容的摘要，內容相同時不再更新
+        self.render_digests: Dict[str, bytes] = {}
+        self.sent_edits: int = 0      # 實際送出的更新次數
+        self.skipped_edits: int = 0   # 內容未變而略過的更新次數
+        # 各小隊「即時通知」頻道
+        self.notice_channels: Dict[int, ntd.TextChannel] = {}
         self.NEWS_FEED_CHANNEL: ntd.TextChannel = None
+        # 並行送出多則訊息更新(依頻道分別排隊)
+        self.fan_out = FanOut(self.CONFIG.get("FAN_OUT_LIMIT", 8))
+        # 合併訊息更新
+        self.render_scheduler = RenderScheduler(
+            self.render,
+            interval=self.CONFIG.get("RENDER_INTERVAL", 1.0),
+            max_renders=self.CONFIG.get("RENDER_MAX_EDITS", 12),
+            priorities=DiscordUI.RENDER_PRIORITIES,
+            fan_out=self.fan_out,
+            route=lambda key: self.message_location(key)[0]
+        )
+        # 市場動態看板(固定欄位預先排版)
+        self.market_board = MarketBoard(INITIAL_STOCK_DATA)
         
     @commands.Cog.listener()
     async def on_ready(self):
@@ -2017,6 +2167,7 @@ class DiscordUI(commands.Cog):
         CLEAR_LOG: bool = self.CONFIG["CLEAR_LOG"]
         UPDATE_ASSET: bool = self.CONFIG["UPDATE_ASSET"]
         FETCH_TL_IDS: bool = self.CONFIG["FETCH_TL_IDS"]
+        self.cache_messages()
         if(RESET_UI):
             await self.reset_all_ui()
 
@@ -2033,14 +2184,39 @@ class DiscordUI(commands.Cog):
         else:
             TradeView.get_tl_id_to_team(self.CONFIG)
 
-        await self.fetch_alteration_log_message()
         await self.fetch_news_feed_channel()
-        await self.fetch_stock_market_message()
 
         await self.update_market_ui()
+        self.render_scheduler.start()
 
         print("Loaded discord_ui")
 
+    def cog_unload(self):
+        self.render_scheduler.stop()
+
+    def mark_dirty(self, *keys: str):
+        """標記需要更新的訊息，由 :class:`RenderScheduler` 合併後更新。
+
+        - `"market"`: 市場動態(所有頁面)
+        - `"log"`: 收支動態
+        - `"asset:team_<n>"`: 第n小隊資產
+        """
+
+        self.render_scheduler.mark_dirty(*keys)
+
+    async def render(self, key: str):
+        """|coro|
+
+        更新單一訊息(由 :class:`RenderScheduler` 呼叫)。
+        """
+
+        if(key == "market"):
+            await self.update_market_ui()
+        elif(key == "log"):
+            await self.update_alteration_log()
+        elif(key.startswith("asset:team_")):
+            await self.update_asset_ui(int(key.removeprefix("asset:team_")))
+
     @ntd.slash_command(
             name="test_ui",
             description="For testing UIs",
@@ -2194,30 +2370,141 @@ class DiscordUI(commands.Cog):
                 ephemeral=True
             )
 
-    @staticmethod
-    def stock_market_message() -> str:
-        """市場動態訊息格式。
+    @ntd.slash_command(
+            name="browse_log",
+            description="查詢收支紀錄(可依小隊、使用者、種類、serial及時間篩選)",
+            guild_ids=[1218130958536937492]
+    )
+    @application_checks.has_any_role(
+        "最強大腦活動組", "最厲害的關主組", "大神等級幹部組"
+    )
+    async def browse_log(
+        self,
+        interaction: ntd.Interaction,
+        team: int = None,
+        user: str = None,
+        log_type: str = ntd.SlashOption(
+            choices={
+                "變更存款": "DepositChange",
+                "轉帳": "Transfer",
+                "股票交易": "StockChange"
+            },
+            required=False,
+            default=None
+        ),
+        serial_from: int = None,
+        serial_to: int = None,
+        time_from: str = ntd.SlashOption(
+            description="MM/DD HH:MM",
+            required=False,
+            default=None
+        ),
+        time_to: str = ntd.SlashOption(
+            description="MM/DD HH:MM",
+            required=False,
+            default=None
+        )
+    ):
+        """分頁瀏覽符合條件的收支紀錄。
+
+        serial區間為[serial_from, serial_to)，時間區間包含兩端(24小時制)。
+        """
+
+        try:
+            times = [
+                None if t is None else parse_log_time(t, "%m/%d %H:%M")
+                for t in (time_from, time_to)
+            ]
+        except ValueError:
+            await interaction.response.send_message(
+                content="**時間格式為 MM/DD HH:MM**",
+                delete_after=5.0,
+                ephemeral=True
+            )
+            return
+
+        serials = access_file.select_log(
+            team=team,
+            log_type=log_type,
+            user=user,
+            serial_from=serial_from,
+            serial_to=serial_to,
+            time_from=times[0],
+            time_to=times[1]
+        )
+        conditions = [
+            f"{name}: {value}" for name, value in (
+                ("小隊", team),
+                ("使用者", user),
+                ("種類", log_type),
+                ("serial", None if serial_from is None and serial_to is None
+                           else f"{serial_from or 0} ~ {'' if serial_to is None else serial_to-1}"),
+                ("時間", None if time_from is None and time_to is None
+                         else f"{time_from or ''} ~ {time_to or ''}")
+            ) if value is not None
+        ]
+        view = LogBrowserView(serials, "\n".join(conditions) or "全部紀錄")
+        await interaction.response.send_message(
+            embed=view.embed_message(),
+            view=view,
+            ephemeral=True
+        )
+
+    @browse_log.error
+    async def browse_log_error(
+        self,
+        interaction: ntd.Interaction,
+        error
+    ):
+        if(isinstance(error, application_checks.ApplicationMissingAnyRole)):
+            await interaction.response.send_message(
+                content="**你沒有權限使用此指令!!!**",
+                delete_after=5.0,
+                ephemeral=True
+            )
+
+    @ntd.slash_command(
+            name="render_stats",
+            description="查詢訊息更新次數(送出/略過)",
+            guild_ids=[1218130958536937492]
+    )
+    @application_checks.is_owner()
+    async def render_stats(self, interaction: ntd.Interaction):
+        """查詢訊息更新次數。
+        """
+
+        await interaction.response.send_message(
+            content=f"送出: {self.sent_edits:,}\n" \
+                    f"略過(內容未變): {self.skipped_edits:,}\n" \
+                    f"待更新: {len(self.render_scheduler.dirty)}",
+            delete_after=30.0,
+            ephemeral=True
+        )
+
+    def market_prices(self) -> Tuple[np.ndarray, np.ndarray]:
+        """目前的股價及收盤價(整數tick)。
+
+        優先由 :class:`StockManager` 推算現在的股價，尚未載入時讀取`market_data`。
         """
 
+        stock_manager = self.bot.get_cog("StockManager")
+        if(stock_manager is not None and len(stock_manager.engine)):
+            return stock_manager.price_ticks_at(), stock_manager.engine.close_ticks
+
         market_data: List[StockDict] = access_file.read_file("market_data")
-        # title
-        output: List[str] = [f"```商品名稱　{'代碼':^5}產業{'成交':^7}漲跌\n"]
-        # string formatter
-        for init_data, stock in zip(INITIAL_STOCK_DATA, market_data):
-            delta_price: float = stock["price"] - stock["close"]
-            # up and downs index
-            if(delta_price > 0):    # up
-                price_index = "🔴"  
-            elif(delta_price < 0):  # down
-                price_index = "🟢"
-            else:
-                price_index = "⚪"
+        return (
+            np.array([to_ticks(stock["price"]) for stock in market_data], dtype=np.int64),
+            np.array([to_ticks(stock["close"]) for stock in market_data], dtype=np.int64)
+        )
+
+    def market_page_keys(self) -> List[str]:
+        """市場動態各頁訊息的鍵(第1頁為`"market"`，其餘為`"market:page_<n>"`)。
+        """
 
-            output.append(f"{init_data['name'].ljust(5, '　')}{init_data['symbol']:^6}" \
-                          f"{init_data['sector']:3}{stock['price']:5.2f} {price_index}{abs(delta_price):.2f}\n"
-            )     
-        output.append("```")
-        return "".join(output)
+        return ["market"] + [
+            f"market:page_{page}"
+            for page in range(2, len(self.MESSAGE_IDS.get("STOCK_MARKET_PAGES", []))+2)
+        ]
     
     def fetch_tl_id_mapping(self):
         """抓取隊輔並製作隊輔id與小隊對照表。
@@ -2292,57 +2579,145 @@ class DiscordUI(commands.Cog):
         清除已發送的小隊即時訊息以及清除收支紀錄，並清除log資料。
         """
 
-        log: AlterationLog = access_file.read_file("alteration_log")
-
-        # 清除各小隊即時訊息
-        for team, team_key in enumerate(self.MESSAGE_IDS["ASSET_MESSAGE_IDS"].keys(), start=1):
-            channel = self.bot.get_channel(
-                self.CHANNEL_IDS[team_key]["NOTICE"]
-            )
+        # 清除各小隊即時訊息(各頻道並行)
+        jobs = []
+        for team in range(1, len(self.MESSAGE_IDS["ASSET_MESSAGE_IDS"])+1):
+            channel = self.get_notice_channel(team)
 
-            if(log.get(str(team), None) is None):  # 有記錄才需要刪
+            msg_count = access_file.count_log(team)
+            if(not msg_count):  # 有記錄才需要刪
                 continue
             
-            msg_count = len(log[f"{team}"])
-            await channel.purge(limit=msg_count)
+            jobs.append((
+                channel.id,
+                lambda channel=channel, limit=msg_count: channel.purge(limit=limit)
+            ))
+        await self.fan_out.gather(jobs)
         
         # 清除log資料
         access_file.clear_log_data()
         # 更新log
         await self.update_alteration_log()
 
-    async def fetch_alteration_log_message(self):
-        """抓取ALTERATION_LOG_MESSAGE。
+    def message_location(self, key: str) -> Tuple[int, int]:
+        """訊息所在的(頻道ID, 訊息ID)。
         """
 
-        channel = self.bot.get_channel(
-            self.CHANNEL_IDS["ALTERATION_LOG"]
-        )
-        self.ALTERATION_LOG_MESSAGE = await channel.fetch_message(
-            self.MESSAGE_IDS["ALTERATION_LOG"]
-        )
-       
-    async def fetch_stock_market_message(self):
-        """抓取STOCK_MARKET。
+        if(key == "market"):
+            return self.CHANNEL_IDS["STOCK_MARKET"], self.MESSAGE_IDS["STOCK_MARKET"]
+        elif(key.startswith("market:page_")):
+            page = int(key.removeprefix("market:page_"))
+            return self.CHANNEL_IDS["STOCK_MARKET"], self.MESSAGE_IDS["STOCK_MARKET_PAGES"][page-2]
+        elif(key == "log"):
+            return self.CHANNEL_IDS["ALTERATION_LOG"], self.MESSAGE_IDS["ALTERATION_LOG"]
+        team_key = key.removeprefix("asset:").upper()   # "asset:team_<n>"
+        return self.CHANNEL_IDS[team_key]["ASSET"], self.MESSAGE_IDS["ASSET_MESSAGE_IDS"][team_key]
+
+    def cache_messages(self):
+        """啟動時建立所有由程式更新的訊息及「即時通知」頻道的參照。
+
+        訊息以 :class:`ntd.PartialMessage` 快取，不需先抓取訊息，每次更新只需一次HTTP請求。
         """
 
-        channel = self.bot.get_channel(
-            self.CHANNEL_IDS["STOCK_MARKET"]
-        )
-        self.STOCK_MARKET_MESSAGE = await channel.fetch_message(
-            self.MESSAGE_IDS["STOCK_MARKET"]
-        )
+        keys = self.market_page_keys() + ["log"] + [
+            f"asset:{team_key.lower()}" for team_key in self.MESSAGE_IDS["ASSET_MESSAGE_IDS"]
+        ]
+        if(len(self.market_board) > len(self.market_page_keys())):
+            print(f"Market board needs {len(self.market_board)} messages, "
+                  f"only {len(self.market_page_keys())} configured (STOCK_MARKET_PAGES).")
+        for key in keys:
+            channel_id, message_id = self.message_location(key)
+            channel = self.bot.get_channel(channel_id)
+            if(channel is not None):    # 未快取的頻道於第一次更新時抓取
+                self.messages[key] = channel.get_partial_message(message_id)
+
+        for team in range(1, len(self.MESSAGE_IDS["ASSET_MESSAGE_IDS"])+1):
+            self.notice_channels[team] = self.bot.get_channel(
+                self.CHANNEL_IDS[f"TEAM_{team}"]["NOTICE"]
+            )
+
+    async def resolve_message(self, key: str) -> ntd.Message:
+        """|coro|
+
+        重新抓取訊息並更新快取(快取失效時使用)。
+
+        如果訊息已被刪除則 raise `ntd.NotFound`。
+        """
+
+        channel_id, message_id = self.message_location(key)
+        channel = self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
+        self.messages[key] = await channel.fetch_message(message_id)
+        return self.messages[key]
+
+    @staticmethod
+    def render_digest(fields: Dict) -> bytes | None:
+        """訊息內容(content、embed)的摘要，含有View等無法比較的內容時回傳`None`。
+
+        embed的footer及timestamp只是更新時間，不列入比較。
+        """
+
+        if(not fields.keys() <= {"content", "embed"}):
+            return None
+
+        embed: ntd.Embed | None = fields.get("embed")
+        embed_dict = None
+        if(embed is not None):
+            embed_dict = embed.to_dict()
+            embed_dict.pop("footer", None)
+            embed_dict.pop("timestamp", None)
+        return hashlib.blake2b(
+            json.dumps(
+                [fields.get("content"), embed_dict],
+                ensure_ascii=False,
+                sort_keys=True
+            ).encode("utf-8"),
+            digest_size=16
+        ).digest()
+
+    async def edit_message(self, key: str, **fields):
+        """|coro|
+
+        以快取的訊息參照更新訊息，快取失效(`NotFound`)時重新抓取一次。
+
+        內容與上次更新相同時不送出請求(計入`skipped_edits`)。
+        """
+
+        digest = self.render_digest(fields)
+        if(digest is not None and self.render_digests.get(key) == digest):
+            self.skipped_edits += 1
+            return
+
+        message = self.messages.get(key)
+        if(message is None):
+            message = await self.resolve_message(key)
+        try:
+            await message.edit(**fields)
+        except ntd.NotFound:
+            message = await self.resolve_message(key)
+            await message.edit(**fields)
+        self.sent_edits += 1
+        if(digest is not None):
+            self.render_digests[key] = digest
+
+    def get_notice_channel(self, team: int | str) -> ntd.TextChannel:
+        """取得小隊「即時通知」頻道。
+        """
+
+        channel = self.notice_channels.get(int(team))
+        if(channel is None):
+            channel = self.notice_channels[int(team)] = self.bot.get_channel(
+                self.CHANNEL_IDS[f"TEAM_{team}"]["NOTICE"]
+            )
+        return channel
 
     async def update_alteration_log(self):
         """|coro|
 
         更新收支紀錄。
         """
-                
-        if(self.ALTERATION_LOG_MESSAGE is None):  # 防止資料遺失
-            await self.fetch_alteration_log_message()
 
-        await self.ALTERATION_LOG_MESSAGE.edit(
+        await self.edit_message(
+            "log",
             content=None,
             embed=LogEmbed()
         )
@@ -2367,9 +2742,7 @@ class DiscordUI(commands.Cog):
 
         if(log_type == "Transfer"):
             transfer_team, deposit_team = team
-            channel = self.bot.get_channel(
-                self.CHANNEL_IDS[f"TEAM_{transfer_team}"]["NOTICE"]
-            )
+            channel = self.get_notice_channel(transfer_team)
             await channel.send( # 轉出小隊之通知
                 embed=TransferNotificationEmbed(
                     user=user,
@@ -2377,9 +2750,7 @@ class DiscordUI(commands.Cog):
                     deposit_team=deposit_team
                 )
             )
-            channel = self.bot.get_channel( # 轉入小隊之通知
-                self.CHANNEL_IDS[f"TEAM_{deposit_team}"]["NOTICE"]
-            )
+            channel = self.get_notice_channel(deposit_team) # 轉入小隊之通知
             await channel.send(
                 embed=TransferNotificationEmbed(
                     user=user,
@@ -2389,9 +2760,7 @@ class DiscordUI(commands.Cog):
             )
             return
         
-        channel = self.bot.get_channel(
-            self.CHANNEL_IDS[f"TEAM_{team}"]["NOTICE"]
-        )
+        channel = self.get_notice_channel(team)
         if(log_type == "DepositChange"):
             await channel.send(
                 embed=DepositChangeNotificationEmbed(
@@ -2412,15 +2781,20 @@ class DiscordUI(commands.Cog):
             )
     
     async def update_market_ui(self):
-        """更新市場動態。
-        """
+        """|coro|
 
-        if(self.STOCK_MARKET_MESSAGE is None):
-            await self.fetch_stock_market_message()
+        更新市場動態。
 
-        await self.STOCK_MARKET_MESSAGE.edit(
-            content=self.stock_market_message()
-        )
+        看板分頁送到`"market"`及`"market:page_<n>"`訊息(同一頻道依序更新)，
+        內容未變的頁面不送出請求；多餘的訊息清空，超出訊息數的頁面不顯示。
+        """
+
+        pages = self.market_board.render(*self.market_prices())
+        for index_, key in enumerate(self.market_page_keys()):
+            await self.edit_message(
+                key,
+                content=pages[index_] if index_ < len(pages) else "\u200b"
+            )
 
     async def update_asset_ui(self, team: str | int | None = None):
         """|coro|
@@ -2428,27 +2802,25 @@ class DiscordUI(commands.Cog):
         任一操作改變資產時更新小隊資產狀況訊息。
         """
         
+        assets: AssetsManager = self.bot.get_cog("AssetsManager")
+        if(not assets.team_assets):  # 資料不對等
+            assets.fetch_assets()
+
         if(team is not None):  # 更新指定小隊資產訊息
-            channel = self.bot.get_channel(
-                self.CHANNEL_IDS[f"TEAM_{team}"]["ASSET"]
+            await self.edit_message(
+                f"asset:team_{team}",
+                embed=TeamAssetEmbed(int(team), assets)
             )
-            message = await channel.fetch_message(
-                self.MESSAGE_IDS["ASSET_MESSAGE_IDS"][f"TEAM_{team}"]
+        else:   # 更新所有小隊資產訊息(各頻道並行)
+            await self.fan_out.gather(
+                (
+                    self.message_location(f"asset:team_{team}")[0],
+                    lambda team=team: self.edit_message(
+                        f"asset:team_{team}",
+                        embed=TeamAssetEmbed(team, assets)
+                    )
+                ) for team in range(1, len(self.MESSAGE_IDS["ASSET_MESSAGE_IDS"])+1)
             )
-            await message.edit(
-                embed=TeamAssetEmbed(team)
-            )
-        else:   # 更新所有小隊資產訊息
-            for team, team_key in enumerate(self.MESSAGE_IDS["ASSET_MESSAGE_IDS"].keys(), start=1):
-                channel = self.bot.get_channel(
-                    self.CHANNEL_IDS[team_key]["ASSET"]
-                )
-                message = await channel.fetch_message(
-                    self.MESSAGE_IDS["ASSET_MESSAGE_IDS"][team_key]
-                )
-                await message.edit(
-                    embed=TeamAssetEmbed(team)
-                )
     
     async def fetch_news_feed_channel(self):
         """|coro|
@@ -2467,7 +2839,7 @@ class DiscordUI(commands.Cog):
         if(self.NEWS_FEED_CHANNEL is None):
             await self.fetch_news_feed_channel()
         
-        game_state: GameState = access_file.read_file("game_state")
+        game_state: GameState = await access_file.read_file_async("game_state")
         released_news_count = game_state["released_news_count"]
         news_count: int = sum(released_news_count.values())
 
@@ -1,14 +1,22 @@
 from nextcord.ext import tasks, commands, application_checks
 import nextcord as ntd
+import numpy as np
 import pandas as pd
 
-from typing import List, Dict, ClassVar
-from dataclasses import dataclass
+from typing import Callable, List, Dict, ClassVar
+from datetime import datetime
 import asyncio
+import io
 import json
+import time
 
-from .discord_ui import DiscordUI, get_stock_inventory, query_revenue_embed
+from .assets_manager import AssetsManager
+from .discord_ui import DiscordUI, query_revenue_embed
 from .utilities import access_file
+from .utilities.fixed_point import PRICE_SCALE, format_cents, format_price, lot_value, to_cents, to_price
+from .utilities.market_engine import MarketEngine
+from .utilities.price_noise import NoiseModel, PriceNoise, SectorFactorNoise, new_seed
+from .utilities.price_history import Interval, PriceHistory
 from .utilities.datatypes import (
     Config,
     FinancialStatement,
@@ -21,37 +29,65 @@ from .utilities.datatypes import (
 )
 
 
-@dataclass(kw_only=True, slots=True)
 class Stock:
-    """儲存個股資料。
+    """個股資料，為 :class:`MarketEngine` 中第`index_`檔股票的檢視。
+
+    價格以整數tick儲存(見`fixed_point`)，`price`、`close`為換算後的元。
     """
-    
-    name: str
-    symbol: str
-    eps_qoq: float = 0.0
-    adjust_ratio: float = 0.0
-    random_ratio: float = 0.0
-    price: float = 0.0
-    close: float = 0.0
 
-    def change_price(self):
-        """變動股價。
+    __slots__ = (
+        "engine",
+        "index_",
+        "name",
+        "symbol"
+    )
+
+    def __init__(self, engine: MarketEngine, index_: int, *, name: str, symbol: str):
+        self.engine = engine
+        self.index_ = index_
+        self.name = name
+        self.symbol = symbol
+
+    @property
+    def price_ticks(self) -> int:
+        return int(self.engine.price_ticks[self.index_])
+
+    @property
+    def close_ticks(self) -> int:
+        return int(self.engine.close_ticks[self.index_])
+
+    @property
+    def price(self) -> float:
+        return to_price(self.price_ticks)
+
+    @property
+    def close(self) -> float:
+        return to_price(self.close_ticks)
+
+    @property
+    def eps_qoq(self) -> float:
+        return float(self.engine.eps_qoq[self.index_])
+
+    @property
+    def adjust_ratio(self) -> float:
+        return float(self.engine.adjust_ratio[self.index_])
+
+    @property
+    def random_ratio(self) -> float:
+        return float(self.engine.random_ratio[self.index_])
 
-        股價變動量:
-            delta P = EPS QoQ * Adjust Ratio
-        """
-        
-        # 無隨機機制
-        self.price += self.eps_qoq * self.adjust_ratio
-        self.price = round(self.price, 6)
-        
     def get_price(self) -> str:
-        return f"{self.name.ljust(5, '　')}{self.symbol:5} 收盤: {self.close:4.2f} " \
-               f"價格: {self.price:4.2f} 漲跌: {self.price - self.close:4.2f}"
+        return f"{self.name.ljust(5, '　')}{self.symbol:5} 收盤: {format_price(self.close_ticks)} " \
+               f"價格: {format_price(self.price_ticks)} " \
+               f"漲跌: {format_cents(to_cents(self.price_ticks) - to_cents(self.close_ticks))}"
 
 
 class StockManager(commands.Cog):
     """控制股票及新聞。
+
+    回合內的股價由開盤狀態(收盤價、財報、遊戲種子)及開盤後經過的時間推算(`price_ticks_at()`)，
+    交易、訊息及重新啟動皆直接查詢；`price_change_loop`只負責更新顯示用的股價，
+    不需每次變動都存檔。
     """
 
     __slots__ = (
@@ -64,10 +100,13 @@ class StockManager(commands.Cog):
     PRICE_CHANGE_FREQUENCY: ClassVar[float] = 3.0
     # 發送新聞間隔(秒)
     TIME_BETWEEN_NEWS: ClassVar[float] = 120.0
+    # 計算經過的變動次數時容許的時鐘誤差(秒)，
+    # 須遠大於計時器解析度(Windows約15.6ms)，迴圈提早醒來時仍算入該次變動
+    CLOCK_TOLERANCE: ClassVar[float] = 0.5
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.CONFIG: Config = access_file.read_file("game_config")
+        self.CONFIG: Config = access_file.read_file("game_config", deep_copy=True)
         self.RAW_STOCK_DATA: RawStockData = access_file.read_file("raw_stock_data")
         self.INITIAL_STOCK_DATA: List[InitialStockData] = self.RAW_STOCK_DATA["initial_data"]
         
@@ -77,10 +116,18 @@ class StockManager(commands.Cog):
         self.ROUND_TO_QUARTER: Dict[int, str] = {
             int(r): q for r, q in self.CONFIG["ROUND_TO_QUARTER"].items()
         }
-        # 儲存即時股票資料
+        # 即時市場資料(所有股票)
+        self.engine: MarketEngine = MarketEngine()
+        # 個股檢視
         self.stocks: List[Stock] = []
+        # 每次股價變動的歷史紀錄
+        self.price_history: PriceHistory | None = None
+        # 隨機變動的分布(`None`為各股獨立)
+        self.noise_model: NoiseModel | None = None
         # 當回合預發新聞
         self.pending_news: List[News] = []
+        # 時鐘(模擬時替換為模擬時鐘)
+        self.clock: Callable[[], float] = time.time
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -108,36 +155,55 @@ class StockManager(commands.Cog):
             self.reset_market_data()
             discord_ui: DiscordUI = self.bot.get_cog("DiscordUI")
             await discord_ui.clear_news()
-            self.reset_game_state()
+            await self.reset_game_state()
         elif(not self.stocks):  # 資料不對等
             self.fetch_stocks()
             self.fetch_game_state()
 
+        # 回合中重新啟動，補上停機期間的變動後繼續回合
+        if(not RESET_ALL and self.game_state["is_in_round"] and
+           not self.price_change_loop.is_running()):
+            await self.resume_round()
+
         print("Loaded stock_manager")
 
-    def reset_game_state(self):
-        """重製遊戲狀態資料(股票與新聞控制資料)。
+    async def reset_game_state(self, price_seed: int | None = None):
+        """|coro|
+
+        重製遊戲狀態資料(股票與新聞控制資料)。
+
+        `price_seed`
+        股價隨機變動的遊戲種子，預設為設定檔的`PRICE_SEED`，未設定則隨機產生。
         """
         
         self.fetch_game_state()
 
+        if(price_seed is None):
+            price_seed = self.CONFIG.get("PRICE_SEED")
         self.game_state["round"] = 0
         self.game_state["is_in_round"] = False
+        self.game_state["round_open_time"] = None
+        self.game_state["round_close_time"] = None
+        self.game_state["price_seed"] = new_seed() if price_seed is None else price_seed
         self.game_state["released_news_count"] = {str(r): 0 for r in range(1, 5)}
+        self.update_noise()
 
-        self.save_game_state()
+        await self.save_game_state()
 
-    def save_game_state(self):
-        """儲存遊戲狀態。
+    async def save_game_state(self):
+        """|coro|
+
+        儲存遊戲狀態。
         """
 
-        access_file.save_to("game_state", self.game_state)
+        await access_file.save_to_async("game_state", self.game_state)
 
     def fetch_game_state(self):
         """抓取遊戲狀態self.game_state: `GameState`。
         """
 
         self.game_state: GameState = access_file.read_file("game_state")
+        self.update_noise()
 
     def convert_raw_stock_data(self):
         """將股票原始Excel資料轉到`stock_data.json`。
@@ -163,6 +229,12 @@ class StockManager(commands.Cog):
                 df.to_json(orient="records")
             )   # 將pd.DataFrame轉成json object
             dict_[f"{quarter}"] = json_data
+
+        if("sector_models" in pd.ExcelFile(".\\Data\\raw_stock_data.xlsx").sheet_names):
+            df: pd.DataFrame = pd.read_excel(   # 各產業股價模型(選填)
+                ".\\Data\\raw_stock_data.xlsx", "sector_models"
+            )
+            dict_["sector_models"] = dict(zip(df["sector"], df["model"]))
         
         access_file.save_to("raw_stock_data", data=dict_)
 
@@ -184,23 +256,121 @@ class StockManager(commands.Cog):
         ]
         access_file.save_to("market_data", market_data)
         self.fetch_stocks()
+        self.price_history.clear()
 
     def fetch_stocks(self):
         """從`stock_data.json`中抓取資料並初始化:class:`Stocks`。
         """
 
         stock_data: MarketData = access_file.read_file("market_data")
+        self.engine = MarketEngine.from_market_data(stock_data)
         self.stocks = [
             Stock(
+                self.engine,
+                index_,
                 name=init_data["name"],
-                symbol=init_data["symbol"],
-                eps_qoq=stock["eps_qoq"],
-                adjust_ratio=stock["adjust_ratio"],
-                random_ratio=stock["random_ratio"],
-                price=stock["price"],
-                close=stock["close"]
-            ) for stock, init_data in zip(stock_data, self.INITIAL_STOCK_DATA)
+                symbol=init_data["symbol"]
+            ) for index_, init_data in enumerate(self.INITIAL_STOCK_DATA[:len(self.engine)])
         ]
+        self.engine.set_models(self.pricing_models())
+        self.noise_model = self.build_noise_model()
+        if(self.price_history is None or
+           self.price_history.records["ticks"].shape[1] != len(self.engine)):
+            self.price_history = PriceHistory(
+                f"{access_file.STORE.data_dir}\\price_history.npy",
+                len(self.engine),
+                self.CONFIG.get("PRICE_HISTORY_CAPACITY", PriceHistory.DEFAULT_CAPACITY)
+            )
+        if(self.game_state is not None):
+            self.update_noise()
+
+    def build_noise_model(self) -> NoiseModel | None:
+        """依設定檔的`SECTOR_FACTORS`建立產業因子模型，未設定時回傳`None`(各股獨立)。
+        """
+
+        config = self.CONFIG.get("SECTOR_FACTORS")
+        if(config is None):
+            return None
+        return SectorFactorNoise.from_config(
+            [stock["sector"] for stock in self.INITIAL_STOCK_DATA[:len(self.engine)]],
+            config
+        )
+
+    def update_noise(self):
+        """依遊戲種子及回合設定本回合股價的隨機變動。
+
+        每次變動的標準差為`PRICE_NOISE_SCALE`(元) * 各股隨機變動值調整率，
+        尚未開盤或沒有遊戲種子(舊版遊戲狀態)時無隨機變動。
+        """
+
+        seed: int | None = self.game_state.get("price_seed")
+        scale: float = self.CONFIG.get("PRICE_NOISE_SCALE", 0.0)
+        if(seed is None or scale == 0.0 or self.game_state.get("round_open_time") is None):
+            self.engine.set_noise(None)
+            return
+        self.engine.set_noise(PriceNoise(
+            seed,
+            self.game_state["round"],
+            self.engine.random_ratio * scale * PRICE_SCALE,
+            self.noise_model
+        ))
+
+    def pricing_models(self) -> List[str]:
+        """各股的股價模型名稱。
+
+        依序採用`initial_data`的`model`欄位、`sector_models`中所屬產業的模型，
+        皆未設定時為線性趨勢(`"linear"`)。
+        """
+
+        sector_models: Dict[str, str] = self.RAW_STOCK_DATA.get("sector_models", {})
+        return [
+            init_data.get("model") or sector_models.get(init_data["sector"], "linear")
+            for init_data in self.INITIAL_STOCK_DATA[:len(self.engine)]
+        ]
+
+    def elapsed_ticks(self, time: float | None = None) -> int:
+        """本回合開盤後到`time`(預設為現在)為止的股價變動次數，收盤後停在收盤時。
+        """
+
+        open_time: float | None = self.game_state.get("round_open_time")
+        if(open_time is None):
+            return 0
+        time = self.clock() if time is None else time
+        close_time: float | None = self.game_state.get("round_close_time")
+        if(close_time is not None):
+            time = min(time, close_time)
+        return max(
+            int((time - open_time + StockManager.CLOCK_TOLERANCE)
+                // StockManager.PRICE_CHANGE_FREQUENCY),
+            0
+        )
+
+    def due_news_count(self, time: float | None = None) -> int:
+        """本回合到`time`(預設為現在)為止應已發送的新聞數量(開盤即發送第一則)。
+        """
+
+        open_time: float | None = self.game_state.get("round_open_time")
+        if(open_time is None):
+            return 0
+        time = self.clock() if time is None else time
+        close_time: float | None = self.game_state.get("round_close_time")
+        if(close_time is not None):
+            time = min(time, close_time)
+        return int(
+            (time - open_time + StockManager.CLOCK_TOLERANCE)
+            // StockManager.TIME_BETWEEN_NEWS
+        ) + 1
+
+    def price_ticks_at(self, time: float | None = None) -> np.ndarray:
+        """所有股票於`time`(預設為現在)的股價(整數tick)。
+
+        由本回合開盤狀態及經過的變動次數直接算出，不依賴`price_change_loop`；
+        尚未開盤時回傳目前股價。
+        """
+
+        if(self.game_state is None or self.game_state.get("round_open_time") is None):
+            return self.engine.price_ticks.copy()
+        return self.engine.price_at(self.elapsed_ticks(time))
 
     @tasks.loop(seconds=PRICE_CHANGE_FREQUENCY)
     async def price_change_loop(self):
@@ -210,31 +380,151 @@ class StockManager(commands.Cog):
         股價變動頻率(秒)。
         """
         
-        stock_data: MarketData = access_file.read_file("market_data")
-
-        for stock, stock_dict in zip(self.stocks, stock_data):
-            # 改變該股股價
-            stock.change_price()
-            # 儲存股價
-            stock_dict.update({"price": stock.price})
-
-        access_file.save_to("market_data", stock_data)  # 儲存所有變動後資料
+        await self.tick()
         # 更新市場資料
         discord_ui: DiscordUI = self.bot.get_cog("DiscordUI")
-        await discord_ui.update_market_ui()
-        update_teams: List[int] = [ # 有股票庫存的小隊須更新未實現損益
-            team for team in range(1, self.CONFIG["NUMBER_OF_TEAMS"]+2) if get_stock_inventory(team)
-        ]
-        for team in update_teams:
-            await discord_ui.update_asset_ui(team)
+        assets: AssetsManager = self.bot.get_cog("AssetsManager")
+        discord_ui.mark_dirty(
+            "market",
+            *(f"asset:team_{team}" for team in assets.holding_teams())  # 有股票庫存的小隊須更新未實現損益
+        )
+
+    async def tick(self):
+        """|coro|
+
+        將顯示用的股價更新為現在的股價，並記錄股價歷史紀錄。
+        """
+
+        stock_data: MarketData = await access_file.read_file_async("market_data")
+
+        # 改變所有股票股價
+        now = self.clock()
+        ticks = self.elapsed_ticks(now)
+        recorded = self.recorded_ticks()
+        # 迴圈延遲醒來時補上跳過的變動
+        await self.record_missed_ticks(ticks-1)
+        self.engine.advance_to(ticks)
+        # 只更新記憶體中的市場資料(股價可由開盤狀態推算，收盤時才存檔)
+        self.engine.write_prices(stock_data)
+        if(ticks > recorded):   # 同一次變動只記錄一次
+            round_: int = self.game_state["round"]
+            self.price_history.append(
+                now,
+                round_,
+                self.game_state["released_news_count"][str(round_)],
+                self.engine.price_ticks
+            )
+
+        # 重新計算所有小隊的未實現損益
+        assets: AssetsManager = self.bot.get_cog("AssetsManager")
+        assets.revaluate(lot_value(self.engine.price_ticks))
 
-    @classmethod
     @price_change_loop.before_loop
-    async def before_price_change_loop(cls):
-        """在`price_change_loop`開始之前先等待。
+    async def before_price_change_loop(self):
+        """在`price_change_loop`開始之前等待到下一次股價變動的時間(與開盤時間對齊)。
+        """
+
+        open_time: float | None = self.game_state.get("round_open_time")
+        if(open_time is None):
+            await asyncio.sleep(StockManager.PRICE_CHANGE_FREQUENCY)
+            return
+        next_time = open_time + (self.elapsed_ticks()+1) * StockManager.PRICE_CHANGE_FREQUENCY
+        await asyncio.sleep(max(next_time - self.clock(), 0.0))
+
+    async def catch_up(self):
+        """|coro|
+
+        依時鐘將股價快轉到現在，並補齊停機期間的股價歷史紀錄(重新啟動時使用)。
+        """
+
+        if(self.game_state.get("round_open_time") is None):  # 未開盤，沒有需要補齊的變動
+            return
+        ticks = self.elapsed_ticks()
+        await self.record_missed_ticks(ticks)
+
+        self.engine.advance_to(ticks)
+        self.engine.write_prices(await access_file.read_file_async("market_data"))
+        assets: AssetsManager | None = self.bot.get_cog("AssetsManager")
+        if(assets is not None and assets.team_assets):
+            assets.revaluate(lot_value(self.engine.price_ticks))
+
+    def recorded_ticks(self) -> int:
+        """本回合的股價歷史紀錄已記錄到第幾次變動。
         """
 
-        await asyncio.sleep(cls.PRICE_CHANGE_FREQUENCY)
+        open_time: float | None = self.game_state.get("round_open_time")
+        last = self.price_history.last()
+        if(open_time is None or last is None or
+           last["round"] != self.game_state["round"] or last["time"] < open_time):
+            return 0
+        return self.elapsed_ticks(float(last["time"]))
+
+    async def record_missed_ticks(self, ticks: int):
+        """|coro|
+
+        補上本回合到第`ticks`次變動為止尚未記錄的股價歷史紀錄
+        (停機期間或`price_change_loop`延遲醒來時跳過的變動)，
+        時間及已發送的新聞數量依開盤時間推算。
+        """
+
+        open_time: float | None = self.game_state.get("round_open_time")
+        if(open_time is None):
+            return
+        missing = np.arange(self.recorded_ticks()+1, ticks+1)
+        if(not len(missing)):
+            return
+
+        round_: int = self.game_state["round"]
+        raw_news: RawNews = await access_file.read_file_async("raw_news")
+        elapsed = missing * StockManager.PRICE_CHANGE_FREQUENCY
+        self.price_history.extend(
+            open_time + elapsed,
+            round_,
+            np.minimum(
+                (elapsed + StockManager.CLOCK_TOLERANCE) // StockManager.TIME_BETWEEN_NEWS + 1,
+                len(raw_news[str(round_)])
+            ),
+            self.engine.price_path(missing)
+        )
+
+    def candles_frame(self, interval: Interval, round_: int | None = None) -> pd.DataFrame:
+        """股價歷史紀錄的K線表，每根K線每檔股票一列(價格單位為元)。
+        """
+
+        candles = self.price_history.candles(interval, round_=round_)
+        size = len(candles["time"])
+        number_of_stocks = len(self.engine)
+        return pd.DataFrame({
+            "time": np.repeat([
+                datetime.fromtimestamp(t).strftime("%m/%d %H:%M:%S")
+                for t in candles["time"].tolist()
+            ], number_of_stocks),
+            "round": np.repeat(candles["round"], number_of_stocks),
+            "news": np.repeat(candles["news"], number_of_stocks),
+            "symbol": np.tile([stock.symbol for stock in self.stocks], size),
+            "name": np.tile([stock.name for stock in self.stocks], size),
+            **{
+                column: candles[column].ravel() / PRICE_SCALE
+                for column in ("open", "high", "low", "close")
+            }
+        })
+
+    async def resume_round(self):
+        """|coro|
+
+        機器人於回合中重新啟動: 快轉股價後重新啟動股價變動及新聞迴圈，
+        新聞迴圈開始前補發停機期間到期的新聞。
+        """
+
+        if(self.prepare_round_clock()):
+            await self.save_game_state()
+        await self.catch_up()
+        discord_ui: DiscordUI = self.bot.get_cog("DiscordUI")
+        discord_ui.mark_dirty("market")
+
+        self.price_change_loop.start()
+        if(self.CONFIG["RELEASE_NEWS"]):
+            self.news_loop.start()
 
     def convert_news_data(self):
         """將新聞原始Excel資料轉到`raw_news.json`。
@@ -253,11 +543,13 @@ class StockManager(commands.Cog):
         
         access_file.save_to("raw_news", dict_)
 
-    def fetch_round_news(self):
-        """抓取本回合預發新聞，如果回合中斷則從未發過的新聞開始抓取。
+    async def fetch_round_news(self):
+        """|coro|
+
+        抓取本回合預發新聞，如果回合中斷則從未發過的新聞開始抓取。
         """
 
-        news: RawNews = access_file.read_file("raw_news")
+        news: RawNews = await access_file.read_file_async("raw_news")
         released_news_count: int = self.game_state["released_news_count"][str(self.game_state["round"])]
         self.pending_news: List[News] = news[str(self.game_state["round"])][released_news_count:]
 
@@ -266,29 +558,62 @@ class StockManager(commands.Cog):
         """當回合開始時每過一段時間發送當回合新聞。
         """
 
-        if(not self.pending_news):
-            if(self.game_state["is_in_round"]): # 發完新聞
-                self.news_loop.cancel()    
-            else:   # 資料遺失    
-                self.fetch_round_news()
+        if(not self.pending_news and not self.game_state["is_in_round"]):   # 資料遺失
+            await self.fetch_round_news()
 
-        news = self.pending_news.pop(0)
+        await self.release_due_news()
+        if(not self.pending_news):   # 發完新聞
+            self.news_loop.cancel()
+
+    async def release_due_news(self) -> int:
+        """|coro|
+
+        發送所有到期(依開盤後經過的時間)但尚未發送的新聞，回傳發送數量。
+        """
 
         discord_ui: DiscordUI = self.bot.get_cog("DiscordUI")
-        await discord_ui.release_news(
-            title=news["title"],
-            content=news["content"]
-        )
+        round_key = str(self.game_state["round"])
+        released = 0
+        while(self.game_state["released_news_count"][round_key] < self.due_news_count()):
+            news = await self.next_news()
+            if(news is None):   # 發完新聞
+                break
+            await discord_ui.release_news(
+                title=news["title"],
+                content=news["content"]
+            )
+            released += 1
+        return released
+
+    async def next_news(self) -> News | None:
+        """|coro|
+
+        取出下一則預發新聞並計入當回合已發送數量，已發完時回傳`None`。
+        """
+
+        if(not self.pending_news):
+            return None
+
+        news = self.pending_news.pop(0)
         # 當回合已發送新聞數量+1
         self.game_state["released_news_count"][str(self.game_state["round"])] += 1
-        self.save_game_state()
+        await self.save_game_state()
+        return news
     
     @news_loop.before_loop
     async def before_news_loop(self):
-        """在`news_loop`開始之前擷取本局新聞。
+        """在`news_loop`開始之前擷取本局新聞並發送已到期的新聞，
+        之後等待到下一則新聞的時間(與開盤時間對齊)。
         """
 
-        self.fetch_round_news()
+        await self.fetch_round_news()
+        await self.release_due_news()
+
+        open_time: float | None = self.game_state.get("round_open_time")
+        if(open_time is not None):
+            released: int = self.game_state["released_news_count"][str(self.game_state["round"])]
+            next_time = open_time + released * StockManager.TIME_BETWEEN_NEWS
+            await asyncio.sleep(max(next_time - self.clock(), 0.0))
         
     def update_market_and_stock_data(self):
         """回合開始時更新收盤價，並擷取本回合市場資料。
@@ -297,23 +622,66 @@ class StockManager(commands.Cog):
         financial_statements: List[FinancialStatement] = self.RAW_STOCK_DATA[
             self.ROUND_TO_QUARTER[self.game_state["round"]]
         ]
-        market_data: MarketData = []
-        for statement, stock in zip(financial_statements, self.stocks):
-            market_data.append(
-                {
-                    "price": stock.price,
-                    "close": stock.price,
-                    "eps_qoq": statement["eps_qoq"],
-                    "adjust_ratio": statement["adjust_ratio"],
-                    "random_ratio": statement["random_ratio"]
-                }
-            )
-            stock.close = stock.price
-            stock.eps_qoq = statement["eps_qoq"]
-            stock.adjust_ratio = statement["adjust_ratio"]
-            stock.random_ratio = statement["random_ratio"]
-        access_file.save_to("market_data", market_data)
+        self.engine.open_round(financial_statements[:len(self.engine)])
+        access_file.save_to("market_data", self.engine.to_market_data())
             
+    async def start_round(self) -> bool:
+        """|coro|
+
+        進入下一回合並更新本回合市場資料，遊戲已結束時回傳`False`。
+        """
+
+        # 若機器人在回合中重新啟動，則不進入下一回合
+        if(not self.game_state["is_in_round"]):
+            self.game_state["round"] += 1
+
+        if(self.game_state["round"] >= 5): # 遊戲結束
+            return False
+
+        if(not self.game_state["is_in_round"]):  # 新回合開盤
+            if(self.game_state["round"] != 1):
+                self.update_market_and_stock_data()
+            if(self.game_state.get("price_seed") is None):  # 舊版遊戲狀態
+                self.game_state["price_seed"] = new_seed()
+            self.game_state["round_open_time"] = self.clock()
+            self.game_state["round_close_time"] = None
+
+        self.game_state["is_in_round"] = True
+        self.prepare_round_clock()
+        await self.save_game_state()
+        return True
+
+    def prepare_round_clock(self) -> bool:
+        """回合進行中補上舊版遊戲狀態沒有的開盤時間(以現在為開盤)，並設定本回合的隨機變動。
+
+        開始及恢復回合(`start_round()`、`resume_round()`)皆須呼叫；
+        回傳是否補上開盤時間(需要存檔)。
+        """
+
+        backfilled = False
+        if(self.game_state["is_in_round"] and self.game_state.get("round_open_time") is None):
+            self.game_state["round_open_time"] = self.clock()
+            self.game_state["round_close_time"] = None
+            backfilled = True
+        self.update_noise()
+        return backfilled
+
+    async def end_round(self):
+        """|coro|
+
+        結束本回合並立即寫回所有資料。
+        """
+
+        self.game_state["is_in_round"] = False
+        self.game_state["round_close_time"] = self.clock()
+        await self.save_game_state()
+        # 以收盤時的股價存檔
+        self.engine.advance_to(self.elapsed_ticks())
+        access_file.save_to("market_data", self.engine.to_market_data())
+        # 收盤時立即寫回所有資料
+        await access_file.flush_async()
+        self.price_history.flush()
+
     @ntd.slash_command(
         name="open_round",
         description="開始下一回合(回合未關閉無法使用)",
@@ -339,11 +707,7 @@ class StockManager(commands.Cog):
             )
             return
 
-        # 若機器人在回合中重新啟動，則不進入下一回合
-        if(not self.game_state["is_in_round"]):
-            self.game_state["round"] += 1
-
-        if(self.game_state["round"] >= 5): # 遊戲結束
+        if(not await self.start_round()): # 遊戲結束
             await interaction.response.send_message(
                 content="**遊戲已結束**",
                 embed=query_revenue_embed(),
@@ -352,12 +716,8 @@ class StockManager(commands.Cog):
             return
         
         if(self.game_state["round"] != 1):
-            self.update_market_and_stock_data()
             discord_ui: DiscordUI = self.bot.get_cog("DiscordUI")
-            await discord_ui.update_market_ui()
-        
-        self.game_state["is_in_round"] = True
-        self.save_game_state()
+            discord_ui.mark_dirty("market")
 
         self.price_change_loop.start()
         if(self.CONFIG["RELEASE_NEWS"]):
@@ -391,11 +751,9 @@ class StockManager(commands.Cog):
             )
             return
         
-        self.game_state["is_in_round"] = False
-        self.save_game_state()
-
         self.price_change_loop.stop()
         self.news_loop.cancel()
+        await self.end_round()
 
         await interaction.response.send_message(
             f"回合{self.game_state["round"]}結束!",
@@ -403,8 +761,56 @@ class StockManager(commands.Cog):
             ephemeral=True
         )
 
+    @ntd.slash_command(
+        name="export_candles",
+        description="匯出股價K線(CSV)"
+    )
+    @application_checks.is_owner()
+    async def export_candles(
+        self,
+        interaction: ntd.Interaction,
+        interval: str = ntd.SlashOption(
+            choices={
+                "1分鐘": "60",
+                "5分鐘": "300",
+                "每則新聞": "news",
+                "每回合": "round"
+            },
+            required=False,
+            default="60"
+        ),
+        round_: int = ntd.SlashOption(
+            name="round",
+            description="只匯出指定回合",
+            required=False,
+            default=None
+        )
+    ):
+        """以CSV檔案匯出股價歷史紀錄的K線(OHLC)。
+        """
+
+        frame = self.candles_frame(
+            interval if interval in ("news", "round") else float(interval), round_
+        )
+        if(frame.empty):
+            await interaction.response.send_message(
+                "**沒有股價歷史紀錄!**",
+                delete_after=3.0,
+                ephemeral=True
+            )
+            return
+
+        await interaction.response.send_message(
+            file=ntd.File(
+                io.BytesIO(frame.to_csv(index=False).encode("utf-8-sig")),
+                filename=f"candles_{interval}.csv"
+            ),
+            ephemeral=True
+        )
+
     @open_round.error
     @close_round.error
+    @export_candles.error
     async def not_owner_error_handler(
         self,
         interaction: ntd.Interaction,
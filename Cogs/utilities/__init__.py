@@ -1,2 +1,3 @@
 from .access_file import *
-from .datatypes import *
\ No newline at end of file
+from .datatypes import *
+from .game_store import *
\ No newline at end of file
@@ -1,59 +1,198 @@
 """存取檔案用。
+
+所有讀寫皆經由程序共用的 :class:`GameStore`，讀取由記憶體提供，
+寫入則合併為延遲寫回，硬碟I/O於專用的I/O執行緒執行。
+協程中使用`*_async`版本等待I/O完成而不阻塞事件迴圈。
 """
-from typing import Any
-import json
-import os
+from typing import Any, Dict, List, Sequence
+from datetime import datetime
+import asyncio
+
+from .datatypes import AssetDict, LogData, LogType
+from .game_store import GameStore
+
 
+# 程序共用的遊戲資料
+STORE = GameStore()
 
-def read_file(file_name: str) -> Any:
+
+def read_file(file_name: str, *, deep_copy: bool = False) -> Any:
     """讀取指定檔名的檔案。
+
+    回傳記憶體中的資料本身，需要獨立的複本時設`deep_copy=True`。
+    """
+
+    return STORE.read(file_name, deep_copy=deep_copy)
+
+
+async def read_file_async(file_name: str, *, deep_copy: bool = False) -> Any:
+    """|coro|
+
+    讀取指定檔名的檔案，尚未載入的檔案於I/O執行緒讀取。
     """
 
-    file_path = f".\\Data\\{file_name}.json"
-    if(not os.path.exists(file_path)):
-        raise FileNotFoundError(f"File: '{file_name}' not found.")
-    
-    with open(
-        file_path,
-        mode="r",
-        encoding="utf-8"
-    ) as json_file:
-        return json.load(json_file)
-        
+    return await STORE.read_async(file_name, deep_copy=deep_copy)
+
 
 def save_to(file_name: str, data: dict | list):
-    """開啟指定檔名的檔案並將dict_寫入。
+    """將data寫入指定檔名的檔案。
 
+    寫入會於`FLUSH_WINDOW`秒內合併後才寫回硬碟。
     如果未找到檔案則 raise `FileNotFoundError`。
     """
 
-    file_path = f".\\Data\\{file_name}.json"
-    if not os.path.exists(file_path):
-        raise FileNotFoundError(f"File: '{file_name}' not found.")
-    
-    with open(
-        file_path,
-        mode="w",
-        encoding="utf-8"
-    ) as json_file:
-        json.dump(
-            data, json_file,
-            ensure_ascii=False,
-            indent=4
-        )
-        
+    STORE.write(file_name, data)
+    STORE.schedule_flush()
+
+
+async def save_to_async(file_name: str, data: dict | list):
+    """|coro|
+
+    將data寫入指定檔名的檔案並等待I/O執行緒寫回完成。
+    """
+
+    STORE.write(file_name, data)
+    await STORE.flush_async(file_name)
+
+
+def save_team_asset(team: int | str, asset: AssetDict):
+    """寫入單一小隊的資產(SQLite後端只更新該小隊的資料列)。
+    """
+
+    STORE.write_team(str(team), asset)
+    STORE.schedule_flush()
+
+
+def flush(file_name: str | None = None):
+    """立即將所有或指定的尚未寫回資料寫入硬碟(收盤、關閉機器人時使用)。
+
+    寫回所有資料時一併壓縮收支紀錄日誌。
+    """
+
+    STORE.flush(file_name)
+    if(file_name is None):
+        STORE.compact_log()
+
+
+async def flush_async(file_name: str | None = None):
+    """|coro|
+
+    `flush()`的非同步版本，等待I/O執行緒寫回完成。
+    """
+
+    await STORE.flush_async(file_name)
+    if(file_name is None):
+        await asyncio.wrap_future(STORE.compact_log())
+
+
+def append_log(record: LogData) -> int:
+    """新增一筆收支紀錄(附加至日誌)，回傳該紀錄的serial。
+    """
+
+    return STORE.append_log(record)
+
+
+def append_logs(records: List[LogData]) -> List[int]:
+    """新增多筆收支紀錄(一次附加至日誌)，回傳各紀錄的serial。
+    """
+
+    return STORE.append_logs(records)
+
+
+def commit_assets(changed: Dict[str, AssetDict], records: List[LogData]) -> List[int]:
+    """一起寫入變動的小隊資產及其收支紀錄(立即寫入，不等待延遲寫回)，回傳各紀錄的serial。
+    """
+
+    return STORE.commit(changed, records)
+
+
+async def append_log_async(record: LogData) -> int:
+    """|coro|
+
+    新增一筆收支紀錄並等待寫入完成，回傳該紀錄的serial。
+    """
+
+    return await STORE.append_log_async(record)
+
+
+def query_log(
+        *,
+        team: int | str | None = None,
+        serial_from: int | None = None,
+        serial_to: int | None = None
+) -> List[LogData]:
+    """查詢指定小隊或serial區間[serial_from, serial_to)的收支紀錄，依serial排序。
+    """
+
+    return STORE.query_log(
+        team=None if team is None else str(team),
+        serial_from=serial_from,
+        serial_to=serial_to
+    )
+
+
+def recent_logs() -> List[LogData]:
+    """最近的`GameStore.RECENT_LOG_SIZE`筆收支紀錄，依serial排序。
+    """
+
+    if(not STORE.loaded):
+        STORE.load()
+    return list(STORE.recent_logs)
+
+
+def select_log(
+        *,
+        team: int | str | None = None,
+        log_type: LogType | None = None,
+        user: str | None = None,
+        serial_from: int | None = None,
+        serial_to: int | None = None,
+        time_from: datetime | None = None,
+        time_to: datetime | None = None
+) -> List[int]:
+    """以索引查詢符合所有條件的收支紀錄serial，由小到大排序(見 :class:`LogIndex`)。
+
+    指定小隊時包含該小隊轉入及轉出的轉帳紀錄。
+    """
+
+    if(not STORE.loaded):
+        STORE.load()
+    return STORE.log_index.select(
+        team=None if team is None else str(team),
+        log_type=log_type,
+        user=user,
+        serial_from=serial_from,
+        serial_to=serial_to,
+        time_from=time_from,
+        time_to=time_to
+    )
+
+
+def get_logs(serials: Sequence[int]) -> List[LogData]:
+    """依序取出指定serial的收支紀錄。
+    """
+
+    if(not STORE.loaded):
+        STORE.load()
+    return STORE.log_index.get(serials)
+
+
+def count_log(team: int | str) -> int:
+    """指定小隊的收支紀錄數量。
+    """
+
+    return STORE.count_log(str(team))
+
+
+def compact_log():
+    """將收支紀錄日誌壓縮為快照。
+    """
+
+    STORE.compact_log()
+
 
 def clear_log_data():
     """清除log。
     """
 
-    with open(
-        ".\\Data\\alteration_log.json",
-        mode="w",
-        encoding="utf-8"
-    ) as json_file:
-        json.dump(
-            {"serial": 0}, json_file,
-            ensure_ascii=False,
-            indent=4
-        )
\ No newline at end of file
+    STORE.clear_log()
@@ -0,0 +1,91 @@
+"""單一寫入者的命令佇列。
+"""
+from typing import Any, Callable, Tuple
+import asyncio
+
+
+Command = Tuple[Callable[..., Any], tuple, dict, asyncio.Future]
+
+
+class Actor:
+    """以單一背景工作依序執行`asyncio.Queue`中的命令。
+
+    - 呼叫端以`submit()`送出命令並等待結果(或命令raise的例外)。
+    - 命令為同步函式，執行期間不會切換到其他協程，
+      檢查(如餘額)與變更在同一個命令內完成，不會與其他命令交錯。
+    - 每次取出佇列中所有等待的命令作為一批，批次前後呼叫`begin_batch`、`end_batch`
+      (如合併儲存)。
+    """
+
+    __slots__ = (
+        "queue",
+        "task",
+        "begin_batch",
+        "end_batch"
+    )
+
+    def __init__(
+            self,
+            *,
+            begin_batch: Callable[[], None] | None = None,
+            end_batch: Callable[[], None] | None = None
+    ):
+        self.queue: asyncio.Queue[Command] | None = None
+        self.task: asyncio.Task | None = None
+        self.begin_batch = begin_batch
+        self.end_batch = end_batch
+
+    def start(self):
+        """啟動背景工作。
+        """
+
+        if(self.queue is None):
+            self.queue = asyncio.Queue()
+        if(self.task is None or self.task.done()):
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    def stop(self):
+        """停止背景工作(佇列中尚未執行的命令保留)。
+        """
+
+        if(self.task is not None):
+            self.task.cancel()
+            self.task = None
+
+    async def submit(self, func: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+        """|coro|
+
+        送出命令`func(*args, **kwargs)`並等待執行結果。
+        """
+
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((func, args, kwargs, future))
+        return await future
+
+    async def run(self):
+        """|coro|
+
+        背景工作: 等待命令，每次執行佇列中所有等待的命令。
+        """
+
+        while(True):
+            batch = [await self.queue.get()]
+            while(not self.queue.empty()):
+                batch.append(self.queue.get_nowait())
+
+            if(self.begin_batch is not None):
+                self.begin_batch()
+            try:
+                for func, args, kwargs, future in batch:
+                    if(future.cancelled()):  # 呼叫端已放棄
+                        continue
+                    try:
+                        result = func(*args, **kwargs)
+                    except Exception as e:
+                        future.set_exception(e)
+                    else:
+                        future.set_result(result)
+            finally:
+                if(self.end_batch is not None):
+                    self.end_batch()
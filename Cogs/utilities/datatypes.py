@@ -28,6 +28,9 @@ class MessageIDs(TypedDict):
     CHANGE_DEPOSIT: int
     ALTERATION_LOG: int
     STOCK_MARKET: int
+    STOCK_MARKET_PAGES: NotRequired[List[int]]
+    """「市場動態」頻道內看板第2頁之後的訊息ID(股票數量多時使用)。
+    """
     TRADE_VIEW: int
     ASSET_MESSAGE_IDS: Dict[str, int]
     """該隊「資產」頻道內之資產訊息ID。
@@ -36,6 +39,22 @@ class MessageIDs(TypedDict):
     """
 
 
+class SectorFactors(TypedDict):
+    """產業因子模型設定(見 :class:`SectorFactorNoise`)。
+
+    loading: `float`
+        個股隨機變動中產業因子的比重(0~1)。
+    sectors: `List[str]`
+        相關係數矩陣的產業順序，未列出的產業與其他產業無關。
+    correlation: `List[List[float]]`
+        產業因子之間的相關係數矩陣。
+    """
+
+    loading: float
+    sectors: List[str]
+    correlation: List[List[float]]
+
+
 class Config(TypedDict):
     """遊戲初始資料字典型別。
 
@@ -80,6 +99,30 @@ class Config(TypedDict):
         是否發送新聞(測試使用)。
     STARTER_CASH: `int`
         遊戲開始時各小隊的初始資產額。
+    FLUSH_WINDOW: `float`
+        資料延遲寫回硬碟的時間窗(秒)，時間窗內的變動合併為一次寫入。
+    STORAGE_BACKEND: `Literal["json", "sqlite"]`
+        小隊資產、市場資料、遊戲狀態及收支紀錄的儲存後端。
+    SQLITE_FILE: `str`
+        SQLite後端的資料庫檔名(`Data`資料夾內，不含副檔名)。
+    PRICE_HISTORY_CAPACITY: `int`
+        股價歷史紀錄保存的筆數(每次股價變動一筆)，超過時覆寫最舊的紀錄。
+    PRICE_NOISE_SCALE: `float`
+        隨機變動值調整率為1時，每次股價變動的隨機變動標準差(元)。
+        預設為0(無隨機變動，股價只依財報線性變動)，設為正數(例如`0.05`)即啟用，
+        各股的標準差再乘上`raw_stock_data`的隨機變動值調整率。
+    PRICE_SEED: `int` | `None`
+        重製遊戲時使用的遊戲種子(可重現股價路徑)，`None`為隨機產生。
+    SECTOR_FACTORS: :class:`SectorFactors` | `None`
+        產業因子模型設定，預設為`None`(各股獨立的隨機變動)。
+        須同時將`PRICE_NOISE_SCALE`設為正數才有作用，啟用範例:
+        `{"loading": 0.6, "sectors": ["科技", "金融"], "correlation": [[1.0, 0.3], [0.3, 1.0]]}`
+    RENDER_INTERVAL: `float`
+        同一則訊息兩次更新之間的最短間隔(秒)。
+    RENDER_MAX_EDITS: `int`
+        每個更新間隔內最多更新的訊息數量，其餘依優先度延後。
+    FAN_OUT_LIMIT: `int`
+        同時進行的Discord請求上限(同一頻道的請求依序送出)。
     ROUND_TO_QUARTER: `dict[str, str]`
         回合與季對照表("round": "quarter")。
     NUMBER_OF_TEAMS: `int`
@@ -106,6 +149,16 @@ class Config(TypedDict):
     FETCH_TL_IDS: bool
     RELEASE_NEWS: bool
     STARTER_CASH: int
+    FLUSH_WINDOW: float
+    STORAGE_BACKEND: Literal["json", "sqlite"]
+    SQLITE_FILE: str
+    PRICE_HISTORY_CAPACITY: int
+    PRICE_NOISE_SCALE: NotRequired[float]
+    PRICE_SEED: NotRequired[int | None]
+    SECTOR_FACTORS: NotRequired[SectorFactors | None]
+    RENDER_INTERVAL: float
+    RENDER_MAX_EDITS: int
+    FAN_OUT_LIMIT: int
     ROUND_TO_QUARTER: Dict[str, str]
     NUMBER_OF_TEAMS: int
     TL_ID_TO_TEAM: Dict[str, int]
@@ -120,14 +173,15 @@ class AssetDict(TypedDict):
     -------
     deposit: `int`
         該小隊存款額。
-    stock_inv: `Dict[str, List[int]]`
-        該小隊所有股票以及原始成本。
+    stock_inv: `Dict[str, List[List[int]]]`
+        該小隊所有股票以及原始成本，依買進順序以[每張成本, 張數]區段儲存。
+        (舊格式為每張一個成本的串列，讀取時自動轉換)
     revenue: `int`
         該小隊總收益。
     """
 
     deposit: int
-    stock_inv: Dict[str, List[int]]
+    stock_inv: Dict[str, List[List[int]]]
     revenue: int
 
 
@@ -170,12 +224,15 @@ class InitialStockData(TypedDict):
         所屬產業。
     first_open: `float`
         首次開盤價格。
+    model: `str` | `None`
+        股價模型名稱(見 :class:`PricingModel`)，未填則依產業決定。
     """
 
     name: str
     symbol: str
     sector: str
     first_open: float
+    model: NotRequired[str | None]
 
 
 class FinancialStatement(TypedDict):
@@ -211,9 +268,13 @@ class FinancialStatement(TypedDict):
 
 class RawStockData(TypedDict):
     """原始股票資料。
+
+    sector_models: `Dict[str, str]`
+        各產業的股價模型名稱(選填)。
     """
 
     initial_data: List[InitialStockData]
+    sector_models: NotRequired[Dict[str, str]]
     __root__: List[FinancialStatement]
 
 
@@ -273,7 +334,10 @@ GameState = TypedDict(
     {
         "round": int,
         "released_news_count": Dict[str, int],
-        "is_in_round": bool
+        "is_in_round": bool,
+        "round_open_time": NotRequired[float | None],
+        "round_close_time": NotRequired[float | None],
+        "price_seed": NotRequired[int | None]
     },
     total=True
 )
@@ -285,4 +349,10 @@ released_news_count: `Dict[str, int]`
     每回合已發送新聞數量。
 is_in_round: `bool`
     標記回合是否開始(遊戲過程重啟使用)。
+round_open_time: `float` | `None`
+    本回合開盤時間戳(秒)，股價由開盤狀態及經過時間推算。
+round_close_time: `float` | `None`
+    本回合收盤時間戳(秒)，回合進行中為`None`。
+price_seed: `int` | `None`
+    股價隨機變動的遊戲種子，各回合的亂數流由此衍生。
 """
\ No newline at end of file
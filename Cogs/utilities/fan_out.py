@@ -0,0 +1,60 @@
+"""有上限的並行Discord請求。
+"""
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Tuple
+import asyncio
+import traceback
+
+
+class FanOut:
+    """以`asyncio.gather`並行送出多個請求。
+
+    - 同時進行的請求數量以Semaphore限制在`limit`以內，避免瞬間大量請求觸發限速。
+    - Discord依路由(頻道)分別限速，同一路由(`route`)的請求依序送出，
+      不同路由的請求並行，刷新所有小隊只需約一次往返的時間。
+    """
+
+    __slots__ = (
+        "semaphore",
+        "route_locks"
+    )
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.route_locks: Dict[Hashable, asyncio.Lock] = {}
+
+    async def call(
+            self,
+            route: Hashable,
+            func: Callable[..., Awaitable[Any]],
+            /,
+            *args: Any,
+            **kwargs: Any
+    ) -> Any:
+        """|coro|
+
+        在路由及並行數量的限制下執行`func(*args, **kwargs)`。
+        """
+
+        lock = self.route_locks.setdefault(route, asyncio.Lock())
+        async with lock:    # 先排同一路由，等待時不佔用並行名額
+            async with self.semaphore:
+                return await func(*args, **kwargs)
+
+    async def gather(
+            self,
+            jobs: Iterable[Tuple[Hashable, Callable[[], Awaitable[Any]]]]
+    ) -> List[Any]:
+        """|coro|
+
+        並行執行所有(路由, 工作)，依原順序回傳結果；
+        發生錯誤的工作印出錯誤並以該例外作為結果，不影響其他工作。
+        """
+
+        results = await asyncio.gather(
+            *(self.call(route, job) for route, job in jobs),
+            return_exceptions=True
+        )
+        for result in results:
+            if(isinstance(result, Exception)):
+                traceback.print_exception(result)
+        return results
@@ -0,0 +1,58 @@
+"""股價定點數(整數tick)換算。
+
+股價於程式內以整數tick儲存(1 tick = 1/`PRICE_SCALE`元)，
+只有在顯示、交易以及存檔時才換算，避免浮點數累積誤差。
+"""
+from typing import Final
+
+
+PRICE_SCALE: Final[int] = 1_000_000
+"""每1元的tick數(與原本`round(price, 6)`的精度相同)。
+"""
+SHARES_PER_LOT: Final[int] = 1000
+"""1張 = 1000股。
+"""
+TICKS_PER_CENT: Final[int] = PRICE_SCALE // 100
+
+
+def to_ticks(price: float) -> int:
+    """元 -> tick。
+    """
+
+    return round(price * PRICE_SCALE)
+
+
+def to_price(ticks: int) -> float:
+    """tick -> 元(存檔用)。
+    """
+
+    return ticks / PRICE_SCALE
+
+
+def to_cents(ticks: int) -> int:
+    """tick -> 顯示用的分(小數點後兩位，四捨五入)。
+    """
+
+    return (ticks + TICKS_PER_CENT // 2) // TICKS_PER_CENT
+
+
+def lot_value(ticks: int) -> int:
+    """以顯示價格(小數點後兩位)計算1張的價值。
+    """
+
+    return to_cents(ticks) * SHARES_PER_LOT // 100
+
+
+def format_cents(cents: int) -> str:
+    """分 -> 小數點後兩位的字串。
+    """
+
+    sign = "-" if cents < 0 else ""
+    return f"{sign}{abs(cents) // 100}.{abs(cents) % 100:02d}"
+
+
+def format_price(ticks: int) -> str:
+    """tick -> 小數點後兩位的價格字串。
+    """
+
+    return format_cents(to_cents(ticks))
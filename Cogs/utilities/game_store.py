@@ -0,0 +1,445 @@
+"""遊戲資料記憶體快取。
+"""
+from typing import Any, Callable, ClassVar, Deque, Dict, List, Set, Tuple
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio
+import copy
+import traceback
+
+from .datatypes import AlterationLog, AssetDict, LogData
+from .json_backend import JsonBackend, log_key
+from .log_index import LogIndex
+from .sqlite_backend import SqliteBackend
+
+
+def in_event_loop() -> bool:
+    """目前是否在執行中的事件迴圈內。
+    """
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def report_io_error(future: Future):
+    """印出I/O執行緒中發生的錯誤(不等待結果的寫入使用)。
+    """
+
+    if(future.exception() is not None):
+        traceback.print_exception(future.exception())
+
+
+class GameStore:
+    """整個程序共用的遊戲資料。
+
+    第一次讀取時一次載入`STORE_FILES`內的所有檔案，之後的讀取皆直接由記憶體提供，
+    不再重新開檔及解析JSON；寫入時只更新記憶體並將檔名加入`dirty`，
+    由`flush()`將有變動的檔案寫回儲存後端。
+
+    在事件迴圈中寫入時採延遲寫回(write-behind)，`flush_window`秒內的所有變動
+    合併為每個檔案一次的寫入；沒有執行中的事件迴圈時則立即寫回。
+
+    所有硬碟I/O皆交由單一I/O執行緒(`io_executor`)依序執行，不阻塞事件迴圈；
+    交出的資料為當下的複本。在事件迴圈外呼叫時則等待I/O完成。
+    協程中可使用`read_async()`、`flush_async()`、`append_log_async()`等待I/O完成。
+
+    儲存後端由`game_config`的`STORAGE_BACKEND`選擇:
+    - `"json"`: :class:`JsonBackend`(預設)
+    - `"sqlite"`: :class:`SqliteBackend`，`game_config`與原始資料仍存於JSON檔案。
+
+    `read()`回傳的是記憶體中的物件本身，修改後須再呼叫`write()`標記變動。
+
+    最近`RECENT_LOG_SIZE`筆收支紀錄另存於固定長度的佇列`recent_logs`，
+    所有收支紀錄另以 :class:`LogIndex` 依小隊、種類及使用者建立索引(`log_index`)；
+    兩者於載入時由收支紀錄建立一次，之後隨新增紀錄更新。
+    """
+
+    __slots__ = (
+        "data_dir",
+        "data",
+        "dirty",
+        "dirty_teams",
+        "loaded",
+        "loading",
+        "flush_window",
+        "flush_handle",
+        "json_backend",
+        "backend",
+        "io_executor",
+        "recent_logs",
+        "log_index"
+    )
+    # 啟動時一次載入的檔案
+    STORE_FILES: ClassVar[Tuple[str, ...]] = (
+        "game_config",
+        "team_assets",
+        "market_data",
+        "game_state",
+        "alteration_log"
+    )
+    # 預設合併寫入的時間窗(秒)
+    DEFAULT_FLUSH_WINDOW: ClassVar[float] = 0.25
+    # 保留的最近收支紀錄筆數
+    RECENT_LOG_SIZE: ClassVar[int] = 25
+
+    def __init__(self, data_dir: str = ".\\Data"):
+        self.data_dir = data_dir
+        self.data: Dict[str, Any] = {}  # file_name: 資料
+        self.dirty: Set[str] = set()    # 尚未寫回的檔名
+        self.dirty_teams: Set[str] = set()  # 尚未寫回的個別小隊資產
+        self.loaded: bool = False
+        # 進行中的非同步讀取(檔名: Future，`None`為初次載入)
+        self.loading: Dict[str | None, asyncio.Future] = {}
+        self.flush_window: float = GameStore.DEFAULT_FLUSH_WINDOW
+        self.flush_handle: asyncio.TimerHandle | None = None    # 已排程的寫回
+        self.json_backend = JsonBackend(data_dir)
+        self.backend: JsonBackend | SqliteBackend = self.json_backend
+        # 單一執行緒，確保寫入依呼叫順序執行
+        self.io_executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="game_store_io"
+        )
+        # 最近的收支紀錄(依serial排序)
+        self.recent_logs: Deque[LogData] = deque(maxlen=GameStore.RECENT_LOG_SIZE)
+        # 收支紀錄查詢索引
+        self.log_index = LogIndex()
+
+    def submit_io(self, func: Callable[..., Any], /, *args: Any) -> Future:
+        """將阻塞的儲存操作交由I/O執行緒執行。
+
+        在事件迴圈內呼叫時不等待，錯誤於完成時印出；在事件迴圈外呼叫時等待完成。
+        """
+
+        future = self.io_executor.submit(func, *args)
+        if(in_event_loop()):
+            future.add_done_callback(report_io_error)
+        else:
+            future.result()
+        return future
+
+    def backend_for(self, file_name: str) -> JsonBackend | SqliteBackend:
+        """回傳負責該檔案的儲存後端。
+        """
+
+        if(self.backend.handles(file_name)):
+            return self.backend
+        return self.json_backend
+
+    def load(self):
+        """讀取`game_config`選擇儲存後端，並載入`STORE_FILES`內的所有檔案(只執行一次)。
+        """
+
+        if(not self.loaded):
+            self.apply_loaded(*self.load_files())
+
+    async def load_async(self):
+        """|coro|
+
+        `load()`的非同步版本，檔案於I/O執行緒讀取，同時呼叫的協程共用同一次載入。
+        """
+
+        if(not self.loaded):
+            self.apply_loaded(*await self.load_once(None, self.load_files))
+
+    async def load_once(self, key: str | None, func: Callable[..., Any], /, *args: Any) -> Any:
+        """|coro|
+
+        於I/O執行緒執行讀取`func(*args)`，同一個`key`同時只讀取一次，
+        同時呼叫的協程共用結果。
+        """
+
+        future = self.loading.get(key)
+        if(future is None):
+            future = self.loading[key] = asyncio.get_running_loop().run_in_executor(
+                self.io_executor, func, *args
+            )
+            future.add_done_callback(lambda _: self.loading.pop(key, None))
+        return await asyncio.shield(future)
+
+    def load_files(self) -> Tuple[JsonBackend | SqliteBackend, Dict[str, Any]]:
+        """讀取`game_config`選擇儲存後端，回傳該後端及`STORE_FILES`內尚未載入的資料。
+
+        只讀取檔案、不修改`GameStore`，可於I/O執行緒執行。
+        """
+
+        config = self.data.get("game_config")
+        if(config is None):
+            config = self.json_backend.load("game_config")
+        backend: JsonBackend | SqliteBackend = self.json_backend
+        if(config.get("STORAGE_BACKEND", "json") == "sqlite"):
+            backend = SqliteBackend(
+                f"{self.data_dir}\\{config.get('SQLITE_FILE', 'game_data')}.db"
+            )
+
+        data: Dict[str, Any] = {"game_config": config}
+        for file_name in GameStore.STORE_FILES:
+            if(file_name not in data and file_name not in self.data):
+                data[file_name] = (
+                    backend if backend.handles(file_name) else self.json_backend
+                ).load(file_name)
+        return backend, data
+
+    def apply_loaded(self, backend: JsonBackend | SqliteBackend, data: Dict[str, Any]):
+        """套用`load_files()`的結果並建立收支紀錄索引(於事件迴圈上執行)。
+
+        已載入時(如載入期間已由`load()`載入)捨棄結果；已寫入的資料不會被覆蓋。
+        """
+
+        if(self.loaded):
+            if(isinstance(backend, SqliteBackend) and backend is not self.backend):
+                backend.connection.close()
+            return
+        for file_name, file_data in data.items():
+            self.data.setdefault(file_name, file_data)
+        self.backend = backend
+        self.flush_window = self.data["game_config"].get(
+            "FLUSH_WINDOW", GameStore.DEFAULT_FLUSH_WINDOW
+        )
+        self.loaded = True
+        self.index_log()
+
+    def index_log(self):
+        """由記憶體中的收支紀錄建立查詢索引，並取出最近的`RECENT_LOG_SIZE`筆紀錄。
+        """
+
+        log: AlterationLog = self.data["alteration_log"]
+        self.log_index.build(log)
+        serial: int = log["serial"]
+        self.recent_logs.clear()
+        self.recent_logs.extend(self.query_log(
+            serial_from=max(serial-GameStore.RECENT_LOG_SIZE, 0)
+        ))
+
+    def read(self, file_name: str, *, deep_copy: bool = False) -> Any:
+        """讀取指定檔名的資料。
+
+        deep_copy: `bool` = `False`
+            回傳資料的複本，修改複本不影響記憶體中的資料。
+        """
+
+        if(not self.loaded):
+            self.load()
+        if(file_name not in self.data):  # 非預先載入的檔案(原始資料等)
+            self.data[file_name] = self.backend_for(file_name).load(file_name)
+
+        if(deep_copy):
+            return copy.deepcopy(self.data[file_name])
+        return self.data[file_name]
+
+    async def read_async(self, file_name: str, *, deep_copy: bool = False) -> Any:
+        """|coro|
+
+        `read()`的非同步版本，尚未載入的檔案於I/O執行緒讀取。
+        """
+
+        if(not self.loaded):
+            await self.load_async()
+        if(file_name not in self.data):  # 只在I/O執行緒讀取，於事件迴圈上存入
+            data = await self.load_once(
+                file_name, self.backend_for(file_name).load, file_name
+            )
+            self.data.setdefault(file_name, data)
+        return self.read(file_name, deep_copy=deep_copy)
+
+    def write(self, file_name: str, data: dict | list):
+        """更新記憶體中的資料並標記為已變動。
+
+        如果未找到檔案則 raise `FileNotFoundError`。
+        """
+
+        if(file_name not in self.data and
+           not self.backend_for(file_name).exists(file_name)):
+            raise FileNotFoundError(f"File: '{file_name}' not found.")
+
+        self.data[file_name] = data
+        self.dirty.add(file_name)
+        if(file_name == "team_assets"):  # 整份寫入已包含個別小隊的變動
+            self.dirty_teams.clear()
+        elif(file_name == "alteration_log" and self.loaded):
+            self.index_log()
+
+    def write_team(self, team: str, asset: AssetDict):
+        """更新單一小隊的資產並標記為已變動。
+
+        SQLite後端寫回時只更新該小隊的資料列。
+        """
+
+        self.read("team_assets")[team] = asset
+        if("team_assets" not in self.dirty):
+            self.dirty_teams.add(team)
+
+    def add_log_record(self, record: LogData) -> int:
+        """給予紀錄serial並加入記憶體中的收支紀錄，回傳該紀錄的serial。
+        """
+
+        log: AlterationLog = self.read("alteration_log")
+        serial: int = log["serial"]
+        record["serial"] = serial
+        log.setdefault(log_key(record), []).append(record)
+        log["serial"] = serial + 1
+        self.recent_logs.append(record)
+        self.log_index.add(record)
+        return serial
+
+    def append_log(self, record: LogData) -> int:
+        """新增一筆收支紀錄並交由I/O執行緒寫入後端，回傳該紀錄的serial。
+        """
+
+        serial = self.add_log_record(record)
+        self.submit_io(self.backend_for("alteration_log").append_log, record)
+        return serial
+
+    def append_logs(self, records: List[LogData]) -> List[int]:
+        """新增多筆收支紀錄並以一次寫入交由I/O執行緒寫入後端，回傳各紀錄的serial。
+        """
+
+        if(not records):
+            return []
+        serials = [self.add_log_record(record) for record in records]
+        self.submit_io(self.backend_for("alteration_log").append_log, *records)
+        return serials
+
+    def commit(self, changed: Dict[str, AssetDict], records: List[LogData]) -> List[int]:
+        """更新變動的小隊資產並新增其收支紀錄，以一次後端寫入交由I/O執行緒寫入，
+        回傳各紀錄的serial。
+
+        小隊資產與收支紀錄一起寫入(見後端的`commit()`)，只複製變動的小隊；
+        JSON後端的交易只附加日誌，小隊資產快照仍由延遲寫回合併寫出。
+        """
+
+        team_assets: Dict[str, AssetDict] = self.read("team_assets")
+        backend = self.backend_for("team_assets")
+        for team, asset in changed.items():
+            team_assets[team] = asset
+            if(not backend.JOURNALS_COMMITS):
+                self.dirty_teams.discard(team)
+            elif("team_assets" not in self.dirty):
+                self.dirty_teams.add(team)
+        serials = [self.add_log_record(record) for record in records]
+
+        self.submit_io(
+            backend.commit,
+            {team: copy.deepcopy(asset) for team, asset in changed.items()},
+            list(records)
+        )
+        if(backend.JOURNALS_COMMITS):
+            self.schedule_flush()
+        return serials
+
+    async def append_log_async(self, record: LogData) -> int:
+        """|coro|
+
+        新增一筆收支紀錄並等待寫入後端，回傳該紀錄的serial。
+        """
+
+        serial = self.add_log_record(record)
+        await asyncio.wrap_future(self.submit_io(
+            self.backend_for("alteration_log").append_log, record
+        ))
+        return serial
+
+    def compact_log(self) -> Future:
+        """壓縮收支紀錄(JSON: 寫出快照並清空日誌)。
+        """
+
+        log: AlterationLog = copy.deepcopy(self.read("alteration_log"))
+        self.dirty.discard("alteration_log")
+        return self.submit_io(self.backend_for("alteration_log").compact_log, log)
+
+    def clear_log(self) -> Future:
+        """清除所有收支紀錄。
+        """
+
+        if(not self.loaded):
+            self.load()
+        self.data["alteration_log"] = {"serial": 0}
+        self.dirty.discard("alteration_log")
+        self.recent_logs.clear()
+        self.log_index.clear()
+        return self.submit_io(self.backend_for("alteration_log").clear_log)
+
+    def query_log(
+            self,
+            *,
+            team: str | None = None,
+            serial_from: int | None = None,
+            serial_to: int | None = None
+    ) -> List[LogData]:
+        """查詢指定小隊或serial區間[serial_from, serial_to)的紀錄，依serial排序。
+        """
+
+        return self.backend_for("alteration_log").query_log(
+            self.read("alteration_log"),
+            team=team,
+            serial_from=serial_from,
+            serial_to=serial_to
+        )
+
+    def count_log(self, team: str) -> int:
+        """指定小隊的紀錄數量。
+        """
+
+        return self.backend_for("alteration_log").count_log(
+            self.read("alteration_log"), team
+        )
+
+    def schedule_flush(self):
+        """排程於`flush_window`秒後寫回所有已變動資料。
+
+        時間窗內重複呼叫只會有一次寫回；沒有執行中的事件迴圈時立即寫回。
+        """
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:    # 事件迴圈外(啟動前、關閉後)
+            self.flush()
+            return
+
+        if(self.flush_handle is None):
+            self.flush_handle = loop.call_later(
+                self.flush_window, self.flush
+            )
+
+    def flush(self, file_name: str | None = None) -> List[Future]:
+        """將所有或指定的已變動資料(的複本)交由I/O執行緒寫回儲存後端。
+        """
+
+        if(file_name is None):
+            if(self.flush_handle is not None):  # 強制寫回時取消已排程的寫回
+                self.flush_handle.cancel()
+                self.flush_handle = None
+            file_names = tuple(self.dirty)
+        elif(file_name in self.dirty):
+            file_names = (file_name,)
+        else:
+            file_names = ()
+
+        futures: List[Future] = []
+        for name in file_names:
+            futures.append(self.submit_io(
+                self.backend_for(name).save, name, copy.deepcopy(self.data[name])
+            ))
+            self.dirty.discard(name)
+
+        if(self.dirty_teams and file_name in (None, "team_assets")):
+            team_assets: Dict[str, AssetDict] = copy.deepcopy(self.data["team_assets"])
+            futures.append(self.submit_io(
+                self.backend_for("team_assets").save_team_assets,
+                {team: team_assets[team] for team in self.dirty_teams},
+                team_assets
+            ))
+            self.dirty_teams.clear()
+        return futures
+
+    async def flush_async(self, file_name: str | None = None):
+        """|coro|
+
+        將所有或指定的已變動資料寫回儲存後端並等待完成。
+        """
+
+        await asyncio.gather(
+            *(asyncio.wrap_future(future) for future in self.flush(file_name))
+        )
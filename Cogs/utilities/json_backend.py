@@ -0,0 +1,207 @@
+"""JSON檔案儲存後端。
+"""
+from typing import Any, ClassVar, Dict, List
+import bisect
+import json
+import os
+
+from .datatypes import AlterationLog, AssetDict, LogData
+from .log_journal import LogJournal
+
+
+def log_key(record: LogData) -> str:
+    """紀錄所屬的小隊鍵(轉帳紀錄歸於轉出小隊)。
+    """
+
+    team = record["team"]
+    return team if isinstance(team, str) else team[0]
+
+
+class JsonBackend:
+    """以`Data`資料夾內的JSON檔案儲存遊戲資料(預設後端)。
+
+    收支紀錄(`alteration_log`)以快照`alteration_log.json`加上附加式日誌
+    `alteration_log.jsonl`儲存：新紀錄只附加一行，寫出快照時才清空日誌。
+
+    交易(`commit()`)變動的小隊資產與收支紀錄以同一行附加至日誌，不重寫`team_assets.json`；
+    讀取小隊資產時重播最後一次快照之後的變動，由延遲寫回的快照合併寫入。
+    """
+
+    __slots__ = (
+        "data_dir",
+        "log_journal"
+    )
+    # 交易只附加日誌，小隊資產快照仍需由延遲寫回寫出
+    JOURNALS_COMMITS: ClassVar[bool] = True
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self.log_journal = LogJournal(f"{data_dir}\\alteration_log.jsonl")
+
+    def file_path(self, file_name: str) -> str:
+        """回傳指定檔名的檔案路徑。
+        """
+
+        return f"{self.data_dir}\\{file_name}.json"
+
+    def handles(self, file_name: str) -> bool:
+        """JSON後端負責所有檔案。
+        """
+
+        return True
+
+    def exists(self, file_name: str) -> bool:
+        """檔案是否存在。
+        """
+
+        return os.path.exists(self.file_path(file_name))
+
+    def load(self, file_name: str) -> Any:
+        """讀取單一檔案。
+
+        如果未找到檔案則 raise `FileNotFoundError`。
+        """
+
+        if(file_name == "alteration_log"):
+            return self.load_log()
+
+        file_path = self.file_path(file_name)
+        if(not os.path.exists(file_path)):
+            raise FileNotFoundError(f"File: '{file_name}' not found.")
+
+        with open(
+            file_path,
+            mode="r",
+            encoding="utf-8"
+        ) as json_file:
+            data = json.load(json_file)
+        if(file_name == "team_assets"):  # 快照之後的交易
+            data.update(self.log_journal.team_changes())
+        return data
+
+    def load_log(self) -> AlterationLog:
+        """讀取收支紀錄快照並重播日誌中快照之後的紀錄。
+
+        serial由日誌尾端的最後一筆紀錄恢復；日誌有內容時立即壓縮，
+        一併清除寫入中斷的尾行。
+        """
+
+        file_path = self.file_path("alteration_log")
+        if(not os.path.exists(file_path)):
+            raise FileNotFoundError("File: 'alteration_log' not found.")
+
+        with open(
+            file_path,
+            mode="r",
+            encoding="utf-8"
+        ) as json_file:
+            log: AlterationLog = json.load(json_file)
+
+        if(self.log_journal.is_empty()):
+            return log
+
+        snapshot_serial: int = log["serial"]
+        for record in self.log_journal.records():
+            if(record["serial"] < snapshot_serial):  # 快照已包含(壓縮中斷)
+                continue
+            log.setdefault(log_key(record), []).append(record)
+
+        last_serial = self.log_journal.last_serial()
+        if(last_serial is not None):
+            log["serial"] = max(snapshot_serial, last_serial+1)
+        self.compact_log(log)
+        return log
+
+    def save(self, file_name: str, data: Any):
+        """寫入單一檔案。
+
+        先寫入暫存檔再取代原檔，寫到一半中斷不會留下損毀的檔案。
+        """
+
+        file_path = self.file_path(file_name)
+        with open(
+            f"{file_path}.tmp",
+            mode="w",
+            encoding="utf-8"
+        ) as json_file:
+            json.dump(
+                data, json_file,
+                ensure_ascii=False,
+                indent=4
+            )
+        os.replace(f"{file_path}.tmp", file_path)
+        if(file_name == "alteration_log"):  # 快照已包含日誌中的所有紀錄
+            self.log_journal.truncate()
+        elif(file_name == "team_assets"):   # 快照已包含日誌中的所有交易
+            self.log_journal.mark_snapshot()
+
+    def save_team_assets(
+            self,
+            changed: Dict[str, AssetDict],
+            team_assets: Dict[str, AssetDict]
+    ):
+        """儲存有變動的小隊資產，JSON檔案只能整個重寫。
+        """
+
+        self.save("team_assets", team_assets)
+
+    def append_log(self, *records: LogData):
+        """附加一或多筆紀錄至日誌。
+        """
+
+        self.log_journal.append(*records)
+
+    def commit(self, changed: Dict[str, AssetDict], records: List[LogData]):
+        """以一行附加變動的小隊及其收支紀錄至日誌。
+
+        寫入中斷時整行略過，不會留下沒有對應資產變動的收支紀錄。
+        """
+
+        self.log_journal.append_commit(changed, records)
+
+    def compact_log(self, log: AlterationLog):
+        """將收支紀錄寫成快照並清空日誌。
+        """
+
+        self.save("alteration_log", log)
+
+    def clear_log(self):
+        """清除所有收支紀錄。
+        """
+
+        self.save("alteration_log", {"serial": 0})
+
+    def query_log(
+            self,
+            log: AlterationLog,
+            *,
+            team: str | None = None,
+            serial_from: int | None = None,
+            serial_to: int | None = None
+    ) -> List[LogData]:
+        """查詢指定小隊或serial區間[serial_from, serial_to)的紀錄，依serial排序。
+
+        各小隊的紀錄本身即依serial排序，以二分搜尋取出區間。
+        """
+
+        teams = [team] if team is not None else [k for k in log if k != "serial"]
+        records: List[LogData] = []
+        for t in teams:
+            team_records: List[LogData] = log.get(t, [])
+            start = 0 if serial_from is None else bisect.bisect_left(
+                team_records, serial_from, key=lambda x: x["serial"]
+            )
+            end = len(team_records) if serial_to is None else bisect.bisect_left(
+                team_records, serial_to, key=lambda x: x["serial"]
+            )
+            records.extend(team_records[start:end])
+
+        if(team is None):
+            records.sort(key=lambda x: x["serial"])
+        return records
+
+    def count_log(self, log: AlterationLog, team: str) -> int:
+        """指定小隊的紀錄數量。
+        """
+
+        return len(log.get(team, []))
@@ -0,0 +1,173 @@
+"""收支紀錄的查詢索引。
+"""
+from typing import Dict, List, Sequence, Tuple
+from datetime import datetime
+import bisect
+
+from .datatypes import AlterationLog, LogData, LogType
+
+
+# 收支紀錄的時間格式
+LOG_TIME_FORMAT: str = "%m/%d %I:%M%p"
+# 紀錄時間不含年份，解析時一律補上此年份(閏年，02/29才能解析)
+LOG_YEAR: int = 2000
+
+
+def record_teams(record: LogData) -> Tuple[str, ...]:
+    """紀錄相關的所有小隊(轉帳紀錄包含轉出及轉入小隊)。
+    """
+
+    team = record["team"]
+    if(isinstance(team, str)):
+        return (team,)
+    return tuple(dict.fromkeys(team))
+
+
+def parse_log_time(text: str, format: str = LOG_TIME_FORMAT) -> datetime:
+    """解析不含年份的時間字串，年份補為`LOG_YEAR`。
+
+    :raise ValueError: 格式不符或日期不存在。
+    """
+
+    return datetime.strptime(f"{LOG_YEAR}/{text}", f"%Y/{format}")
+
+
+def record_time(record: LogData) -> datetime:
+    """紀錄的時間(只到分鐘，年份為`LOG_YEAR`)。
+    """
+
+    return parse_log_time(record["time"])
+
+
+def sorted_contains(serials: List[int], serial: int) -> bool:
+    """排序過的serial串列中是否有`serial`。
+    """
+
+    i = bisect.bisect_left(serials, serial)
+    return i < len(serials) and serials[i] == serial
+
+
+class LogIndex:
+    """收支紀錄的偏移索引。
+
+    以serial對照紀錄，並依小隊、紀錄種類及使用者分別保存serial串列；
+    紀錄依serial遞增加入，所有串列皆已排序，不需再排序。
+
+    查詢時以最短的串列為候選，serial區間以二分搜尋取出，其他條件以二分搜尋判斷是否包含；
+    紀錄的serial隨時間遞增，時間區間同樣以二分搜尋換算為serial區間
+    (紀錄時間在加入時解析一次，保存於與`serials`對應的`times`)。
+    """
+
+    __slots__ = (
+        "records",
+        "serials",
+        "times",
+        "by_team",
+        "by_type",
+        "by_user"
+    )
+
+    def __init__(self):
+        self.records: Dict[int, LogData] = {}   # serial: 紀錄
+        self.serials: List[int] = []            # 所有紀錄的serial
+        self.times: List[datetime] = []         # 與serials對應的紀錄時間
+        self.by_team: Dict[str, List[int]] = {}
+        self.by_type: Dict[LogType, List[int]] = {}
+        self.by_user: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.serials)
+
+    def clear(self):
+        """清除所有索引。
+        """
+
+        self.records.clear()
+        self.serials.clear()
+        self.times.clear()
+        self.by_team.clear()
+        self.by_type.clear()
+        self.by_user.clear()
+
+    def build(self, log: AlterationLog):
+        """由整份收支紀錄重建索引。
+        """
+
+        self.clear()
+        records = sorted(
+            (record for key, team_records in log.items() if key != "serial"
+             for record in team_records),
+            key=lambda x: x["serial"]
+        )
+        for record in records:
+            self.add(record)
+
+    def add(self, record: LogData):
+        """加入一筆紀錄(serial須大於已加入的紀錄)。
+        """
+
+        serial: int = record["serial"]
+        time = record_time(record)
+        self.records[serial] = record
+        self.serials.append(serial)
+        self.times.append(time)
+        for team in record_teams(record):
+            self.by_team.setdefault(team, []).append(serial)
+        self.by_type.setdefault(record["log_type"], []).append(serial)
+        self.by_user.setdefault(record["user"], []).append(serial)
+
+    def serial_at(self, time: datetime, *, after: bool = False) -> int:
+        """第一筆時間不早於`time`(`after=True`時為晚於`time`)的紀錄的serial，
+        沒有則回傳最後一筆的serial + 1。
+        """
+
+        search = bisect.bisect_right if after else bisect.bisect_left
+        i = search(self.times, time)
+        if(i < len(self.serials)):
+            return self.serials[i]
+        return self.serials[-1] + 1 if self.serials else 0
+
+    def select(
+            self,
+            *,
+            team: str | None = None,
+            log_type: LogType | None = None,
+            user: str | None = None,
+            serial_from: int | None = None,
+            serial_to: int | None = None,
+            time_from: datetime | None = None,
+            time_to: datetime | None = None
+    ) -> List[int]:
+        """符合所有條件的紀錄serial，由小到大排序。
+
+        serial區間為[serial_from, serial_to)，時間區間為[time_from, time_to](到分鐘)。
+        """
+
+        if(time_from is not None):
+            serial_from = max(serial_from or 0, self.serial_at(time_from))
+        if(time_to is not None):
+            bound = self.serial_at(time_to, after=True)
+            serial_to = bound if serial_to is None else min(serial_to, bound)
+
+        filters: List[List[int]] = []
+        if(team is not None):
+            filters.append(self.by_team.get(team, []))
+        if(log_type is not None):
+            filters.append(self.by_type.get(log_type, []))
+        if(user is not None):
+            filters.append(self.by_user.get(user, []))
+        filters.sort(key=len)
+        candidates = filters[0] if filters else self.serials
+
+        start = 0 if serial_from is None else bisect.bisect_left(candidates, serial_from)
+        end = len(candidates) if serial_to is None else bisect.bisect_left(candidates, serial_to)
+        selected = candidates[start:end]
+        for serials in filters[1:]:
+            selected = [serial for serial in selected if sorted_contains(serials, serial)]
+        return selected
+
+    def get(self, serials: Sequence[int]) -> List[LogData]:
+        """依序取出指定serial的紀錄。
+        """
+
+        return [self.records[serial] for serial in serials]
@@ -0,0 +1,164 @@
+"""收支紀錄的附加式日誌(JSON Lines)。
+"""
+from typing import Any, Dict, Iterator, List
+import json
+import os
+
+from .datatypes import AssetDict, LogData
+
+
+class LogJournal:
+    """收支紀錄日誌檔，每行為下列其中一種:
+
+    - 一筆 :class:`LogData`(`append()`)。
+    - 一次交易(`append_commit()`): `{"team_assets": 變動的小隊, "records": 收支紀錄}`，
+      小隊資產與收支紀錄在同一行，寫入中斷時同時不生效。
+    - 小隊資產快照標記(`mark_snapshot()`): `{"snapshot": "team_assets"}`，
+      標記之前的交易已包含在`team_assets.json`中。
+
+    新紀錄只附加在檔案尾端，寫入成本與紀錄總量無關；
+    壓縮(compaction)時由 :class:`GameStore` 寫出快照後呼叫`truncate()`清空。
+    """
+
+    __slots__ = ("file_path",)
+    # 由尾端往回找最後一行時每次讀取的大小
+    TAIL_CHUNK_SIZE = 4096
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+
+    def append(self, *records: LogData):
+        """以一次寫入附加一或多筆紀錄至日誌尾端。
+        """
+
+        with open(
+            self.file_path,
+            mode="a",
+            encoding="utf-8"
+        ) as journal:
+            journal.write("".join(
+                json.dumps(record, ensure_ascii=False) + "\n" for record in records
+            ))
+
+    def append_commit(self, changed: Dict[str, AssetDict], records: List[LogData]):
+        """以一行附加一次交易變動的小隊資產及其收支紀錄。
+        """
+
+        self.append({"team_assets": changed, "records": records})
+
+    def mark_snapshot(self):
+        """標記之前的交易已寫入小隊資產快照。
+        """
+
+        self.append({"snapshot": "team_assets"})
+
+    def entries(self) -> Iterator[Dict[str, Any]]:
+        """依寫入順序讀出日誌的每一行。
+
+        最後一行若因寫入中斷而不完整則略過。
+        """
+
+        if(not os.path.exists(self.file_path)):
+            return
+
+        with open(
+            self.file_path,
+            mode="r",
+            encoding="utf-8"
+        ) as journal:
+            for line in journal:
+                if(not line.strip()):
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:    # 寫到一半中斷的尾行
+                    return
+                yield entry
+
+    def records(self) -> Iterator[LogData]:
+        """依寫入順序讀出所有收支紀錄(包含交易中的紀錄)。
+        """
+
+        for entry in self.entries():
+            if("records" in entry):
+                yield from entry["records"]
+            elif("snapshot" not in entry):
+                yield entry
+
+    def team_changes(self) -> Dict[str, AssetDict]:
+        """最後一個快照標記之後，各交易變動的小隊資產(同一小隊取最後一次)。
+        """
+
+        changed: Dict[str, AssetDict] = {}
+        for entry in self.entries():
+            if("snapshot" in entry):
+                changed.clear()
+            elif("team_assets" in entry):
+                changed.update(entry["team_assets"])
+        return changed
+
+    def last_record(self) -> LogData | None:
+        """由檔案尾端讀出最後一筆完整紀錄，不讀取整個檔案。
+        """
+
+        if(not os.path.exists(self.file_path)):
+            return None
+
+        with open(self.file_path, mode="rb") as journal:
+            journal.seek(0, os.SEEK_END)
+            position = journal.tell()
+            tail = b""
+            while(position > 0):
+                read_size = min(LogJournal.TAIL_CHUNK_SIZE, position)
+                position -= read_size
+                journal.seek(position)
+                tail = journal.read(read_size) + tail
+                lines = tail.splitlines()
+                # 最前面一行可能不完整，除非已讀到檔案開頭
+                candidates = lines if position == 0 else lines[1:]
+                for line in reversed(candidates):
+                    if(not line.strip()):
+                        continue
+                    try:
+                        entry = json.loads(line.decode("utf-8"))
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        continue    # 寫到一半中斷的尾行
+                    if("records" in entry):
+                        if(entry["records"]):
+                            return entry["records"][-1]
+                    elif("snapshot" not in entry):
+                        return entry
+        return None
+
+    def last_serial(self) -> int | None:
+        """回傳日誌中最後一筆紀錄的serial，日誌為空時回傳`None`。
+        """
+
+        record = self.last_record()
+        return None if record is None else record["serial"]
+
+    def is_empty(self) -> bool:
+        """日誌是否沒有任何內容。
+        """
+
+        return (not os.path.exists(self.file_path) or
+                os.path.getsize(self.file_path) == 0)
+
+    def truncate(self):
+        """清空日誌(收支紀錄快照寫出後使用)。
+
+        尚未寫入小隊資產快照的交易只保留變動的小隊資產；
+        先寫入暫存檔再取代原檔，中斷時不會遺失這些變動。
+        """
+
+        changed = self.team_changes()
+        with open(
+            f"{self.file_path}.tmp",
+            mode="w",
+            encoding="utf-8"
+        ) as journal:
+            if(changed):
+                journal.write(json.dumps(
+                    {"team_assets": changed, "records": []}, ensure_ascii=False
+                ) + "\n")
+        os.replace(f"{self.file_path}.tmp", self.file_path)
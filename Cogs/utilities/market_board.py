@@ -0,0 +1,75 @@
+"""市場動態看板(預先排版的訊息樣板)。
+"""
+from typing import ClassVar, List, Sequence, Tuple
+
+import numpy as np
+
+from .datatypes import InitialStockData
+from .fixed_point import format_cents, to_cents
+
+
+class MarketBoard:
+    """市場動態看板。
+
+    股票名稱、代碼、產業等固定欄位於建立時依`INITIAL_STOCK_DATA`排版一次並預先分頁，
+    每頁不超過Discord訊息的`MESSAGE_LIMIT`字；
+    每次更新只以記憶體中的股價向量填入成交價、漲跌符號及漲跌幅。
+
+    分頁以每列可能的最大長度計算，股價變動不會讓股票換頁，
+    股價沒有變動的頁面內容不變，由`DiscordUI.edit_message()`略過。
+    """
+
+    __slots__ = (
+        "prefixes",
+        "pages"
+    )
+    # Discord訊息字數上限
+    MESSAGE_LIMIT: ClassVar[int] = 2000
+    HEADER: ClassVar[str] = f"```商品名稱　{'代碼':^5}產業{'成交':^7}漲跌\n"
+    FOOTER: ClassVar[str] = "```"
+    # 成交價、漲跌欄位的最大長度(如`"9999.99 🔴9999.99\n"`，保留餘裕)
+    CELL_WIDTH: ClassVar[int] = 20
+    # 漲跌符號，以漲跌幅的正負號(0, 1, -1)索引
+    ARROWS: ClassVar[Tuple[str, str, str]] = ("⚪", "🔴", "🟢")
+
+    def __init__(self, initial_data: Sequence[InitialStockData]):
+        # 每列的固定欄位
+        self.prefixes: List[str] = [
+            f"{data['name'].ljust(5, '　')}{data['symbol']:^6}{data['sector']:3}"
+            for data in initial_data
+        ]
+        # 各頁包含的列
+        self.pages: List[slice] = []
+
+        budget = MarketBoard.MESSAGE_LIMIT - len(MarketBoard.HEADER) - len(MarketBoard.FOOTER)
+        start = used = 0
+        for index_, prefix in enumerate(self.prefixes):
+            width = len(prefix) + MarketBoard.CELL_WIDTH
+            if(used + width > budget and index_ > start):
+                self.pages.append(slice(start, index_))
+                start, used = index_, 0
+            used += width
+        self.pages.append(slice(start, len(self.prefixes)))
+
+    def __len__(self) -> int:
+        """頁數。
+        """
+
+        return len(self.pages)
+
+    def render(self, price_ticks: np.ndarray, close_ticks: np.ndarray) -> List[str]:
+        """以股價及收盤價(整數tick)填入變動欄位，回傳各頁訊息內容。
+        """
+
+        cents = to_cents(np.asarray(price_ticks, dtype=np.int64))
+        deltas = cents - to_cents(np.asarray(close_ticks, dtype=np.int64))
+        rows = [
+            f"{prefix}{format_cents(price):>5} {MarketBoard.ARROWS[sign]}{format_cents(abs(delta))}\n"
+            for prefix, price, delta, sign in zip(
+                self.prefixes, cents.tolist(), deltas.tolist(), np.sign(deltas).tolist()
+            )
+        ]
+        return [
+            "".join((MarketBoard.HEADER, *rows[page], MarketBoard.FOOTER))
+            for page in self.pages
+        ]
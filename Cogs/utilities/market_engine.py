@@ -0,0 +1,232 @@
+"""向量化市場引擎。
+"""
+from typing import ClassVar, List, Sequence, Tuple
+
+import numpy as np
+
+from .datatypes import FinancialStatement, MarketData
+from .fixed_point import PRICE_SCALE
+from .price_noise import PriceNoise
+from .pricing_models import ModelParams, PricingModel
+
+
+class MarketEngine:
+    """以陣列結構(struct of arrays)儲存所有股票的市場資料。
+
+    每個欄位為一個長度為股票數量的NumPy陣列，每次變動由各股價模型(見 :class:`PricingModel`)
+    以一次向量運算變動採用該模型的所有股票，所需時間不隨股票數量以Python迴圈成長。
+    價格以整數tick(`int64`)儲存，見`fixed_point`。
+
+    回合內的股價由開盤價(收盤價)、財報及隨機變動(`noise`，見 :class:`PriceNoise`)決定，
+    本回合的股價路徑依變動次數快取於`path`，第n次變動後的股價由`price_at(n)`取得，
+    開盤狀態改變時重新計算。
+    """
+
+    __slots__ = (
+        "price_ticks",
+        "close_ticks",
+        "eps_qoq",
+        "adjust_ratio",
+        "random_ratio",
+        "drift_ticks",
+        "noise",
+        "models",
+        "path"
+    )
+    # 每次延伸股價路徑的變動次數
+    PATH_BLOCK: ClassVar[int] = 64
+    # 股價上限(tick)，浮點數在此範圍內可精確表示整數，避免複利模型溢位
+    MAX_PRICE_TICKS: ClassVar[int] = 2**53
+
+    def __init__(self, size: int = 0):
+        self.price_ticks = np.zeros(size, dtype=np.int64)
+        self.close_ticks = np.zeros(size, dtype=np.int64)
+        self.eps_qoq = np.zeros(size, dtype=np.float64)
+        self.adjust_ratio = np.zeros(size, dtype=np.float64)
+        self.random_ratio = np.zeros(size, dtype=np.float64)
+        self.drift_ticks = np.zeros(size, dtype=np.int64)  # 每次變動的tick數
+        self.noise: PriceNoise | None = None    # 本回合的隨機變動，`None`為無隨機變動
+        # 各股價模型及採用該模型的股票索引
+        self.models: List[Tuple[PricingModel, np.ndarray]] = [
+            (PricingModel.get("linear"), np.arange(size))
+        ]
+        # 第n列為開盤後第n次變動後的股價(tick)
+        self.path = self.close_ticks[np.newaxis].copy()
+
+    def __len__(self) -> int:
+        return len(self.price_ticks)
+
+    @classmethod
+    def from_market_data(cls, market_data: MarketData) -> "MarketEngine":
+        """由`market_data`建立引擎。
+        """
+
+        engine = cls(len(market_data))
+        engine.price_ticks[:] = np.round(
+            np.array([stock["price"] for stock in market_data], dtype=np.float64)
+            * PRICE_SCALE
+        )
+        engine.close_ticks[:] = np.round(
+            np.array([stock["close"] for stock in market_data], dtype=np.float64)
+            * PRICE_SCALE
+        )
+        engine.set_statements(market_data)
+        return engine
+
+    def set_statements(self, statements: List[FinancialStatement] | MarketData):
+        """設定各股財報資料並重新計算每次變動的tick數。
+        """
+
+        self.eps_qoq[:] = [statement["eps_qoq"] for statement in statements]
+        self.adjust_ratio[:] = [statement["adjust_ratio"] for statement in statements]
+        self.random_ratio[:] = [statement["random_ratio"] for statement in statements]
+        self.update_drift()
+
+    def update_drift(self):
+        """依EPS QoQ及調整率重新計算每次變動的tick數。
+        """
+
+        self.drift_ticks[:] = np.round(self.eps_qoq * self.adjust_ratio * PRICE_SCALE)
+        self.reset_path()
+
+    def set_noise(self, noise: PriceNoise | None):
+        """設定本回合的隨機變動。
+        """
+
+        self.noise = noise
+        self.reset_path()
+
+    def set_models(self, names: Sequence[str]):
+        """依模型名稱設定各股的股價模型，名稱不存在時raise `ValueError`。
+        """
+
+        names = np.asarray(names, dtype=object)
+        self.models = [
+            (PricingModel.get(name), np.flatnonzero(names == name))
+            for name in dict.fromkeys(names.tolist())
+        ]
+        self.reset_path()
+
+    def reset_path(self):
+        """清除股價路徑(開盤狀態改變時)。
+        """
+
+        self.path = self.close_ticks[np.newaxis].copy()
+
+    def extend_path(self, ticks: int):
+        """計算股價路徑直到涵蓋第`ticks`次變動，每次至少延伸`PATH_BLOCK`次。
+
+        股價變動量:
+            delta P = EPS QoQ * Adjust Ratio
+        """
+
+        start = len(self.path)
+        if(ticks < start):
+            return
+        steps = np.arange(start, max(ticks+1, start+MarketEngine.PATH_BLOCK))
+
+        trends = self.close_ticks + np.outer(steps, self.drift_ticks)
+        if(self.noise is not None):
+            totals = self.noise.cumulative(np.append(start-1, steps))
+            sigma = self.noise.scale
+        else:
+            totals = np.zeros((len(steps)+1, len(self)), dtype=np.int64)
+            sigma = np.zeros(len(self), dtype=np.float64)
+
+        # 與過去路徑無關的模型(線性趨勢)一次算完，其餘逐次變動
+        rows = np.empty((len(steps), len(self)), dtype=np.int64)
+        stepped: List[Tuple[PricingModel, np.ndarray]] = []
+        for model, index_ in self.models:
+            closed_form = model.closed_form(trends[:, index_], totals[1:, index_])
+            if(closed_form is None):
+                stepped.append((model, index_))
+            else:
+                rows[:, index_] = np.minimum(closed_form, MarketEngine.MAX_PRICE_TICKS)
+        if(not stepped):
+            self.path = np.concatenate((self.path, rows))
+            return
+
+        noises = np.diff(totals, axis=0)
+        prices = self.path[-1].astype(np.float64)
+        for row, (trend, noise) in enumerate(zip(trends, noises)):
+            for model, index_ in stepped:
+                params: ModelParams = {
+                    "close": self.close_ticks[index_],
+                    "drift": self.drift_ticks[index_],
+                    "trend": trend[index_],
+                    "sigma": sigma[index_],
+                    "noise": noise[index_]
+                }
+                # 每次變動後取整數tick
+                prices[index_] = np.minimum(
+                    np.rint(model.step(prices[index_], params, 1.0)),
+                    MarketEngine.MAX_PRICE_TICKS
+                )
+                rows[row, index_] = prices[index_]
+        self.path = np.concatenate((self.path, rows))
+
+    def price_at(self, ticks: int) -> np.ndarray:
+        """回合開盤後第`ticks`次變動後所有股票的股價(整數tick)。
+        """
+
+        self.extend_path(ticks)
+        return self.path[ticks].copy()
+
+    def price_path(self, ticks: np.ndarray) -> np.ndarray:
+        """多個變動次數的股價(變動次數 x 股票數)，補齊股價歷史紀錄時使用。
+        """
+
+        self.extend_path(int(np.max(ticks, initial=0)))
+        return self.path[ticks]
+
+    def advance_to(self, ticks: int):
+        """將目前股價設為開盤後第`ticks`次變動後的股價。
+        """
+
+        self.price_ticks[:] = self.price_at(ticks)
+
+    def open_round(self, statements: List[FinancialStatement]):
+        """回合開始: 以目前股價為收盤價並換上本回合財報。
+        """
+
+        self.close_ticks[:] = self.price_ticks
+        self.set_statements(statements)
+
+    def prices(self) -> np.ndarray:
+        """所有股票目前的價格(元)。
+        """
+
+        return self.price_ticks / PRICE_SCALE
+
+    def closes(self) -> np.ndarray:
+        """所有股票的收盤價(元)。
+        """
+
+        return self.close_ticks / PRICE_SCALE
+
+    def to_market_data(self) -> MarketData:
+        """轉為`market_data`格式(存檔用)。
+        """
+
+        return [
+            {
+                "price": price,
+                "close": close,
+                "eps_qoq": eps_qoq,
+                "adjust_ratio": adjust_ratio,
+                "random_ratio": random_ratio
+            } for price, close, eps_qoq, adjust_ratio, random_ratio in zip(
+                self.prices().tolist(),
+                self.closes().tolist(),
+                self.eps_qoq.tolist(),
+                self.adjust_ratio.tolist(),
+                self.random_ratio.tolist()
+            )
+        ]
+
+    def write_prices(self, market_data: MarketData):
+        """將目前股價寫回`market_data`。
+        """
+
+        for stock_dict, price in zip(market_data, self.prices().tolist()):
+            stock_dict["price"] = price
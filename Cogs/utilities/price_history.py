@@ -0,0 +1,213 @@
+"""每次股價變動的歷史紀錄(環狀緩衝區)及K線(OHLC)彙整。
+"""
+from typing import ClassVar, Dict, Literal
+import os
+
+import numpy as np
+
+
+Interval = float | Literal["news", "round"]
+"""K線區間: 秒數、每則新聞(`"news"`)或每回合(`"round"`)。
+"""
+
+
+class PriceHistory:
+    """以固定大小的環狀緩衝區保存每次股價變動後所有股票的價格。
+
+    緩衝區為`.npy`檔案的記憶體映射(memmap)，寫入即寫入檔案，
+    機器人重新啟動後歷史紀錄仍在；超過`capacity`筆時覆寫最舊的紀錄，
+    記憶體及檔案大小固定。
+
+    每筆紀錄:
+    - `seq`: 寫入序號(由1開始，0為空位)，重新開啟時由最大序號恢復寫入位置
+    - `time`: 時間戳(秒)
+    - `round`: 回合
+    - `news`: 當回合已發送的新聞數量
+    - `ticks`: 所有股票的價格(整數tick，見`fixed_point`)
+
+    清除紀錄時不清空緩衝區，只寫入一筆`round`為`RESET_ROUND`的標記，
+    序號不大於最後一筆標記的紀錄視為已清除。
+    """
+
+    __slots__ = (
+        "file_path",
+        "records",
+        "count",
+        "start"
+    )
+    # 預設保存筆數
+    DEFAULT_CAPACITY: ClassVar[int] = 50_000
+    # 清除標記的回合
+    RESET_ROUND: ClassVar[int] = -1
+
+    def __init__(
+            self,
+            file_path: str,
+            number_of_stocks: int,
+            capacity: int = DEFAULT_CAPACITY
+    ):
+        self.file_path = file_path
+        dtype = PriceHistory.record_dtype(number_of_stocks)
+
+        self.records: np.memmap | None = None
+        if(os.path.exists(file_path)):
+            records = np.lib.format.open_memmap(file_path, mode="r+")
+            # 股票數量或容量不同則重新建立
+            if(records.dtype == dtype and records.shape == (capacity,)):
+                self.records = records
+            else:
+                del records
+        if(self.records is None):
+            self.records = np.lib.format.open_memmap(
+                file_path, mode="w+", dtype=dtype, shape=(capacity,)
+            )
+        self.count: int = int(self.records["seq"].max(initial=0))   # 已寫入總筆數
+        # 最後一次清除時的序號
+        self.start: int = int(
+            self.records["seq"][self.records["round"] == PriceHistory.RESET_ROUND].max(initial=0)
+        )
+
+    @staticmethod
+    def record_dtype(number_of_stocks: int) -> np.dtype:
+        """單筆紀錄的結構型別。
+        """
+
+        return np.dtype([
+            ("seq", np.int64),
+            ("time", np.float64),
+            ("round", np.int32),
+            ("news", np.int32),
+            ("ticks", np.int64, (number_of_stocks,))
+        ])
+
+    @property
+    def capacity(self) -> int:
+        return len(self.records)
+
+    def __len__(self) -> int:
+        return min(self.count - self.start, self.capacity)
+
+    def append(self, time: float, round_: int, news: int, ticks: np.ndarray):
+        """新增一筆紀錄，緩衝區已滿時覆寫最舊的紀錄。
+        """
+
+        record = self.records[self.count % self.capacity]
+        self.count += 1
+        record["seq"] = self.count
+        record["time"] = time
+        record["round"] = round_
+        record["news"] = news
+        record["ticks"] = ticks
+
+    def extend(
+            self,
+            times: np.ndarray,
+            round_: int,
+            news: np.ndarray,
+            ticks: np.ndarray
+    ):
+        """一次新增多筆紀錄(`ticks`為紀錄數 x 股票數)，補齊停機期間的紀錄時使用。
+        """
+
+        size = len(times)
+        if(not size):
+            return
+        if(size > self.capacity):   # 只保留最後`capacity`筆
+            self.count += size - self.capacity
+            times, news, ticks = times[-self.capacity:], news[-self.capacity:], ticks[-self.capacity:]
+            size = self.capacity
+        positions = (self.count + np.arange(size)) % self.capacity
+        self.records["seq"][positions] = self.count + np.arange(1, size+1)
+        self.records["time"][positions] = times
+        self.records["round"][positions] = round_
+        self.records["news"][positions] = news
+        self.records["ticks"][positions] = ticks
+        self.count += size
+
+    def last(self) -> np.void | None:
+        """最新一筆紀錄，沒有紀錄時回傳`None`。
+        """
+
+        if(self.count == self.start):
+            return None
+        return self.records[(self.count-1) % self.capacity]
+
+    def ordered(self) -> np.ndarray:
+        """依時間先後排列的所有紀錄(複本)。
+        """
+
+        size = len(self)
+        return self.records[(self.count - size + np.arange(size)) % self.capacity]
+
+    def candles(
+            self,
+            interval: Interval,
+            *,
+            stock_index: int | None = None,
+            round_: int | None = None
+    ) -> Dict[str, np.ndarray]:
+        """彙整K線(OHLC)。
+
+        interval: `Interval`
+            K線區間，秒數、`"news"`(每則新聞)或`"round"`(每回合)。
+        stock_index: `int` | `None`
+            指定股票，`None`時回傳所有股票(每個陣列為K線數 x 股票數)。
+        round_: `int` | `None`
+            只彙整指定回合。
+
+        回傳`time`(每根K線開始時間)、`round`、`news`以及`open`、`high`、`low`、`close`
+        (整數tick)。
+        """
+
+        records = self.ordered()
+        if(round_ is not None):
+            records = records[records["round"] == round_]
+        ticks = records["ticks"] if stock_index is None else records["ticks"][:, stock_index]
+        if(not len(records)):
+            return {
+                "time": records["time"],
+                "round": records["round"],
+                "news": records["news"],
+                "open": ticks,
+                "high": ticks,
+                "low": ticks,
+                "close": ticks
+            }
+
+        # 各筆紀錄所屬的區間鍵
+        if(interval == "round"):
+            keys = records["round"].astype(np.int64)
+        elif(interval == "news"):
+            keys = records["round"].astype(np.int64) << 32 | records["news"]
+        else:
+            keys = np.floor(records["time"] / interval).astype(np.int64)
+        # 每根K線的起點(區間鍵改變處)
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], len(records)] - 1
+
+        return {
+            "time": records["time"][starts],
+            "round": records["round"][starts],
+            "news": records["news"][starts],
+            "open": ticks[starts],
+            "high": np.maximum.reduceat(ticks, starts),
+            "low": np.minimum.reduceat(ticks, starts),
+            "close": ticks[ends]
+        }
+
+    def flush(self):
+        """將記憶體映射的變動寫回檔案。
+        """
+
+        self.records.flush()
+
+    def clear(self):
+        """清除所有紀錄(寫入清除標記，不需清空整個緩衝區)。
+        """
+
+        marker = self.records[self.count % self.capacity]
+        self.count += 1
+        marker["seq"] = self.count
+        marker["round"] = PriceHistory.RESET_ROUND
+        self.start = self.count
+        self.records.flush()
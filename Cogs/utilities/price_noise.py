@@ -0,0 +1,170 @@
+"""可重現的股價隨機變動。
+"""
+from typing import ClassVar, Sequence
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from .datatypes import SectorFactors
+
+
+def noise_generator(seed: int, round_: int) -> np.random.Generator:
+    """第`round_`回合的PCG64亂數流(由遊戲種子衍生，各回合互相獨立)。
+    """
+
+    return np.random.Generator(
+        np.random.PCG64(np.random.SeedSequence(seed, spawn_key=(round_,)))
+    )
+
+
+def new_seed() -> int:
+    """產生新的遊戲種子。
+    """
+
+    return int(np.random.SeedSequence().entropy)
+
+
+class NoiseModel(ABC):
+    """隨機變動的分布，一次產生多次變動、所有股票的標準化衝擊。
+
+    子類別覆寫`draw()`以替換分布，`PriceNoise`負責縮放及累加。
+    """
+
+    __slots__ = (
+        "size",
+    )
+
+    def __init__(self, size: int):
+        self.size = size    # 股票數量
+
+    @abstractmethod
+    def draw(self, generator: np.random.Generator, rows: int) -> np.ndarray:
+        """產生`rows`次變動的衝擊(變動次數 x 股票數)。
+        """
+
+
+class GaussianNoise(NoiseModel):
+    """各股獨立的標準常態分布。
+    """
+
+    __slots__ = ()
+
+    def draw(self, generator: np.random.Generator, rows: int) -> np.ndarray:
+        return generator.standard_normal((rows, self.size))
+
+
+class SectorFactorNoise(NoiseModel):
+    """產業因子模型: 每次變動每個產業產生一個衝擊，同產業的股票一起變動。
+
+    個股衝擊 = loading * 所屬產業的因子 + sqrt(1 - loading^2) * 個股衝擊，
+    產業因子之間的相關係數為`correlation`(以Cholesky分解轉換獨立衝擊)，
+    個股衝擊的變異數仍為1。
+
+    所有係數預先組成載荷矩陣(股票數 x (產業數 + 股票數))，
+    每次產生衝擊只需一次矩陣乘法。
+    """
+
+    __slots__ = (
+        "loadings",
+    )
+
+    def __init__(
+            self,
+            sectors: Sequence[str],
+            factor_sectors: Sequence[str],
+            correlation: np.ndarray,
+            loading: float
+    ):
+        super().__init__(len(sectors))
+        if(not 0.0 <= loading <= 1.0):
+            raise ValueError(f"Sector loading must be between 0 and 1, got {loading}")
+
+        # 設定中沒有的產業使用獨立的因子
+        factor_sectors = list(factor_sectors)
+        extra = [sector for sector in dict.fromkeys(sectors) if sector not in factor_sectors]
+        matrix = np.eye(len(factor_sectors) + len(extra))
+        matrix[:len(factor_sectors), :len(factor_sectors)] = correlation
+        if(not np.allclose(matrix, matrix.T) or not np.allclose(np.diag(matrix), 1.0)):
+            raise ValueError("Sector correlation matrix must be symmetric with a unit diagonal")
+        try:
+            cholesky = np.linalg.cholesky(matrix)
+        except np.linalg.LinAlgError:
+            raise ValueError("Sector correlation matrix must be positive definite") from None
+
+        factor_sectors += extra
+        exposure = np.zeros((len(sectors), len(factor_sectors)))   # 股票所屬產業
+        exposure[np.arange(len(sectors)), [factor_sectors.index(s) for s in sectors]] = 1.0
+        self.loadings = np.hstack((
+            loading * exposure @ cholesky,
+            np.sqrt(1.0 - loading**2) * np.eye(len(sectors))
+        ))
+
+    @classmethod
+    def from_config(cls, sectors: Sequence[str], config: SectorFactors) -> "SectorFactorNoise":
+        """由設定檔的`SECTOR_FACTORS`建立。
+        """
+
+        return cls(
+            sectors,
+            config["sectors"],
+            np.asarray(config["correlation"], dtype=np.float64),
+            config["loading"]
+        )
+
+    def draw(self, generator: np.random.Generator, rows: int) -> np.ndarray:
+        return generator.standard_normal((rows, self.loadings.shape[1])) @ self.loadings.T
+
+
+class PriceNoise:
+    """一個回合內股價的隨機變動項。
+
+    第n次變動的隨機變動量為`NoiseModel`的衝擊乘上各股的`scale`(整數tick)，
+    開盤後第n次變動後的累計隨機變動量由`cumulative(n)`取得。
+
+    衝擊由(遊戲種子, 回合)決定的亂數流依序產生，每次固定產生`BLOCK_SIZE`次變動，
+    結果只由種子及變動次數決定，與查詢的順序及次數無關；
+    重新啟動或離線模擬皆可重現相同的股價路徑。
+    """
+
+    __slots__ = (
+        "generator",
+        "model",
+        "scale",
+        "totals"
+    )
+    # 每次產生的變動次數
+    BLOCK_SIZE: ClassVar[int] = 64
+
+    def __init__(
+            self,
+            seed: int,
+            round_: int,
+            scale: np.ndarray,
+            model: NoiseModel | None = None
+    ):
+        self.generator = noise_generator(seed, round_)
+        self.model = GaussianNoise(len(scale)) if model is None else model
+        self.scale = np.asarray(scale, dtype=np.float64)    # 每次變動的標準差(tick)
+        # 第n列為開盤後第n次變動後的累計隨機變動量(tick)
+        self.totals = np.zeros((1, len(self.scale)), dtype=np.int64)
+
+    def extend(self, ticks: int):
+        """產生亂數直到涵蓋第`ticks`次變動。
+        """
+
+        while(len(self.totals) <= ticks):
+            deltas = np.rint(
+                self.model.draw(self.generator, PriceNoise.BLOCK_SIZE) * self.scale
+            ).astype(np.int64)
+            self.totals = np.concatenate(
+                (self.totals, self.totals[-1] + np.cumsum(deltas, axis=0))
+            )
+
+    def cumulative(self, ticks: int | np.ndarray) -> np.ndarray:
+        """開盤後第`ticks`次變動後的累計隨機變動量(整數tick)。
+
+        `ticks`為陣列時回傳(變動次數 x 股票數)。
+        """
+
+        self.extend(int(np.max(ticks, initial=0)))
+        return self.totals[ticks]
@@ -0,0 +1,125 @@
+"""股價模型。
+"""
+from typing import ClassVar, Dict, TypedDict
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+
+class ModelParams(TypedDict):
+    """股價模型一次變動所需的參數(皆為該模型負責的股票的陣列，價格單位為tick)。
+
+    close: `np.ndarray`
+        本回合開盤價(上季收盤價)。
+    drift: `np.ndarray`
+        每次變動的趨勢變動量(EPS QoQ * Adjust Ratio)。
+    trend: `np.ndarray`
+        變動後的趨勢價格(開盤價 + n * 趨勢變動量)。
+    sigma: `np.ndarray`
+        每次變動的隨機變動標準差。
+    noise: `np.ndarray`
+        本次變動的隨機變動量(見 :class:`PriceNoise`)。
+    """
+
+    close: np.ndarray
+    drift: np.ndarray
+    trend: np.ndarray
+    sigma: np.ndarray
+    noise: np.ndarray
+
+
+class PricingModel(ABC):
+    """股價模型，以`step()`一次變動所有採用此模型的股票。
+
+    子類別以`register()`註冊名稱後，即可在`raw_stock_data`中以名稱指定
+    (`initial_data`的`model`欄位或`sector_models`)。
+    """
+
+    __slots__ = ()
+    # 已註冊的模型(名稱: 模型)
+    REGISTRY: ClassVar[Dict[str, "PricingModel"]] = {}
+
+    @staticmethod
+    def register(name: str):
+        """註冊模型類別的裝飾器。
+        """
+
+        def decorator(cls: type["PricingModel"]) -> type["PricingModel"]:
+            PricingModel.REGISTRY[name] = cls()
+            return cls
+        return decorator
+
+    @staticmethod
+    def get(name: str) -> "PricingModel":
+        """依名稱取得模型，名稱不存在時raise `ValueError`。
+        """
+
+        try:
+            return PricingModel.REGISTRY[name]
+        except KeyError:
+            raise ValueError(
+                f"Unknown pricing model {name!r}, "
+                f"expected one of {', '.join(PricingModel.REGISTRY)}"
+            ) from None
+
+    @abstractmethod
+    def step(self, prices: np.ndarray, params: ModelParams, dt: float) -> np.ndarray:
+        """回傳`prices`(tick)經過`dt`次變動後的股價(tick，浮點數)。
+        """
+
+    def closed_form(self, trends: np.ndarray, totals: np.ndarray) -> np.ndarray | None:
+        """由趨勢價格及累計隨機變動量直接計算整段股價路徑(變動次數 x 股票數，tick)。
+
+        股價與過去路徑無關的模型覆寫此方法以一次算完所有變動，
+        預設回傳`None`，由`step()`逐次計算。
+        """
+
+        return None
+
+
+@PricingModel.register("linear")
+class LinearDrift(PricingModel):
+    """線性趨勢(原本的股價規則):
+
+        P' = P + delta P * dt + 隨機變動量
+    """
+
+    __slots__ = ()
+
+    def step(self, prices: np.ndarray, params: ModelParams, dt: float) -> np.ndarray:
+        return prices + params["drift"] * dt + params["noise"]
+
+    def closed_form(self, trends: np.ndarray, totals: np.ndarray) -> np.ndarray:
+        return trends + totals
+
+
+@PricingModel.register("gbm")
+class GeometricBrownianMotion(PricingModel):
+    """幾何布朗運動，趨勢及隨機變動皆為相對開盤價的比例，股價恆為正:
+
+        P' = P * exp((mu - sigma^2 / 2) * dt + 隨機變動量 / 開盤價)
+        mu = delta P / 開盤價
+    """
+
+    __slots__ = ()
+
+    def step(self, prices: np.ndarray, params: ModelParams, dt: float) -> np.ndarray:
+        close = np.maximum(params["close"], 1)  # 開盤價須為正
+        mu = params["drift"] / close
+        sigma = params["sigma"] / close
+        return prices * np.exp((mu - sigma**2 / 2) * dt + params["noise"] / close)
+
+
+@PricingModel.register("mean_reversion")
+class MeanReversion(PricingModel):
+    """均值回歸(Ornstein-Uhlenbeck)，股價以`RATE`的速度回到線性趨勢價格:
+
+        P' = P + RATE * dt * (趨勢價格 - P) + 隨機變動量
+    """
+
+    __slots__ = ()
+    # 每次變動回歸的比例
+    RATE: ClassVar[float] = 0.1
+
+    def step(self, prices: np.ndarray, params: ModelParams, dt: float) -> np.ndarray:
+        return prices + MeanReversion.RATE * dt * (params["trend"] - prices) + params["noise"]
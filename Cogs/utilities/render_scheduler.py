@@ -0,0 +1,159 @@
+"""合併Discord訊息更新的排程器。
+"""
+from typing import Awaitable, Callable, ClassVar, Dict, Hashable, List
+import asyncio
+import traceback
+
+import nextcord as ntd
+
+from .fan_out import FanOut
+
+
+class RenderScheduler:
+    """呼叫端只標記需要更新的訊息(`mark_dirty()`)，由背景工作統一更新。
+
+    - 同一訊息在`interval`秒內的多次標記合併為一次更新。
+    - 每輪最多更新`max_renders`則訊息，依`priorities`(數字小者優先)排序，
+      同一輪的訊息經由 :class:`FanOut` 依路由(`route(key)`)並行更新；
+      未輪到的訊息保留到下一輪(背壓)；等待超過`MAX_WAIT_ROUNDS`輪的訊息優先，
+      避免低優先度的訊息一直無法更新。
+    - 更新被Discord限速(HTTP 429或等待限速而變慢)時拉長每輪間隔，
+      之後每順利完成一輪減半。
+
+    訊息鍵以`"<種類>"`或`"<種類>:<名稱>"`表示(如`"market"`、`"asset:team_1"`)，
+    優先度由種類決定。
+    """
+
+    __slots__ = (
+        "render",
+        "interval",
+        "max_renders",
+        "priorities",
+        "fan_out",
+        "route",
+        "dirty",
+        "wakeup",
+        "task",
+        "backoff"
+    )
+    # 單次更新超過此秒數視為接近限速
+    SLOW_RENDER: ClassVar[float] = 1.0
+    # 最長退避時間(秒)
+    MAX_BACKOFF: ClassVar[float] = 30.0
+    # 等待超過此輪數的訊息優先更新
+    MAX_WAIT_ROUNDS: ClassVar[int] = 5
+
+    def __init__(
+            self,
+            render: Callable[[str], Awaitable[None]],
+            *,
+            interval: float,
+            max_renders: int,
+            priorities: Dict[str, int],
+            fan_out: FanOut,
+            route: Callable[[str], Hashable]
+    ):
+        self.render = render    # 實際更新訊息的協程
+        self.interval = interval
+        self.max_renders = max_renders
+        self.priorities = priorities
+        self.fan_out = fan_out
+        self.route = route      # 訊息鍵 -> 限速路由(頻道)
+        self.dirty: Dict[str, float] = {}  # 訊息鍵: 標記時間
+        self.wakeup = asyncio.Event()
+        self.task: asyncio.Task | None = None
+        self.backoff: float = 0.0   # 目前額外等待的秒數
+
+    def priority(self, key: str) -> int:
+        """訊息鍵的優先度，未設定的種類排在最後。
+        """
+
+        return self.priorities.get(key.split(":", 1)[0], len(self.priorities))
+
+    def mark_dirty(self, *keys: str):
+        """標記需要更新的訊息。
+        """
+
+        now = asyncio.get_running_loop().time()
+        for key in keys:
+            self.dirty.setdefault(key, now)
+        self.wakeup.set()
+
+    def start(self):
+        """啟動背景工作。
+        """
+
+        if(self.task is None or self.task.done()):
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    def stop(self):
+        """停止背景工作(尚未更新的標記保留)。
+        """
+
+        if(self.task is not None):
+            self.task.cancel()
+            self.task = None
+
+    def next_batch(self) -> List[str]:
+        """取出本輪要更新的訊息並清除其標記。
+        """
+
+        starved = asyncio.get_running_loop().time() - self.interval * RenderScheduler.MAX_WAIT_ROUNDS
+        batch = sorted(
+            self.dirty,
+            key=lambda x: (
+                -1 if self.dirty[x] < starved else self.priority(x),
+                self.dirty[x]
+            )
+        )[:self.max_renders]
+        for key in batch:
+            del self.dirty[key]
+        return batch
+
+    async def render_one(self, key: str) -> bool:
+        """|coro|
+
+        更新單一訊息，回傳是否被限速(或接近限速)。
+        """
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            await self.render(key)
+        except ntd.HTTPException as e:
+            if(e.status != 429):
+                traceback.print_exception(e)
+                return False
+            self.dirty.setdefault(key, start)   # 被限速，下一輪重試
+            return True
+        except Exception as e:
+            traceback.print_exception(e)
+            return False
+        return loop.time() - start > RenderScheduler.SLOW_RENDER
+
+    async def run(self):
+        """|coro|
+
+        背景工作: 等待標記，每輪更新一批訊息後等待`interval`(+退避)秒。
+        """
+
+        while(True):
+            await self.wakeup.wait()
+            self.wakeup.clear()
+
+            results = await self.fan_out.gather(
+                (self.route(key), lambda key=key: self.render_one(key))
+                for key in self.next_batch()
+            )
+            if(any(result is True for result in results)):
+                self.backoff = min(
+                    max(self.backoff*2, self.interval), RenderScheduler.MAX_BACKOFF
+                )
+            else:
+                self.backoff /= 2
+                if(self.backoff < 0.1):
+                    self.backoff = 0.0
+
+            await asyncio.sleep(self.interval + self.backoff)
+            if(self.dirty):    # 本輪未更新完或等待期間有新標記
+                self.wakeup.set()
@@ -0,0 +1,386 @@
+"""SQLite儲存後端(WAL模式)。
+
+於`game_config`設定`"STORAGE_BACKEND": "sqlite"`啟用，
+小隊資產、市場資料、遊戲狀態以及收支紀錄改存於`Data\\game_data.db`。
+
+由現有JSON檔案轉移資料:
+    python -m Cogs.utilities.sqlite_backend
+"""
+from typing import Any, Callable, ClassVar, Dict, List, Tuple
+import functools
+import json
+import sqlite3
+import sys
+import threading
+
+from .datatypes import (
+    AlterationLog,
+    AssetDict,
+    AssetsData,
+    GameState,
+    LogData,
+    MarketData
+)
+from .json_backend import JsonBackend, log_key
+from .stock_lots import lot_runs
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS team_assets (
+    team TEXT PRIMARY KEY,
+    deposit INTEGER NOT NULL,
+    revenue INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stock_lots (
+    team TEXT NOT NULL,
+    stock TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    unit_cost INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    PRIMARY KEY (team, stock, position)
+);
+CREATE TABLE IF NOT EXISTS market_data (
+    stock_index INTEGER PRIMARY KEY,
+    price REAL NOT NULL,
+    close REAL NOT NULL,
+    eps_qoq REAL NOT NULL,
+    adjust_ratio REAL NOT NULL,
+    random_ratio REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS game_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS alteration_log (
+    serial INTEGER PRIMARY KEY,
+    team TEXT NOT NULL,
+    log_type TEXT NOT NULL,
+    user TEXT NOT NULL,
+    time TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS alteration_log_team
+    ON alteration_log (team, serial);
+"""
+"""資料表。
+
+- `stock_lots`: 股票庫存以(成本, 張數)連續區段儲存，`position`為買進順序。
+- `alteration_log`: `team`為紀錄所屬小隊(轉帳為轉出小隊)，`record`為完整紀錄JSON。
+"""
+
+
+def locked(method: Callable) -> Callable:
+    """同一時間只允許一個執行緒使用資料庫連線(I/O執行緒寫入、事件迴圈查詢)。
+    """
+
+    @functools.wraps(method)
+    def wrapper(self: "SqliteBackend", *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class SqliteBackend:
+    """以SQLite資料庫(WAL模式)儲存遊戲資料。
+
+    `game_config`與原始資料仍由 :class:`JsonBackend` 負責。
+    """
+
+    __slots__ = ("connection", "lock")
+    # 由此後端負責的資料
+    FILES: ClassVar[Tuple[str, ...]] = (
+        "team_assets",
+        "market_data",
+        "game_state",
+        "alteration_log"
+    )
+    # 交易直接更新資料列，不需再寫回
+    JOURNALS_COMMITS: ClassVar[bool] = False
+
+    def __init__(self, db_path: str):
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(
+            db_path,
+            check_same_thread=False
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def handles(self, file_name: str) -> bool:
+        """是否由此後端負責該資料。
+        """
+
+        return file_name in SqliteBackend.FILES
+
+    def exists(self, file_name: str) -> bool:
+        """是否為此後端負責的資料(資料表皆於建立連線時建立)。
+        """
+
+        return file_name in SqliteBackend.FILES
+
+    @locked
+    def load(self, file_name: str) -> Any:
+        """讀取整份資料，格式與JSON檔案相同。
+        """
+
+        if(file_name == "team_assets"):
+            return self.load_team_assets()
+        elif(file_name == "market_data"):
+            rows = self.connection.execute(
+                "SELECT price, close, eps_qoq, adjust_ratio, random_ratio "
+                "FROM market_data ORDER BY stock_index"
+            )
+            return [
+                {
+                    "price": price,
+                    "close": close,
+                    "eps_qoq": eps_qoq,
+                    "adjust_ratio": adjust_ratio,
+                    "random_ratio": random_ratio
+                } for price, close, eps_qoq, adjust_ratio, random_ratio in rows
+            ]
+        elif(file_name == "game_state"):
+            return {
+                key: json.loads(value) for key, value in self.connection.execute(
+                    "SELECT key, value FROM game_state"
+                )
+            }
+        elif(file_name == "alteration_log"):
+            log: AlterationLog = {"serial": 0}
+            for (record,) in self.connection.execute(
+                "SELECT record FROM alteration_log ORDER BY serial"
+            ):
+                record: LogData = json.loads(record)
+                log.setdefault(log_key(record), []).append(record)
+                log["serial"] = record["serial"] + 1
+            return log
+
+    def load_team_assets(self) -> AssetsData:
+        """讀取所有小隊資產及庫存區段。
+        """
+
+        team_assets: AssetsData = {
+            team: {
+                "deposit": deposit,
+                "stock_inv": {},
+                "revenue": revenue
+            } for team, deposit, revenue in self.connection.execute(
+                "SELECT team, deposit, revenue FROM team_assets "
+                "ORDER BY CAST(team AS INTEGER)"
+            )
+        }
+        for team, stock, unit_cost, quantity in self.connection.execute(
+            "SELECT team, stock, unit_cost, quantity FROM stock_lots "
+            "ORDER BY team, stock, position"
+        ):
+            team_assets[team]["stock_inv"].setdefault(stock, []).append(
+                [unit_cost, quantity]
+            )
+        return team_assets
+
+    @staticmethod
+    def lot_rows(team: str, asset: AssetDict) -> List[Tuple[str, str, int, int, int]]:
+        """小隊庫存(成本, 張數)區段的資料列(可讀取舊格式)。
+        """
+
+        return [
+            (team, stock, position, unit_cost, quantity)
+            for stock, costs in asset["stock_inv"].items()
+            for position, (unit_cost, quantity) in enumerate(lot_runs(costs))
+        ]
+
+    @locked
+    def save_team_assets(
+            self,
+            changed: Dict[str, AssetDict],
+            team_assets: Dict[str, AssetDict]
+    ):
+        """只更新有變動的小隊(每隊一列UPDATE及其庫存列)。
+        """
+
+        with self.connection:
+            self.write_team_rows(changed)
+
+    def write_team_rows(self, changed: Dict[str, AssetDict]):
+        """寫入小隊資產列及其庫存列(於交易內呼叫)。
+        """
+
+        for team, asset in changed.items():
+            self.connection.execute(
+                "INSERT INTO team_assets (team, deposit, revenue) VALUES (?, ?, ?) "
+                "ON CONFLICT (team) DO UPDATE SET "
+                "deposit = excluded.deposit, revenue = excluded.revenue",
+                (team, asset["deposit"], asset["revenue"])
+            )
+            self.connection.execute(
+                "DELETE FROM stock_lots WHERE team = ?", (team,)
+            )
+            self.connection.executemany(
+                "INSERT INTO stock_lots VALUES (?, ?, ?, ?, ?)",
+                SqliteBackend.lot_rows(team, asset)
+            )
+
+    @locked
+    def save(self, file_name: str, data: Any):
+        """以整份資料取代資料表內容。
+        """
+
+        if(file_name == "team_assets"):
+            with self.connection:
+                self.connection.execute("DELETE FROM team_assets")
+                self.connection.execute("DELETE FROM stock_lots")
+                self.write_team_rows(data)
+        elif(file_name == "market_data"):
+            market_data: MarketData = data
+            with self.connection:
+                self.connection.execute("DELETE FROM market_data")
+                self.connection.executemany(
+                    "INSERT INTO market_data VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            index_, stock["price"], stock["close"], stock["eps_qoq"],
+                            stock["adjust_ratio"], stock["random_ratio"]
+                        ) for index_, stock in enumerate(market_data)
+                    ]
+                )
+        elif(file_name == "game_state"):
+            game_state: GameState = data
+            with self.connection:
+                self.connection.execute("DELETE FROM game_state")
+                self.connection.executemany(
+                    "INSERT INTO game_state VALUES (?, ?)",
+                    [
+                        (key, json.dumps(value, ensure_ascii=False))
+                        for key, value in game_state.items()
+                    ]
+                )
+        elif(file_name == "alteration_log"):
+            log: AlterationLog = data
+            records = sorted(
+                (record for key, records in log.items() if key != "serial"
+                 for record in records),
+                key=lambda x: x["serial"]
+            )
+            with self.connection:
+                self.connection.execute("DELETE FROM alteration_log")
+                self.connection.executemany(
+                    "INSERT INTO alteration_log VALUES (?, ?, ?, ?, ?, ?)",
+                    [SqliteBackend.log_row(record) for record in records]
+                )
+
+    @staticmethod
+    def log_row(record: LogData) -> Tuple[int, str, str, str, str, str]:
+        """紀錄對應的資料列。
+        """
+
+        return (
+            record["serial"], log_key(record), record["log_type"],
+            record["user"], record["time"],
+            json.dumps(record, ensure_ascii=False)
+        )
+
+    @locked
+    def append_log(self, *records: LogData):
+        """以單一交易新增一或多筆紀錄。
+        """
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO alteration_log VALUES (?, ?, ?, ?, ?, ?)",
+                (SqliteBackend.log_row(record) for record in records)
+            )
+
+    @locked
+    def commit(self, changed: Dict[str, AssetDict], records: List[LogData]):
+        """以單一交易寫入變動的小隊及其收支紀錄，兩者同時生效或同時不生效。
+        """
+
+        with self.connection:
+            self.write_team_rows(changed)
+            self.connection.executemany(
+                "INSERT INTO alteration_log VALUES (?, ?, ?, ?, ?, ?)",
+                (SqliteBackend.log_row(record) for record in records)
+            )
+
+    @locked
+    def compact_log(self, log: AlterationLog):
+        """紀錄已逐筆寫入資料表，只需將WAL寫回資料庫。
+        """
+
+        self.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    @locked
+    def clear_log(self):
+        """清除所有收支紀錄。
+        """
+
+        with self.connection:
+            self.connection.execute("DELETE FROM alteration_log")
+
+    @locked
+    def query_log(
+            self,
+            log: AlterationLog,
+            *,
+            team: str | None = None,
+            serial_from: int | None = None,
+            serial_to: int | None = None
+    ) -> List[LogData]:
+        """以索引查詢指定小隊或serial區間[serial_from, serial_to)的紀錄，依serial排序。
+        """
+
+        conditions: List[str] = []
+        params: List[str | int] = []
+        if(team is not None):
+            conditions.append("team = ?")
+            params.append(team)
+        if(serial_from is not None):
+            conditions.append("serial >= ?")
+            params.append(serial_from)
+        if(serial_to is not None):
+            conditions.append("serial < ?")
+            params.append(serial_to)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+
+        return [
+            json.loads(record) for (record,) in self.connection.execute(
+                f"SELECT record FROM alteration_log {where}ORDER BY serial",
+                params
+            )
+        ]
+
+    @locked
+    def count_log(self, log: AlterationLog, team: str) -> int:
+        """以索引計算指定小隊的紀錄數量。
+        """
+
+        (count,) = self.connection.execute(
+            "SELECT COUNT(*) FROM alteration_log WHERE team = ?", (team,)
+        ).fetchone()
+        return count
+
+
+def migrate_from_json(data_dir: str = ".\\Data", db_file: str = "game_data") -> Dict[str, int]:
+    """將現有JSON檔案的資料轉移至SQLite資料庫，回傳各資料轉移的筆數。
+    """
+
+    json_backend = JsonBackend(data_dir)
+    sqlite_backend = SqliteBackend(f"{data_dir}\\{db_file}.db")
+    counts: Dict[str, int] = {}
+    for file_name in SqliteBackend.FILES:
+        data = json_backend.load(file_name)
+        sqlite_backend.save(file_name, data)
+        if(file_name == "alteration_log"):
+            counts[file_name] = data["serial"]
+        else:
+            counts[file_name] = len(data)
+    sqlite_backend.compact_log(None)
+    return counts
+
+
+if(__name__ == "__main__"):
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else ".\\Data"
+    for file_name, count in migrate_from_json(data_dir).items():
+        print(f"{file_name}: {count}")
+    print("Migration done. Set \"STORAGE_BACKEND\" to \"sqlite\" in game_config.")
@@ -0,0 +1,107 @@
+"""股票庫存(先進先出的成本區段)。
+"""
+from typing import Deque, Iterable, List, Sequence
+from collections import deque
+
+
+def lot_runs(costs: List[int] | List[List[int]]) -> List[List[int]]:
+    """將庫存資料整理為[每張成本, 張數]區段。
+
+    可讀取舊格式(每張一個成本的串列，如`[1000, 1000, 1200]`)，
+    連續相同的成本合併為一個區段。
+    """
+
+    runs: List[List[int]] = []
+    for item in costs:
+        if(isinstance(item, int)):  # 舊格式: 每張一個成本
+            unit_cost, quantity = item, 1
+        else:
+            unit_cost, quantity = item
+        if(runs and runs[-1][0] == unit_cost):
+            runs[-1][1] += quantity
+        else:
+            runs.append([unit_cost, quantity])
+    return runs
+
+
+class StockLots:
+    """單一股票的庫存，以先進先出佇列儲存[每張成本, 張數]區段。
+
+    張數及投資總成本隨買賣更新，查詢不需走訪所有區段；
+    賣出時由最早買進的區段扣除，每個區段最多被移除一次。
+    """
+
+    __slots__ = (
+        "lots",
+        "quantity",
+        "total_cost"
+    )
+
+    def __init__(self, lots: Iterable[Sequence[int]] = ()):
+        self.lots: Deque[List[int]] = deque()
+        self.quantity: int = 0    # 持有張數
+        self.total_cost: int = 0  # 投資總成本
+        for unit_cost, quantity in lots:
+            self.buy(unit_cost, quantity)
+
+    @classmethod
+    def from_json(cls, costs: List[int] | List[List[int]]) -> "StockLots":
+        """由`team_assets`的庫存資料建立(可讀取舊格式)。
+        """
+
+        return cls(lot_runs(costs))
+
+    def to_json(self) -> List[List[int]]:
+        """轉為`team_assets`的庫存資料格式。
+        """
+
+        return [list(lot) for lot in self.lots]
+
+    def __len__(self) -> int:
+        return self.quantity
+
+    def __repr__(self) -> str:
+        return f"StockLots({self.to_json()})"
+
+    @property
+    def average_cost(self) -> float:
+        """每張平均成本。
+        """
+
+        return self.total_cost / self.quantity if self.quantity else 0.0
+
+    def buy(self, unit_cost: int, quantity: int):
+        """買進`quantity`張，每張成本`unit_cost`。
+        """
+
+        if(quantity <= 0):
+            return
+        if(self.lots and self.lots[-1][0] == unit_cost):
+            self.lots[-1][1] += quantity
+        else:
+            self.lots.append([unit_cost, quantity])
+        self.quantity += quantity
+        self.total_cost += unit_cost * quantity
+
+    def sell(self, quantity: int) -> int:
+        """由最早買進的開始賣出`quantity`張，回傳賣出部分的成本。
+
+        如果張數不足則 raise `ValueError`。
+        """
+
+        if(quantity > self.quantity):
+            raise ValueError(f"Not enough lots: {quantity} > {self.quantity}.")
+
+        cost = 0
+        remaining = quantity
+        while(remaining > 0):
+            lot = self.lots[0]
+            sold = min(lot[1], remaining)
+            cost += lot[0] * sold
+            remaining -= sold
+            lot[1] -= sold
+            if(lot[1] == 0):
+                self.lots.popleft()
+        self.quantity -= quantity
+        self.total_cost -= cost
+        return cost
@@ -0,0 +1,89 @@
+"""測試共用設定。
+
+所有測試皆在暫存資料夾中使用`Data`資料夾的複本，不影響正式資料。
+程式以`.\\Data\\檔名.json`的路徑讀寫資料，因此複本以相同的路徑建立於目前目錄。
+"""
+from typing import Any, Iterator
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if(ROOT not in sys.path):
+    sys.path.insert(0, ROOT)
+
+# 測試所需的檔案
+DATA_FILES = (
+    "game_config",
+    "team_assets",
+    "market_data",
+    "game_state",
+    "alteration_log",
+    "raw_stock_data",
+    "raw_news"
+)
+# 程式預設的資料夾
+DATA_DIR = ".\\Data"
+# 測試開始前的目錄及整個測試階段使用的資料夾
+original_cwd = pytest.StashKey[str]()
+session_dir = pytest.StashKey[str]()
+
+
+def copy_data(**config: Any):
+    """將`Data`資料夾複製到目前目錄，並以`config`覆寫`game_config`的設定。
+    """
+
+    os.makedirs(DATA_DIR, exist_ok=True)
+    for file_name in DATA_FILES:
+        shutil.copyfile(
+            os.path.join(ROOT, "Data", f"{file_name}.json"),
+            f"{DATA_DIR}\\{file_name}.json"
+        )
+    if(config):
+        with open(f"{DATA_DIR}\\game_config.json", mode="r", encoding="utf-8") as json_file:
+            game_config = json.load(json_file)
+        game_config.update(config)
+        with open(f"{DATA_DIR}\\game_config.json", mode="w", encoding="utf-8") as json_file:
+            json.dump(game_config, json_file, ensure_ascii=False, indent=4)
+
+
+def pytest_configure(config: pytest.Config):
+    # `discord_ui`於匯入時即讀取資料，須在收集測試前準備好資料夾
+    config.stash[original_cwd] = os.getcwd()
+    config.stash[session_dir] = tempfile.mkdtemp(prefix="ifm_test_")
+    os.chdir(config.stash[session_dir])
+    copy_data()
+
+
+def pytest_unconfigure(config: pytest.Config):
+    if(session_dir in config.stash):
+        os.chdir(config.stash[original_cwd])
+        shutil.rmtree(config.stash[session_dir], ignore_errors=True)
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch) -> Iterator[str]:
+    """切換到空的暫存資料夾並複製`Data`資料夾，回傳資料夾路徑(與程式相同的格式)。
+    """
+
+    monkeypatch.chdir(tmp_path)
+    copy_data()
+    yield DATA_DIR
+
+
+@pytest.fixture
+def store(data_dir, monkeypatch):
+    """以暫存資料夾建立程序共用的 :class:`GameStore`。
+    """
+
+    from Cogs.utilities import access_file
+    from Cogs.utilities.game_store import GameStore
+
+    game_store = GameStore(data_dir)
+    monkeypatch.setattr(access_file, "STORE", game_store)
+    yield game_store
+    game_store.io_executor.shutdown()
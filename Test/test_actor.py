@@ -0,0 +1,71 @@
+from typing import List
+import asyncio
+
+import pytest
+
+from Cogs.utilities.actor import Actor
+
+
+def recording_actor(events: List[str]) -> Actor:
+    return Actor(
+        begin_batch=lambda: events.append("begin"),
+        end_batch=lambda: events.append("end")
+    )
+
+
+def test_waiting_commands_run_as_one_batch_in_order():
+    events: List[str] = []
+
+    def command(name: str) -> str:
+        events.append(name)
+        return name.upper()
+
+    async def play():
+        actor = recording_actor(events)
+        results = await asyncio.gather(*(actor.submit(command, name) for name in "abc"))
+        # 前一批執行完後才送出的命令自成一批
+        results.append(await actor.submit(command, name="d"))
+        actor.stop()
+        return results
+
+    assert asyncio.run(play()) == ["A", "B", "C", "D"]
+    assert events == ["begin", "a", "b", "c", "end", "begin", "d", "end"]
+
+
+def test_failing_command_only_fails_its_caller():
+    events: List[str] = []
+
+    def fail():
+        raise ValueError("餘額不足")
+
+    async def play():
+        actor = recording_actor(events)
+        return await asyncio.gather(
+            actor.submit(events.append, "a"),
+            actor.submit(fail),
+            actor.submit(events.append, "b"),
+            return_exceptions=True
+        )
+
+    first, error, last = asyncio.run(play())
+    assert first is None and last is None
+    assert isinstance(error, ValueError)
+    assert events == ["begin", "a", "b", "end"]
+
+
+def test_cancelled_command_is_skipped():
+    events: List[str] = []
+
+    async def play():
+        actor = recording_actor(events)
+        cancelled = asyncio.create_task(actor.submit(events.append, "cancelled"))
+        kept = asyncio.create_task(actor.submit(events.append, "kept"))
+        await asyncio.sleep(0)  # 兩個命令都已進入佇列
+        cancelled.cancel()
+        await kept
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        actor.stop()
+
+    asyncio.run(play())
+    assert events == ["begin", "kept", "end"]
@@ -0,0 +1,145 @@
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from Cogs.assets_manager import AssetError, AssetsManager
+from Cogs.utilities.json_backend import JsonBackend
+from Cogs.utilities.stock_lots import StockLots
+from simulate import HeadlessBot
+
+
+STOCK = 5   # 股價5元，1張5000元
+
+
+@pytest.fixture
+def assets(store) -> AssetsManager:
+    bot = HeadlessBot()
+    assets_manager = AssetsManager(bot)
+    bot.add_cog(assets_manager)
+    assets_manager.reset_asset_data()
+    return assets_manager
+
+
+def buy(assets: AssetsManager, team: int, quantity: int) -> int:
+    return assets.stock_trade(
+        team=team, trade_type="買進", stock_index=STOCK, quantity=quantity, user="tester"
+    )
+
+
+def test_trade_is_journaled_before_the_snapshot(assets, store):
+    backend = JsonBackend(store.data_dir)
+
+    async def trade():
+        store.flush_window = 60.0
+        buy(assets, 1, 1)
+        await asyncio.wrap_future(store.submit_io(lambda: None))    # 等待I/O執行緒
+        with open(backend.file_path("team_assets"), mode="r", encoding="utf-8") as json_file:
+            snapshot = json.load(json_file)
+        replayed = backend.load("team_assets")
+        await store.flush_async()
+        return snapshot, replayed
+
+    snapshot, replayed = asyncio.run(trade())
+    # 小隊資產快照留給延遲寫回，交易已與收支紀錄一起附加至日誌
+    assert snapshot["1"]["deposit"] == 10000
+    assert replayed["1"]["deposit"] == 5000
+    assert replayed["1"]["stock_inv"] == {f"{STOCK}": [[5000, 1]]}
+    assert not store.dirty_teams
+    assert backend.load("team_assets") == replayed
+    assert backend.log_journal.team_changes() == {}
+    log = backend.load("alteration_log")
+    assert [record["trade_type"] for record in log["1"]] == ["買進"]
+
+
+def test_exception_rolls_back_every_change(assets, store):
+    buy(assets, 1, 1)
+    before = assets.team_assets[0].to_dict()
+    holdings = assets.holdings.copy()
+    lot_values = assets.lot_values.copy()
+    serial = store.read("alteration_log")["serial"]
+
+    store.read("market_data")[STOCK]["price"] = 6    # 股價變動後賣出
+    with pytest.raises(RuntimeError):
+        with assets.transaction():
+            assets.stock_trade(
+                team=1, trade_type="賣出", stock_index=STOCK, quantity=1, user="tester"
+            )
+            assert assets.team_assets[0].deposit == 11000
+            raise RuntimeError
+
+    assert assets.team_assets[0].to_dict() == before
+    np.testing.assert_array_equal(assets.holdings, holdings)
+    np.testing.assert_array_equal(assets.lot_values, lot_values)
+    assert assets.net_worth(1) == 10000
+    assert store.read("alteration_log")["serial"] == serial
+    assert JsonBackend(store.data_dir).load("team_assets")["1"] == before
+
+
+def test_rejected_trade_changes_nothing(assets, store):
+    with pytest.raises(AssetError):
+        buy(assets, 1, 3)
+    with pytest.raises(AssetError):
+        assets.stock_trade(
+            team=1, trade_type="賣出", stock_index=STOCK, quantity=1, user="tester"
+        )
+
+    assert assets.team_assets[0].deposit == 10000
+    assert not assets.team_assets[0].stock_inv
+    assert store.read("alteration_log")["serial"] == 0
+
+
+def test_holdings_matrix_values_every_team_at_once(assets):
+    assets.team_assets[0].stock_inv = {"1": StockLots([[1000, 2], [1300, 1]])}
+    assets.team_assets[2].stock_inv = {"1": StockLots([[1100, 1]]), "4": StockLots([[500, 4]])}
+    lot_values = np.arange(10, dtype=np.int64) * 1000
+    assets.build_holdings(lot_values)
+
+    assert assets.holdings[0, 1] == 3 and assets.holdings[2].tolist()[:5] == [0, 1, 0, 0, 4]
+    assert assets.cost_basis[0, 1] == 3300
+    assert assets.average_cents[0, 1] == 110     # 3300 / 3張 = 每股1.10元
+    assert assets.holding_teams() == [1, 3]
+    assert assets.stock_value.tolist()[:3] == [3000, 0, 1000 + 16000]
+    assert assets.unrealized_total.tolist()[:3] == [3000 - 3300, 0, 17000 - 3100]
+
+    # 股價變動後只需重新估值
+    assets.revaluate(lot_values * 2)
+    assert assets.market_value[2, 4] == 32000
+    assert assets.unrealized[0, 1] == 6000 - 3300
+    assert assets.net_worth(3) == assets.team_assets[2].deposit + 2000 + 32000
+
+
+def test_trades_update_only_the_traded_cell(assets, store):
+    market_data = store.read("market_data")
+    buy(assets, 1, 1)
+    market_data[STOCK]["price"] = 4
+    buy(assets, 1, 1)
+    market_data[STOCK]["price"] = 7
+
+    # 先賣出最早以5元買進的一張
+    gain = assets.stock_trade(
+        team=1, trade_type="賣出", stock_index=STOCK, quantity=1, user="tester"
+    )
+
+    asset = assets.team_assets[0]
+    assert gain == 7000 - 5000
+    assert asset.revenue == gain
+    assert asset.deposit == 10000 - 5000 - 4000 + 7000
+    assert asset.stock_inv[f"{STOCK}"].to_json() == [[4000, 1]]
+    assert assets.holdings[0, STOCK] == 1
+    assert assets.cost_basis[0, STOCK] == 4000
+    assert assets.holdings.sum() == 1
+    assert assets.net_worth(1) == asset.deposit + 7000
+
+
+def test_first_trade_sizes_an_empty_matrix(assets):
+    # 載入資產時尚未建立市場資料(如全新的SQLite資料庫)
+    assets.build_holdings(np.zeros(0, dtype=np.int64))
+    assert assets.holdings.shape[1] == 0
+
+    buy(assets, 2, 1)
+
+    assert assets.holdings.shape == (len(assets.team_assets), 10)
+    assert assets.holdings[1, STOCK] == 1
+    assert assets.net_worth(2) == 10000
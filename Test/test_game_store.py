@@ -0,0 +1,83 @@
+from collections import Counter
+import asyncio
+import json
+
+import pytest
+
+from Cogs.utilities.game_store import GameStore
+from Cogs.utilities.json_backend import JsonBackend
+
+
+def test_reads_are_served_from_memory(store, data_dir):
+    market_data = store.read("market_data")
+    assert store.loaded
+
+    # 載入後硬碟上的變動不會被讀到，讀取回傳記憶體中的同一個物件
+    with open(f"{data_dir}\\market_data.json", mode="w", encoding="utf-8") as json_file:
+        json.dump([], json_file)
+    assert store.read("market_data") is market_data
+
+    copied = store.read("market_data", deep_copy=True)
+    copied[0]["price"] = -1
+    assert market_data[0]["price"] != -1
+
+
+def test_write_marks_dirty_until_flushed(store, data_dir):
+    game_state = store.read("game_state")
+    game_state["round"] = 3
+    store.write("game_state", game_state)
+    assert "game_state" in store.dirty
+    assert JsonBackend(data_dir).load("game_state")["round"] == 0
+
+    store.flush()   # 事件迴圈外等待寫回完成
+    assert not store.dirty
+    assert JsonBackend(data_dir).load("game_state")["round"] == 3
+
+
+def test_write_to_unknown_file_raises(store):
+    with pytest.raises(FileNotFoundError):
+        store.write("game_stat", {})
+
+
+def count_loads(monkeypatch) -> Counter:
+    loads: Counter = Counter()
+    load = JsonBackend.load
+
+    def counted(self, file_name):
+        loads[file_name] += 1
+        return load(self, file_name)
+    monkeypatch.setattr(JsonBackend, "load", counted)
+    return loads
+
+
+def test_concurrent_async_reads_load_once(store, monkeypatch):
+    loads = count_loads(monkeypatch)
+
+    async def read_all():
+        return await asyncio.gather(
+            store.read_async("market_data"),
+            store.read_async("team_assets"),
+            store.read_async("raw_news"),
+            store.read_async("raw_news")
+        )
+    market_data, team_assets, raw_news, raw_news_again = asyncio.run(read_all())
+
+    assert all(count == 1 for count in loads.values())
+    assert set(loads) == {*GameStore.STORE_FILES, "raw_news"}
+    assert market_data is store.read("market_data")
+    assert raw_news is raw_news_again
+    assert not store.loading
+
+
+def test_sync_read_during_async_load_is_not_overwritten(store):
+    async def race():
+        task = asyncio.create_task(store.read_async("game_state"))
+        await asyncio.sleep(0)  # 非同步載入已交給I/O執行緒
+        game_state = store.read("game_state")
+        game_state["round"] = 4
+        store.write("game_state", game_state)
+        return game_state, await task
+
+    written, read = asyncio.run(race())
+    assert read is written
+    assert store.read("game_state")["round"] == 4
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+from Cogs.utilities.log_index import LogIndex, parse_log_time
+
+
+def log_record(serial: int, time: str, team: str | list = "1", user: str = "tester") -> dict:
+    return {
+        "log_type": "Transfer" if isinstance(team, list) else "DepositChange",
+        "time": time,
+        "user": user,
+        "serial": serial,
+        "team": team
+    }
+
+
+def filled_index() -> LogIndex:
+    log_index = LogIndex()
+    log_index.build({
+        "serial": 6,
+        "1": [
+            log_record(0, "02/28 11:59PM"),
+            log_record(2, "02/29 09:00AM", user="admin"),
+            log_record(4, "03/01 12:00AM"),
+        ],
+        "2": [
+            log_record(1, "02/29 08:00AM", ["2", "1"]),
+            log_record(3, "02/29 09:00AM", "2"),
+            log_record(5, "03/01 01:30PM", ["2", "3"], user="admin"),
+        ]
+    })
+    return log_index
+
+
+def test_leap_day_is_parsed():
+    assert parse_log_time("02/29 09:00AM") == datetime(2000, 2, 29, 9)
+    assert parse_log_time("02/29 21:15", "%m/%d %H:%M") == datetime(2000, 2, 29, 21, 15)
+
+
+def test_select_by_team_type_and_user():
+    log_index = filled_index()
+
+    assert len(log_index) == 6
+    assert log_index.select() == [0, 1, 2, 3, 4, 5]
+    # 轉帳紀錄同時屬於轉出及轉入小隊
+    assert log_index.select(team="1") == [0, 1, 2, 4]
+    assert log_index.select(team="3") == [5]
+    assert log_index.select(team="2", log_type="Transfer") == [1, 5]
+    assert log_index.select(user="admin", team="1") == [2]
+    assert log_index.select(team="4") == []
+    assert log_index.select(team="2", serial_from=2, serial_to=5) == [3]
+
+
+def test_select_by_time_includes_both_ends():
+    log_index = filled_index()
+
+    leap_day = parse_log_time("02/29 00:00", "%m/%d %H:%M")
+    assert log_index.select(time_from=leap_day) == [1, 2, 3, 4, 5]
+    assert log_index.select(
+        time_from=parse_log_time("02/29 09:00AM"), time_to=parse_log_time("03/01 12:00AM")
+    ) == [2, 3, 4]
+    assert log_index.select(team="2", time_to=parse_log_time("02/29 09:00AM")) == [1, 3]
+    assert log_index.select(time_from=parse_log_time("03/02 12:00AM")) == []
+    assert log_index.select(time_to=parse_log_time("02/28 11:00PM")) == []
+    assert log_index.get(log_index.select(time_from=leap_day, serial_to=2)) == [
+        log_index.records[1]
+    ]
+
+    log_index.clear()
+    assert log_index.select(time_from=leap_day) == []
+    assert not log_index.times
@@ -0,0 +1,116 @@
+import json
+
+from Cogs.utilities.json_backend import JsonBackend
+
+
+def log_record(serial: int, team: str = "1") -> dict:
+    return {
+        "log_type": "DepositChange",
+        "time": "01/01 09:00AM",
+        "user": "tester",
+        "serial": serial,
+        "team": team,
+        "original_deposit": 10000,
+        "changed_deposit": 10000 + serial
+    }
+
+
+def serials(log: dict) -> list:
+    return sorted(record["serial"] for key, records in log.items() if key != "serial"
+                  for record in records)
+
+
+def test_recovers_records_and_skips_torn_tail(data_dir):
+    backend = JsonBackend(data_dir)
+    backend.append_log(log_record(0), log_record(1, "2"))
+    backend.append_log(log_record(2))
+    # 寫到一半中斷的尾行
+    with open(backend.log_journal.file_path, mode="a", encoding="utf-8") as journal:
+        journal.write(json.dumps(log_record(3))[:20])
+
+    log = backend.load("alteration_log")
+
+    assert serials(log) == [0, 1, 2]
+    assert log["serial"] == 3
+    assert [record["serial"] for record in log["2"]] == [1]
+
+
+def test_load_compacts_journal_into_snapshot(data_dir):
+    backend = JsonBackend(data_dir)
+    backend.append_log(log_record(0), log_record(1))
+
+    log = backend.load("alteration_log")
+
+    assert backend.log_journal.is_empty()
+    with open(backend.file_path("alteration_log"), mode="r", encoding="utf-8") as json_file:
+        snapshot = json.load(json_file)
+    assert serials(snapshot) == [0, 1]
+    assert snapshot["serial"] == 2
+    assert JsonBackend(data_dir).load("alteration_log") == log
+
+
+def test_replay_skips_records_already_in_snapshot(data_dir):
+    backend = JsonBackend(data_dir)
+    # 快照已寫出但日誌尚未清空(壓縮中斷)
+    backend.save("alteration_log", {"serial": 2, "1": [log_record(0), log_record(1)]})
+    backend.append_log(log_record(0), log_record(1), log_record(2))
+
+    log = backend.load("alteration_log")
+
+    assert serials(log) == [0, 1, 2]
+    assert log["serial"] == 3
+
+
+def test_compaction_truncates_journal_and_keeps_appending(data_dir):
+    backend = JsonBackend(data_dir)
+    backend.append_log(log_record(0))
+    log = backend.load("alteration_log")
+    assert backend.log_journal.is_empty()
+
+    backend.append_log(log_record(1))
+    assert backend.log_journal.last_serial() == 1
+    log["1"].append(log_record(1))
+    log["serial"] = 2
+    backend.compact_log(log)
+
+    assert backend.log_journal.is_empty()
+    assert serials(JsonBackend(data_dir).load("alteration_log")) == [0, 1]
+
+
+def asset(deposit: int) -> dict:
+    return {"deposit": deposit, "stock_inv": {}, "revenue": 0}
+
+
+def test_torn_commit_drops_assets_and_records_together(data_dir):
+    backend = JsonBackend(data_dir)
+    backend.commit({"1": asset(9000)}, [log_record(0)])
+    backend.commit({"2": asset(8000)}, [])
+    # 交易寫到一半中斷，小隊資產及收支紀錄皆不生效
+    with open(backend.log_journal.file_path, mode="a", encoding="utf-8") as journal:
+        journal.write(json.dumps({"team_assets": {"1": asset(1)}, "records": [log_record(1)]})[:40])
+
+    assert backend.log_journal.last_serial() == 0
+    team_assets = backend.load("team_assets")
+    assert team_assets["1"] == asset(9000) and team_assets["2"] == asset(8000)
+    log = backend.load("alteration_log")
+    assert serials(log) == [0]
+    assert log["serial"] == 1
+
+
+def test_team_snapshot_marks_commits_as_written(data_dir):
+    backend = JsonBackend(data_dir)
+    backend.commit({"1": asset(9000)}, [log_record(0)])
+    team_assets = backend.load("team_assets")
+    backend.save("team_assets", team_assets)
+    # 快照之後的交易仍由日誌重播
+    backend.commit({"2": asset(8000)}, [log_record(1, "2")])
+
+    assert backend.log_journal.team_changes() == {"2": asset(8000)}
+    assert backend.log_journal.last_serial() == 1
+
+    # 壓縮收支紀錄只保留尚未寫入快照的小隊資產
+    backend.load("alteration_log")
+    assert list(backend.log_journal.records()) == []
+    reloaded = JsonBackend(data_dir)
+    assert reloaded.load("team_assets") == {**team_assets, "2": asset(8000)}
+    assert serials(reloaded.load("alteration_log")) == [0, 1]
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from Cogs.utilities.fixed_point import PRICE_SCALE
+from Cogs.utilities.market_engine import MarketEngine
+from Cogs.utilities.price_noise import PriceNoise
+from Cogs.utilities.pricing_models import GeometricBrownianMotion, LinearDrift, PricingModel
+
+
+MARKET_DATA = [
+    {"price": 30, "close": 30, "eps_qoq": 0.125, "adjust_ratio": 1.0, "random_ratio": 1},
+    {"price": 15.5, "close": 15, "eps_qoq": -0.0714, "adjust_ratio": 0.5, "random_ratio": 2},
+    {"price": 10, "close": 10, "eps_qoq": 0.0, "adjust_ratio": 1.0, "random_ratio": 0}
+]
+
+
+def test_market_data_round_trip():
+    engine = MarketEngine.from_market_data(MARKET_DATA)
+
+    assert len(engine) == 3
+    assert engine.price_ticks.tolist() == [30*PRICE_SCALE, 15_500_000, 10*PRICE_SCALE]
+    assert engine.to_market_data() == MARKET_DATA
+
+
+def test_linear_price_is_close_plus_ticks_times_drift():
+    engine = MarketEngine.from_market_data(MARKET_DATA)
+    drift = np.round(np.array([0.125, -0.0714*0.5, 0.0]) * PRICE_SCALE).astype(np.int64)
+    np.testing.assert_array_equal(engine.drift_ticks, drift)
+
+    for ticks in (0, 1, 63, 64, 500):
+        np.testing.assert_array_equal(
+            engine.price_at(ticks), engine.close_ticks + ticks*drift
+        )
+    np.testing.assert_array_equal(
+        engine.price_path(np.array([3, 1, 700])),
+        engine.close_ticks + np.outer([3, 1, 700], drift)
+    )
+
+    engine.advance_to(10)
+    np.testing.assert_array_equal(engine.price_ticks, engine.close_ticks + 10*drift)
+
+
+def test_open_round_uses_current_price_as_close():
+    engine = MarketEngine.from_market_data(MARKET_DATA)
+    engine.advance_to(20)
+    price = engine.price_ticks.copy()
+
+    statements = [
+        {"eps_qoq": 0.01, "adjust_ratio": 1.0, "random_ratio": 1}
+        for _ in range(len(engine))
+    ]
+    engine.open_round(statements)
+
+    np.testing.assert_array_equal(engine.close_ticks, price)
+    np.testing.assert_array_equal(engine.price_at(0), price)
+    np.testing.assert_array_equal(engine.price_at(5), price + 5*round(0.01*PRICE_SCALE))
+
+
+class SteppedLinear(LinearDrift):
+    """沒有封閉解、逐次變動的線性趨勢(與封閉解比較用)。
+    """
+
+    __slots__ = ()
+
+    def closed_form(self, trends: np.ndarray, totals: np.ndarray) -> None:
+        return None
+
+
+def noisy_engine(names: list) -> MarketEngine:
+    engine = MarketEngine.from_market_data(MARKET_DATA)
+    engine.set_models(names)
+    engine.set_noise(PriceNoise(11, 1, np.array([300_000.0, 150_000.0, 50_000.0])))
+    return engine
+
+
+def test_linear_closed_form_matches_stepping():
+    closed_form = noisy_engine(["linear"]*3)
+    stepped = noisy_engine(["linear"]*3)
+    stepped.models = [(SteppedLinear(), np.arange(3))]
+    stepped.reset_path()
+
+    np.testing.assert_array_equal(
+        closed_form.price_path(np.arange(300)), stepped.price_path(np.arange(300))
+    )
+    np.testing.assert_array_equal(
+        closed_form.price_at(299),
+        closed_form.close_ticks + 299*closed_form.drift_ticks
+        + closed_form.noise.cumulative(299)
+    )
+
+
+def test_mixed_models_only_step_path_dependent_stocks():
+    mixed = noisy_engine(["linear", "gbm", "mean_reversion"])
+    linear = noisy_engine(["linear"]*3)
+    path = mixed.price_path(np.arange(200))
+
+    np.testing.assert_array_equal(path[:, 0], linear.price_path(np.arange(200))[:, 0])
+    assert (path[:, 1] > 0).all()  # 幾何布朗運動股價恆為正
+    # 路徑分段延伸的結果與一次算完相同
+    fresh = noisy_engine(["linear", "gbm", "mean_reversion"])
+    for ticks in (5, 70, 199):
+        np.testing.assert_array_equal(fresh.price_at(ticks), path[ticks])
+
+
+def test_mean_reversion_without_noise_stays_on_flat_trend():
+    engine = MarketEngine.from_market_data(MARKET_DATA)
+    engine.set_models(["linear", "linear", "mean_reversion"])
+
+    np.testing.assert_array_equal(
+        engine.price_path(np.arange(100))[:, 2], engine.close_ticks[2]
+    )
+
+
+def test_models_are_looked_up_by_name():
+    assert isinstance(PricingModel.get("gbm"), GeometricBrownianMotion)
+    with pytest.raises(ValueError):
+        MarketEngine(2).set_models(["linear", "black_scholes"])
+    with pytest.raises(TypeError):
+        PricingModel()
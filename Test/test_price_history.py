@@ -0,0 +1,92 @@
+import asyncio
+
+import numpy as np
+
+from Cogs.stock_manager import StockManager
+from Cogs.utilities.price_history import PriceHistory
+from simulate import Simulation
+
+
+def filled_history(path: str, capacity: int = 8) -> PriceHistory:
+    """兩檔股票，第1回合在0~59秒、第2回合在60~89秒每秒一筆，股價為秒數及其負值。
+    """
+
+    history = PriceHistory(path, 2, capacity)
+    times = np.arange(90, dtype=np.float64)
+    history.extend(
+        times[:60], 1, times[:60] // 20, np.stack((times[:60], -times[:60]), axis=1)
+    )
+    history.extend(
+        times[60:], 2, (times[60:] - 60) // 20, np.stack((times[60:], -times[60:]), axis=1)
+    )
+    return history
+
+
+def test_ring_buffer_keeps_latest_records_across_reopen(tmp_path):
+    path = str(tmp_path / "history.npy")
+    history = PriceHistory(path, 2, 8)
+    for t in range(10):
+        history.append(float(t), 1, 0, np.array([t, -t]))
+
+    assert len(history) == 8
+    assert history.ordered()["time"].tolist() == list(range(2, 10))
+    history.flush()
+
+    reopened = PriceHistory(path, 2, 8)
+    assert reopened.last()["time"] == 9
+    assert reopened.ordered()["ticks"][:, 1].tolist() == [-t for t in range(2, 10)]
+
+    reopened.clear()
+    assert len(reopened) == 0 and reopened.last() is None
+    assert len(PriceHistory(path, 2, 8)) == 0
+
+
+def test_candles_by_seconds_news_and_round(tmp_path):
+    history = filled_history(str(tmp_path / "history.npy"), capacity=100)
+
+    minutes = history.candles(60.0)
+    assert minutes["time"].tolist() == [0, 60]
+    assert minutes["open"].tolist() == [[0, 0], [60, -60]]
+    assert minutes["high"].tolist() == [[59, 0], [89, -60]]
+    assert minutes["low"].tolist() == [[0, -59], [60, -89]]
+    assert minutes["close"].tolist() == [[59, -59], [89, -89]]
+
+    news = history.candles("news", stock_index=0)
+    assert news["round"].tolist() == [1, 1, 1, 2, 2]
+    assert news["news"].tolist() == [0, 1, 2, 0, 1]
+    assert news["open"].tolist() == [0, 20, 40, 60, 80]
+    assert news["close"].tolist() == [19, 39, 59, 79, 89]
+
+    rounds = history.candles("round", stock_index=1, round_=2)
+    assert rounds["open"].tolist() == [-60]
+    assert rounds["low"].tolist() == [-89]
+    assert history.candles("round", round_=3)["open"].shape == (0, 2)
+
+
+def test_late_wakeup_records_every_skipped_tick(store):
+    async def play() -> StockManager:
+        simulation = Simulation(seed=0, round_seconds=600, trade_rate=0.0, scripted=0)
+        await simulation.reset()
+        stock_manager = simulation.stock_manager
+        await stock_manager.start_round()
+        # 第2次晚了兩次變動才醒來，第3次在同一次變動內重複醒來
+        for seconds in (3.0, 9.0, 0.2, 3.0):
+            simulation.clock.advance(seconds)
+            await stock_manager.tick()
+        return stock_manager
+
+    stock_manager = asyncio.run(play())
+    records = stock_manager.price_history.ordered()
+
+    assert len(records) == 5
+    open_time = stock_manager.game_state["round_open_time"]
+    np.testing.assert_allclose(records["time"] - open_time, [3, 6, 9, 12, 15.2])
+    np.testing.assert_array_equal(
+        records["ticks"], stock_manager.engine.price_path(np.arange(1, 6))
+    )
+
+    frame = stock_manager.candles_frame("round")
+    assert len(frame) == len(stock_manager.engine)
+    assert frame["open"].tolist() == (records["ticks"][0] / 1e6).tolist()
+    assert frame["close"].tolist() == (records["ticks"][-1] / 1e6).tolist()
+    assert frame["symbol"].tolist() == [stock.symbol for stock in stock_manager.stocks]
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from Cogs.utilities.price_noise import GaussianNoise, NoiseModel, PriceNoise, SectorFactorNoise
+
+
+SCALE = np.array([500.0, 1000.0, 0.0, 250.0])
+
+
+def test_same_seed_replays_the_same_path():
+    first = PriceNoise(42, 1, SCALE).cumulative(np.arange(300))
+    second = PriceNoise(42, 1, SCALE).cumulative(np.arange(300))
+
+    assert first.dtype == np.int64
+    np.testing.assert_array_equal(first, second)
+    np.testing.assert_array_equal(first[0], 0)   # 開盤時沒有隨機變動
+    np.testing.assert_array_equal(first[:, 2], 0)   # 標準差為0的股票不變動
+
+
+def test_replay_does_not_depend_on_query_order():
+    in_order = PriceNoise(7, 2, SCALE)
+    expected = in_order.cumulative(np.arange(400))
+
+    # 先查詢遠處的變動(跨越多個區塊)再查詢前面的變動
+    out_of_order = PriceNoise(7, 2, SCALE)
+    assert np.array_equal(out_of_order.cumulative(399), expected[399])
+    assert np.array_equal(out_of_order.cumulative(5), expected[5])
+    np.testing.assert_array_equal(out_of_order.cumulative(np.arange(400)), expected)
+
+
+def test_rounds_and_seeds_are_independent():
+    base = PriceNoise(7, 1, SCALE).cumulative(100)
+
+    assert not np.array_equal(PriceNoise(7, 2, SCALE).cumulative(100), base)
+    assert not np.array_equal(PriceNoise(8, 1, SCALE).cumulative(100), base)
+
+
+def test_noise_model_must_implement_draw():
+    with pytest.raises(TypeError):
+        NoiseModel(4)
+
+    generator = np.random.default_rng(0)
+    assert GaussianNoise(4).draw(generator, 3).shape == (3, 4)
+
+
+
+SECTORS = ["科技", "科技", "金融", "傳統"]
+CORRELATION = np.array([[1.0, 0.3], [0.3, 1.0]])
+
+
+def test_sector_factor_noise_replays_and_rejects_invalid_correlation():
+    model = SectorFactorNoise(SECTORS, ["科技", "金融"], CORRELATION, 0.6)
+
+    first = PriceNoise(3, 1, SCALE, model).cumulative(np.arange(100))
+    second = PriceNoise(3, 1, SCALE, model).cumulative(np.arange(100))
+    np.testing.assert_array_equal(first, second)
+
+    with pytest.raises(ValueError):
+        SectorFactorNoise(SECTORS, ["科技", "金融"], np.array([[1.0, 2.0], [2.0, 1.0]]), 0.6)
+    with pytest.raises(ValueError):
+        SectorFactorNoise(SECTORS, ["科技", "金融"], np.array([[1.0, 0.3], [0.2, 1.0]]), 0.6)
+    with pytest.raises(ValueError):
+        SectorFactorNoise(SECTORS, ["科技", "金融"], CORRELATION, 1.5)
+
+
+def test_sector_factor_draws_have_the_configured_correlation():
+    model = SectorFactorNoise.from_config(
+        SECTORS, {"sectors": ["科技", "金融"], "correlation": CORRELATION.tolist(), "loading": 0.6}
+    )
+    draws = model.draw(np.random.default_rng(0), 200_000)
+    loading = 0.6**2
+
+    # 個股衝擊的變異數仍為1；同產業相關係數為loading^2，不同產業再乘上產業間的相關係數
+    np.testing.assert_allclose(model.loadings @ model.loadings.T, np.array([
+        [1.0, loading, loading*0.3, 0.0],
+        [loading, 1.0, loading*0.3, 0.0],
+        [loading*0.3, loading*0.3, 1.0, 0.0],
+        [0.0, 0.0, 0.0, 1.0]
+    ]), atol=1e-12)
+    np.testing.assert_allclose(np.corrcoef(draws.T), model.loadings @ model.loadings.T, atol=0.01)
+    # 設定中沒有的產業(傳統)使用獨立的因子
+    assert model.loadings.shape == (4, 3 + 4)
+
+
+def test_zero_loading_is_independent_gaussian_noise():
+    model = SectorFactorNoise(SECTORS, ["科技", "金融"], CORRELATION, 0.0)
+
+    np.testing.assert_array_equal(model.loadings[:, :3], 0.0)
+    np.testing.assert_array_equal(model.loadings[:, 3:], np.eye(4))
@@ -0,0 +1,112 @@
+from types import SimpleNamespace
+from typing import List
+import asyncio
+
+import nextcord as ntd
+
+from Cogs.utilities.fan_out import FanOut
+from Cogs.utilities.render_scheduler import RenderScheduler
+
+
+PRIORITIES = {"market": 0, "asset": 1}
+INTERVAL = 0.01
+
+
+class Renderer:
+    """記錄更新順序，可指定被限速的訊息鍵。
+    """
+
+    __slots__ = ("rounds", "limited")
+
+    def __init__(self):
+        self.rounds: List[List[str]] = []
+        self.limited: set = set()
+
+    def new_round(self):
+        self.rounds.append([])
+
+    async def __call__(self, key: str):
+        if(key in self.limited):
+            self.limited.discard(key)
+            raise ntd.HTTPException(
+                SimpleNamespace(status=429, reason="Too Many Requests"), "rate limited"
+            )
+        self.rounds[-1].append(key)
+
+
+def scheduler(renderer: Renderer, max_renders: int = 2) -> RenderScheduler:
+    return RenderScheduler(
+        renderer,
+        interval=INTERVAL,
+        max_renders=max_renders,
+        priorities=PRIORITIES,
+        fan_out=FanOut(4),
+        route=lambda key: key.split(":", 1)[0]
+    )
+
+
+async def run_round(render_scheduler: RenderScheduler, renderer: Renderer) -> List[str]:
+    """不經由背景工作，直接執行一輪更新。
+    """
+
+    renderer.new_round()
+    await render_scheduler.fan_out.gather(
+        (render_scheduler.route(key), lambda key=key: render_scheduler.render_one(key))
+        for key in render_scheduler.next_batch()
+    )
+    return renderer.rounds[-1]
+
+
+def test_marks_coalesce_and_batches_follow_priority():
+    renderer = Renderer()
+
+    async def play():
+        render_scheduler = scheduler(renderer)
+        render_scheduler.mark_dirty("asset:team_1", "news", "asset:team_2")
+        render_scheduler.mark_dirty("market", "asset:team_1", "market")
+        assert len(render_scheduler.dirty) == 4
+
+        first = await run_round(render_scheduler, renderer)
+        second = await run_round(render_scheduler, renderer)
+        return first, second, render_scheduler.dirty
+
+    first, second, dirty = asyncio.run(play())
+    # 每輪最多2則，未設定優先度的種類排在最後
+    assert sorted(first) == ["asset:team_1", "market"]
+    assert sorted(second) == ["asset:team_2", "news"]
+    assert not dirty
+
+
+def test_starved_keys_jump_the_queue():
+    async def play():
+        render_scheduler = scheduler(Renderer(), max_renders=1)
+        render_scheduler.mark_dirty("news")
+        await asyncio.sleep(INTERVAL * (RenderScheduler.MAX_WAIT_ROUNDS + 1))
+        render_scheduler.mark_dirty("market")
+        return render_scheduler.next_batch(), render_scheduler.next_batch()
+
+    assert asyncio.run(play()) == (["news"], ["market"])
+
+
+def test_rate_limited_render_backs_off_and_retries():
+    renderer = Renderer()
+    renderer.limited.add("market")
+
+    async def play():
+        render_scheduler = scheduler(renderer)
+        render_scheduler.start()
+        render_scheduler.mark_dirty("market", "asset:team_1")
+        await asyncio.sleep(INTERVAL / 2)
+        backoff = render_scheduler.backoff
+        assert "market" in render_scheduler.dirty   # 被限速，留到下一輪
+        # 退避後重試成功，每輪順利完成後退避減半
+        await asyncio.sleep(INTERVAL * 10)
+        render_scheduler.stop()
+        return backoff, render_scheduler.backoff, render_scheduler.dirty
+
+    renderer.new_round()
+    backoff, later, dirty = asyncio.run(play())
+    assert backoff == INTERVAL
+    assert later < backoff
+    assert sorted(renderer.rounds[0]) == ["asset:team_1", "market"]
+    assert not dirty
@@ -0,0 +1,105 @@
+import pytest
+
+from Cogs.utilities.game_store import GameStore
+from Cogs.utilities.json_backend import JsonBackend
+from Cogs.utilities.sqlite_backend import SqliteBackend, migrate_from_json
+from conftest import copy_data
+
+
+def log_record(serial: int, team: str | list = "1") -> dict:
+    return {
+        "log_type": "Transfer" if isinstance(team, list) else "DepositChange",
+        "time": "01/01 09:00AM",
+        "user": "tester",
+        "serial": serial,
+        "team": team,
+        "original_deposit": 10000,
+        "changed_deposit": 10000 + serial
+    }
+
+
+@pytest.fixture
+def backend(data_dir):
+    sqlite_backend = SqliteBackend(f"{data_dir}\\game_data.db")
+    yield sqlite_backend
+    sqlite_backend.connection.close()
+
+
+def test_migration_round_trips_every_file(data_dir):
+    json_backend = JsonBackend(data_dir)
+    team_assets = json_backend.load("team_assets")
+    team_assets["2"]["stock_inv"] = {"3": [[1000, 2], [1200, 1]], "5": [900, 900, 950]}
+    json_backend.save("team_assets", team_assets)
+    json_backend.append_log(log_record(0), log_record(1, ["2", "3"]), log_record(2, "3"))
+
+    counts = migrate_from_json(data_dir)
+
+    assert counts["alteration_log"] == 3
+    assert counts["team_assets"] == len(team_assets)
+    sqlite_backend = SqliteBackend(f"{data_dir}\\game_data.db")
+    # 舊格式(每張一個成本)轉為區段
+    team_assets["2"]["stock_inv"]["5"] = [[900, 2], [950, 1]]
+    assert sqlite_backend.load("team_assets") == team_assets
+    for file_name in ("market_data", "game_state", "alteration_log"):
+        assert sqlite_backend.load(file_name) == json_backend.load(file_name)
+    sqlite_backend.connection.close()
+
+
+def test_commit_upserts_teams_and_appends_logs(backend):
+    backend.save("team_assets", {
+        "1": {"deposit": 100, "stock_inv": {}, "revenue": 0},
+        "2": {"deposit": 200, "stock_inv": {"1": [[50, 2]]}, "revenue": 0}
+    })
+
+    changed = {
+        "2": {"deposit": 150, "stock_inv": {"1": [[50, 1]], "4": [[70, 3]]}, "revenue": 5},
+        "3": {"deposit": 300, "stock_inv": {}, "revenue": 0}
+    }
+    backend.commit(changed, [log_record(0, "2"), log_record(1, ["2", "3"])])
+
+    team_assets = backend.load("team_assets")
+    assert team_assets["1"] == {"deposit": 100, "stock_inv": {}, "revenue": 0}
+    assert team_assets["2"] == changed["2"]
+    assert team_assets["3"] == changed["3"]
+    assert [r["serial"] for r in backend.query_log({}, team="2")] == [0, 1]
+    assert [r["serial"] for r in backend.query_log({}, serial_from=1)] == [1]
+    assert backend.count_log({}, "2") == 2
+    assert backend.load("alteration_log")["serial"] == 2
+
+
+def test_failed_commit_writes_nothing(backend):
+    backend.save("team_assets", {"1": {"deposit": 100, "stock_inv": {}, "revenue": 0}})
+    backend.append_log(log_record(0))
+
+    # serial重複，整個交易不生效
+    with pytest.raises(Exception):
+        backend.commit(
+            {"1": {"deposit": 0, "stock_inv": {}, "revenue": 0}}, [log_record(0)]
+        )
+
+    assert backend.load("team_assets")["1"]["deposit"] == 100
+    assert backend.count_log({}, "1") == 1
+
+
+def test_exists_only_for_backend_files(backend):
+    for file_name in SqliteBackend.FILES:
+        assert backend.exists(file_name)
+    assert not backend.exists("team_asset")
+
+
+def test_game_store_reads_and_writes_through_sqlite(data_dir):
+    copy_data(STORAGE_BACKEND="sqlite")
+    migrate_from_json(data_dir)
+    store = GameStore(data_dir)
+
+    game_state = store.read("game_state")
+    assert isinstance(store.backend, SqliteBackend)
+    game_state["round"] = 2
+    store.write("game_state", game_state)
+    store.flush()
+    with pytest.raises(FileNotFoundError):
+        store.write("game_stat", {})
+
+    assert SqliteBackend(f"{data_dir}\\game_data.db").load("game_state")["round"] == 2
+    store.io_executor.shutdown()
+    store.backend.connection.close()
@@ -0,0 +1,48 @@
+import pytest
+
+from Cogs.utilities.stock_lots import StockLots, lot_runs
+
+
+def test_sell_takes_oldest_lots_first():
+    lots = StockLots()
+    lots.buy(1000, 2)
+    lots.buy(1200, 3)
+    lots.buy(900, 1)
+
+    assert lots.sell(3) == 1000*2 + 1200
+    assert lots.to_json() == [[1200, 2], [900, 1]]
+    assert len(lots) == 3
+    assert lots.total_cost == 1200*2 + 900
+
+    assert lots.sell(3) == 1200*2 + 900
+    assert lots.to_json() == []
+    assert lots.total_cost == 0
+    assert lots.average_cost == 0.0
+
+
+def test_buy_merges_same_cost_into_last_lot():
+    lots = StockLots()
+    lots.buy(1000, 1)
+    lots.buy(1000, 2)
+    lots.buy(1100, 1)
+    lots.buy(1000, 1)
+
+    assert lots.to_json() == [[1000, 3], [1100, 1], [1000, 1]]
+    assert lots.average_cost == (1000*4 + 1100) / 5
+
+
+def test_sell_more_than_held_raises_and_keeps_lots():
+    lots = StockLots([[1000, 2]])
+
+    with pytest.raises(ValueError):
+        lots.sell(3)
+    assert lots.to_json() == [[1000, 2]]
+    assert len(lots) == 2
+
+
+def test_legacy_format_is_converted_in_order():
+    assert lot_runs([1000, 1000, 1200, 1000]) == [[1000, 2], [1200, 1], [1000, 1]]
+
+    lots = StockLots.from_json([1000, 1000, 1200])
+    assert lots.sell(2) == 2000
+    assert lots.to_json() == [[1200, 1]]
@@ -0,0 +1,105 @@
+import asyncio
+import os
+
+import numpy as np
+
+from Cogs.stock_manager import StockManager
+from Cogs.utilities import access_file
+from Cogs.utilities.game_store import GameStore
+from simulate import HeadlessBot, Simulation
+from conftest import copy_data
+
+
+TICKS = 150
+# 停機期間(第幾次股價變動到第幾次)
+DOWNTIME = (40, 110)
+
+
+class NewsFeed:
+    """只記錄發送的新聞的 :class:`DiscordUI` 替身。
+    """
+
+    def __init__(self):
+        self.titles = []
+
+    async def release_news(self, title: str, content: str):
+        self.titles.append(title)
+
+    def mark_dirty(self, *keys: str):
+        pass
+
+
+async def play(restart: bool) -> dict:
+    """跑一回合的前`TICKS`次股價變動，`restart`時於`DOWNTIME`期間停機後重新啟動。
+    """
+
+    access_file.STORE = GameStore()
+    simulation = Simulation(seed=0, round_seconds=600, trade_rate=0.3, scripted=2)
+    news_feed = NewsFeed()
+    simulation.bot.cogs["DiscordUI"] = news_feed
+    await simulation.reset()
+
+    stock_manager = simulation.stock_manager
+    await stock_manager.start_round()
+    await stock_manager.fetch_round_news()
+    await stock_manager.release_due_news()
+    for i in range(TICKS):
+        simulation.clock.advance(StockManager.PRICE_CHANGE_FREQUENCY)
+        if(restart and DOWNTIME[0] <= i < DOWNTIME[1]):
+            if(i == DOWNTIME[1]-1):    # 重新啟動: 由硬碟讀取所有資料
+                await access_file.flush_async()
+                stock_manager.price_history.flush()
+                access_file.STORE.io_executor.shutdown()
+                access_file.STORE = GameStore()
+                bot = HeadlessBot()
+                stock_manager = StockManager(bot)
+                stock_manager.clock = simulation.clock
+                bot.add_cog(stock_manager)
+                bot.add_cog(simulation.assets)
+                bot.cogs["DiscordUI"] = news_feed
+                stock_manager.fetch_stocks()
+                stock_manager.fetch_game_state()
+                await stock_manager.catch_up()
+                await stock_manager.fetch_round_news()
+                await stock_manager.release_due_news()
+            continue
+        await stock_manager.tick()
+        await stock_manager.release_due_news()
+
+    history = stock_manager.price_history.ordered()
+    result = {
+        "prices": stock_manager.engine.price_ticks.copy(),
+        "ticks": history["ticks"].copy(),
+        "news": history["news"].copy(),
+        "time": history["time"].copy(),
+        "titles": list(news_feed.titles),
+        "released": stock_manager.game_state["released_news_count"]["1"]
+    }
+    stock_manager.price_history.flush()
+    access_file.STORE.io_executor.shutdown()
+    return result
+
+
+def play_in(directory: str, restart: bool) -> dict:
+    os.makedirs(directory)
+    os.chdir(directory)
+    copy_data(PRICE_NOISE_SCALE=0.05)
+    return asyncio.run(play(restart))
+
+
+def test_restart_catch_up_matches_uninterrupted_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(access_file, "STORE", access_file.STORE)   # 測試後還原
+
+    expected = play_in(str(tmp_path / "uninterrupted"), restart=False)
+    restarted = play_in(str(tmp_path / "restarted"), restart=True)
+
+    assert expected["ticks"].shape == (TICKS, len(expected["prices"]))
+    np.testing.assert_array_equal(restarted["prices"], expected["prices"])
+    np.testing.assert_array_equal(restarted["ticks"], expected["ticks"])
+    np.testing.assert_array_equal(restarted["news"], expected["news"])
+    np.testing.assert_allclose(restarted["time"], expected["time"])
+    assert restarted["titles"] == expected["titles"]
+    assert restarted["released"] == expected["released"] == 2
+    # 隨機變動確實有作用(線性趨勢每次的變動量固定)
+    assert (np.diff(expected["ticks"], axis=0).std(axis=0) > 0).any()
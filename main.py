@@ -85,6 +85,8 @@ def main():
     access_file.save_to("game_config", CONFIG)
 
     bot.run(os.environ.get("TOKEN"))
+    # 關閉機器人前寫回尚未儲存的資料
+    access_file.flush()
 
 
 if(__name__ == "__main__"):
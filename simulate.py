@@ -0,0 +1,356 @@
+"""無Discord的完整遊戲模擬(活動前彩排及效能測試用)。
+
+以模擬時鐘驅動 :class:`StockManager` 的回合流程(開盤、股價變動、發送新聞、收盤)，
+並由交易機器人呼叫 :class:`AssetsManager` 買賣股票及轉帳，數秒內跑完4回合。
+模擬使用`Data`資料夾的複本，不影響正式資料。
+
+    python simulate.py [--seed 0] [--round-seconds 600] [--trade-rate 0.3]
+                       [--scripted 2] [--backend json|sqlite] [--keep]
+"""
+from typing import Dict, List, Tuple
+from abc import ABC, abstractmethod
+import argparse
+import asyncio
+import json
+import random
+import shutil
+import tempfile
+import time
+
+from Cogs.assets_manager import AssetsManager
+from Cogs.stock_manager import StockManager
+from Cogs.utilities import access_file
+from Cogs.utilities.fixed_point import lot_value
+from Cogs.utilities.game_store import GameStore
+
+
+# 模擬所需的檔案
+SIMULATION_FILES: Tuple[str, ...] = (
+    *GameStore.STORE_FILES,
+    "raw_stock_data",
+    "raw_news"
+)
+
+
+class SimulatedClock:
+    """模擬時鐘，只在`advance()`時前進。
+    """
+
+    __slots__ = ("now",)
+
+    def __init__(self, start: float):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class HeadlessBot:
+    """只提供`get_cog()`的機器人替身。
+    """
+
+    __slots__ = ("cogs",)
+
+    def __init__(self):
+        self.cogs: Dict[str, object] = {}
+
+    def add_cog(self, cog: object):
+        self.cogs[type(cog).__name__] = cog
+
+    def get_cog(self, name: str) -> object | None:
+        return self.cogs.get(name)
+
+
+class TradingBot(ABC):
+    """交易機器人，每次股價變動後呼叫`act()`。
+    """
+
+    __slots__ = (
+        "team",
+        "rng"
+    )
+
+    def __init__(self, team: int, rng: random.Random):
+        self.team = team
+        self.rng = rng
+
+    @property
+    def user(self) -> str:
+        return f"{type(self).__name__}_{self.team}"
+
+    @abstractmethod
+    def act(self, simulation: "Simulation"):
+        """依模擬狀態交易(子類別實作)。
+        """
+
+
+class RandomTrader(TradingBot):
+    """隨機買賣股票，偶爾轉帳給其他小隊。
+    """
+
+    __slots__ = ()
+
+    def act(self, simulation: "Simulation"):
+        if(self.rng.random() >= simulation.trade_rate):
+            return
+
+        asset = simulation.assets.team_assets[self.team-1]
+        roll = self.rng.random()
+        if(roll < 0.05 and asset.deposit > 0):  # 轉帳
+            other = self.rng.choice(
+                [t for t in range(1, simulation.number_of_teams+1) if t != self.team]
+            )
+            simulation.transfer(
+                self.team, other, self.rng.randint(1, max(asset.deposit // 10, 1)), self.user
+            )
+        elif(roll < 0.55 or not asset.stock_inv):   # 買進
+            stock_index = self.rng.randrange(simulation.number_of_stocks)
+            lot_value_ = simulation.lot_value(stock_index)
+            if(lot_value_ <= 0):    # 股價跌到0以下不買
+                return
+            max_quantity = asset.deposit // lot_value_
+            if(max_quantity > 0):
+                simulation.trade(
+                    self.team, "買進", stock_index,
+                    self.rng.randint(1, min(max_quantity, 5)), self.user
+                )
+        else:   # 賣出
+            stock_index = self.rng.choice(list(asset.stock_inv))
+            simulation.trade(
+                self.team, "賣出", int(stock_index),
+                self.rng.randint(1, len(asset.stock_inv[stock_index])), self.user
+            )
+
+
+class BuyAndHoldTrader(TradingBot):
+    """每回合開盤時以所有存款買進同一檔股票並持有到遊戲結束。
+    """
+
+    __slots__ = ("stock_index", "last_round")
+
+    def __init__(self, team: int, rng: random.Random):
+        super().__init__(team, rng)
+        self.stock_index: int | None = None
+        self.last_round: int = 0
+
+    def act(self, simulation: "Simulation"):
+        if(simulation.round_ == self.last_round):
+            return
+        self.last_round = simulation.round_
+
+        if(self.stock_index is None):
+            self.stock_index = self.rng.randrange(simulation.number_of_stocks)
+        lot_value_ = simulation.lot_value(self.stock_index)
+        if(lot_value_ <= 0):    # 股價跌到0以下不買
+            return
+        quantity = simulation.assets.team_assets[self.team-1].deposit // lot_value_
+        if(quantity > 0):
+            simulation.trade(self.team, "買進", self.stock_index, quantity, self.user)
+
+
+class Simulation:
+    """以模擬時鐘跑完整場遊戲並統計吞吐量。
+    """
+
+    __slots__ = (
+        "bot",
+        "seed",
+        "assets",
+        "stock_manager",
+        "clock",
+        "trading_bots",
+        "round_seconds",
+        "trade_rate",
+        "ticks",
+        "trades",
+        "transfers"
+    )
+
+    def __init__(
+            self,
+            *,
+            seed: int,
+            round_seconds: float,
+            trade_rate: float,
+            scripted: int
+    ):
+        self.bot = HeadlessBot()
+        self.seed = seed    # 交易機器人及股價隨機變動的種子
+        self.assets = AssetsManager(self.bot)
+        self.stock_manager = StockManager(self.bot)
+        self.bot.add_cog(self.assets)
+        self.bot.add_cog(self.stock_manager)
+        self.clock = SimulatedClock(time.time())
+        self.stock_manager.clock = self.clock
+
+        rng = random.Random(seed)
+        self.trading_bots: List[TradingBot] = [
+            (BuyAndHoldTrader if team <= scripted else RandomTrader)(
+                team, random.Random(rng.random())
+            ) for team in range(1, self.number_of_teams+1)
+        ]
+        self.round_seconds = round_seconds
+        self.trade_rate = trade_rate
+        self.ticks: int = 0
+        self.trades: int = 0
+        self.transfers: int = 0
+
+    @property
+    def number_of_teams(self) -> int:
+        return self.assets.CONFIG["NUMBER_OF_TEAMS"]
+
+    @property
+    def number_of_stocks(self) -> int:
+        return len(self.stock_manager.engine)
+
+    @property
+    def round_(self) -> int:
+        return self.stock_manager.game_state["round"]
+
+    def lot_value(self, stock_index: int) -> int:
+        """指定股票當下1張的價值。
+        """
+
+        return lot_value(int(self.stock_manager.engine.price_ticks[stock_index]))
+
+    def trade(self, team: int, trade_type: str, stock_index: int, quantity: int, user: str):
+        self.assets.stock_trade(
+            team=team,
+            trade_type=trade_type,
+            stock_index=stock_index,
+            quantity=quantity,
+            user=user
+        )
+        self.trades += 1
+
+    def transfer(self, transfer_team: int, deposit_team: int, amount: int, user: str):
+        self.assets.transfer(
+            transfer_deposit_teams=(str(transfer_team), str(deposit_team)),
+            amount=amount,
+            user=user
+        )
+        self.transfers += 1
+
+    async def reset(self):
+        """|coro|
+
+        開新遊戲(等同`RESET_ALL`)。
+        """
+
+        self.assets.reset_asset_data()
+        self.stock_manager.reset_market_data()
+        await self.stock_manager.reset_game_state(price_seed=self.seed)
+        access_file.clear_log_data()
+
+    async def play_round(self):
+        """|coro|
+
+        以模擬時鐘跑完一回合: 每`PRICE_CHANGE_FREQUENCY`秒變動股價並讓機器人交易，
+        每`TIME_BETWEEN_NEWS`秒發送一則新聞。
+        """
+
+        stock_manager = self.stock_manager
+        await stock_manager.fetch_round_news()
+        await stock_manager.next_news()     # 開盤即發送第一則新聞
+        next_news_time = self.clock() + StockManager.TIME_BETWEEN_NEWS
+        round_end_time = self.clock() + self.round_seconds
+
+        while(self.clock() + StockManager.PRICE_CHANGE_FREQUENCY <= round_end_time):
+            self.clock.advance(StockManager.PRICE_CHANGE_FREQUENCY)
+            await stock_manager.tick()
+            self.ticks += 1
+            if(self.clock() >= next_news_time):
+                await stock_manager.next_news()
+                next_news_time += StockManager.TIME_BETWEEN_NEWS
+            for trading_bot in self.trading_bots:
+                trading_bot.act(self)
+
+    async def run(self) -> float:
+        """|coro|
+
+        跑完整場遊戲，回傳實際花費的秒數。
+        """
+
+        start = time.perf_counter()
+        await self.reset()
+        while(await self.stock_manager.start_round()):
+            await self.play_round()
+            await self.stock_manager.end_round()
+        return time.perf_counter() - start
+
+    def standings(self) -> List[Tuple[int, int, int, int]]:
+        """各小隊(小隊, 總資產, 存款, 總收益)，依總資產排序。
+        """
+
+        rows = [
+            (
+                team,
+                self.assets.net_worth(team),
+                self.assets.team_assets[team-1].deposit,
+                self.assets.team_assets[team-1].revenue
+            ) for team in range(1, self.number_of_teams+1)
+        ]
+        return sorted(rows, key=lambda x: x[1], reverse=True)
+
+
+def copy_data(data_dir: str, backend: str | None) -> str:
+    """將模擬所需的資料複製到暫存資料夾，回傳該資料夾。
+    """
+
+    sim_dir = tempfile.mkdtemp(prefix="ifm_simulation_")
+    for file_name in SIMULATION_FILES:
+        shutil.copyfile(f"{data_dir}\\{file_name}.json", f"{sim_dir}\\{file_name}.json")
+
+    if(backend is not None):
+        with open(f"{sim_dir}\\game_config.json", mode="r", encoding="utf-8") as json_file:
+            config = json.load(json_file)
+        config["STORAGE_BACKEND"] = backend
+        with open(f"{sim_dir}\\game_config.json", mode="w", encoding="utf-8") as json_file:
+            json.dump(config, json_file, ensure_ascii=False, indent=4)
+    return sim_dir
+
+
+async def main(args: argparse.Namespace):
+    sim_dir = copy_data(".\\Data", args.backend)
+    access_file.STORE = GameStore(sim_dir)
+
+    simulation = Simulation(
+        seed=args.seed,
+        round_seconds=args.round_seconds,
+        trade_rate=args.trade_rate,
+        scripted=args.scripted
+    )
+    elapsed = await simulation.run()
+
+    game_time = simulation.ticks * StockManager.PRICE_CHANGE_FREQUENCY
+    print(f"Simulated {simulation.round_-1} rounds ({game_time:,.0f}s of game time) in {elapsed:.2f}s")
+    print(f"Ticks: {simulation.ticks} ({simulation.ticks / elapsed:,.1f} ticks/sec)")
+    print(f"Trades: {simulation.trades} ({simulation.trades / elapsed:,.1f} trades/sec), "
+          f"transfers: {simulation.transfers}")
+    print("Final standings:")
+    for rank, (team, total, deposit, revenue) in enumerate(simulation.standings(), start=1):
+        print(f"{rank:2}. 第{team}小隊 總資產: {total:>10,} 存款: {deposit:>10,} 總收益: {revenue:>10,}")
+
+    if(args.keep):
+        print(f"Simulation data kept in {sim_dir}")
+    else:
+        access_file.STORE.io_executor.shutdown()
+        shutil.rmtree(sim_dir, ignore_errors=True)
+
+
+if(__name__ == "__main__"):
+    parser = argparse.ArgumentParser(description="Headless full-game simulation.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--round-seconds", type=float, default=600.0,
+                        help="simulated length of each round")
+    parser.add_argument("--trade-rate", type=float, default=0.3,
+                        help="chance of each bot trading after every price tick")
+    parser.add_argument("--scripted", type=int, default=2,
+                        help="number of buy-and-hold teams (the rest trade randomly)")
+    parser.add_argument("--backend", choices=("json", "sqlite"), default=None)
+    parser.add_argument("--keep", action="store_true",
+                        help="keep the simulation data folder")
+    asyncio.run(main(parser.parse_args()))